@@ -0,0 +1,399 @@
+# backtests/robustness.py
+"""
+Monte Carlo / bootstrap robustness engine over a finished run.
+
+Reads a Lumibot run (logs/<name>_stats.csv + logs/<name>_trades.csv) and
+produces thousands of resampled equity paths:
+
+  - block bootstrap of daily returns (keeps short-range autocorrelation)
+  - random start dates (contiguous windows of the real path)
+  - trade-sequence reshuffle (same realized trades, different order; the
+    product of the trades is fixed, so this method reports no CAGR)
+
+The drawdown breaker is replayed on every path: once drawdown from the peak
+reaches the profile's max_drawdown the path goes to cash for the cooldown,
+then re-enters with the peak re-anchored at its equity. `breaker_triggers`
+counts those liquidations.
+
+Every path set is a (paths x steps) NumPy matrix, so all metrics are computed
+column-wise without Python loops. Path generation is split into chunks and
+spread across cores with independent seeds.
+
+Usage:
+    python backtests/robustness.py logs/conservative_strategy_2025-11-27_05-30_bIpYTc --profile balanced
+"""
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+TRADING_DAYS = 252
+METHODS = ("block", "start", "trades")
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+@dataclass(frozen=True)
+class RunData:
+    name: str
+    daily_returns: np.ndarray          # strategy daily returns, oldest first
+    trade_returns: np.ndarray          # realized P&L per closing fill, as fraction of equity
+    years: float                       # calendar length of the run
+
+
+# -------------------------
+# Loading
+# -------------------------
+def _run_paths(run: str | Path) -> tuple[Path, Path]:
+    """
+    Accepts a run prefix (logs/<name>), or the path of its stats/trades CSV.
+    """
+    p = Path(run)
+    s = str(p)
+    for suffix in ("_stats.csv", "_trades.csv", "_tearsheet.csv", "_tearsheet.html", "_settings.json"):
+        if s.endswith(suffix):
+            s = s[: -len(suffix)]
+            break
+    return Path(s + "_stats.csv"), Path(s + "_trades.csv")
+
+
+def load_run(run: str | Path) -> RunData:
+    stats_path, trades_path = _run_paths(run)
+
+    stats = pd.read_csv(stats_path, usecols=["datetime", "portfolio_value"])
+    stats["datetime"] = pd.to_datetime(stats["datetime"], utc=True)
+    equity = stats.set_index("datetime")["portfolio_value"].astype(float).dropna()
+
+    # several snapshots per day -> last value per session
+    daily = equity.groupby(equity.index.tz_convert("America/New_York").date).last()
+    daily_returns = daily.pct_change().dropna().to_numpy(dtype=np.float64)
+
+    span_days = (equity.index[-1] - equity.index[0]).days
+    years = max(span_days / 365.25, 1.0 / TRADING_DAYS)
+
+    trade_returns = np.empty(0, dtype=np.float64)
+    if trades_path.exists():
+        trade_returns = _trade_returns(pd.read_csv(trades_path), equity)
+
+    name = stats_path.name[: -len("_stats.csv")]
+    return RunData(name=name, daily_returns=daily_returns, trade_returns=trade_returns, years=years)
+
+
+def _trade_returns(trades: pd.DataFrame, equity: pd.Series) -> np.ndarray:
+    """
+    Realized P&L of every closing fill (average-cost basis per symbol),
+    divided by portfolio value at the time of the fill.
+    """
+    fills = trades[trades["status"] == "fill"].copy()
+    if fills.empty:
+        return np.empty(0, dtype=np.float64)
+
+    fills["time"] = pd.to_datetime(fills["time"], utc=True)
+    fills = fills.sort_values("time", kind="stable")
+
+    qty_held: dict[str, float] = {}
+    avg_cost: dict[str, float] = {}
+    pnl: list[float] = []
+    when: list[pd.Timestamp] = []
+
+    for t, side, sym, qty, px in zip(
+        fills["time"], fills["side"], fills["symbol"],
+        fills["filled_quantity"].astype(float), fills["price"].astype(float),
+    ):
+        held = qty_held.get(sym, 0.0)
+        if side == "buy":
+            cost = avg_cost.get(sym, 0.0)
+            new_qty = held + qty
+            avg_cost[sym] = (cost * held + px * qty) / new_qty if new_qty > 0 else 0.0
+            qty_held[sym] = new_qty
+            continue
+
+        closed = min(qty, held)
+        if closed <= 0:
+            continue
+        pnl.append(closed * (px - avg_cost.get(sym, px)))
+        when.append(t)
+        qty_held[sym] = held - closed
+
+    if not pnl:
+        return np.empty(0, dtype=np.float64)
+
+    equity = equity[~equity.index.duplicated(keep="last")]
+    pv = equity.reindex(pd.DatetimeIndex(when), method="ffill").to_numpy(dtype=np.float64)
+    pv = np.where(np.isfinite(pv) & (pv > 0), pv, float(equity.iloc[0]))
+    return np.asarray(pnl, dtype=np.float64) / pv
+
+
+# -------------------------
+# Path generators: (n_paths, horizon) return matrices
+# -------------------------
+def block_bootstrap(returns: np.ndarray, n_paths: int, horizon: int, block: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Circular block bootstrap: stitch random blocks of `block` consecutive days.
+    """
+    n = len(returns)
+    block = max(1, min(int(block), n))
+    n_blocks = -(-horizon // block)
+    starts = rng.integers(0, n, size=(n_paths, n_blocks))
+    idx = (starts[:, :, None] + np.arange(block)[None, None, :]) % n
+    return returns[idx.reshape(n_paths, -1)[:, :horizon]]
+
+
+def random_starts(returns: np.ndarray, n_paths: int, horizon: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Contiguous windows of the real path, starting on random days.
+    """
+    n = len(returns)
+    horizon = min(horizon, n)
+    starts = rng.integers(0, n - horizon + 1, size=n_paths)
+    return returns[starts[:, None] + np.arange(horizon)[None, :]]
+
+
+def reshuffled_trades(trade_returns: np.ndarray, n_paths: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Same realized trades in a random order (one permutation per path).
+    """
+    order = rng.random((n_paths, len(trade_returns))).argsort(axis=1)
+    return trade_returns[order]
+
+
+# -------------------------
+# Metrics (vectorized over paths)
+# -------------------------
+def breaker_replay(paths: np.ndarray, breaker_dd: float, cooldown: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Drawdown breaker over (n_paths, steps) returns: liquidate when drawdown from
+    the peak reaches `breaker_dd`, sit in cash for `cooldown` steps, then re-enter
+    with the peak reset to current equity. Steps are a loop; paths are vectorized.
+    Returns (liquidations per path, fraction of steps spent in cash).
+    """
+    n, steps = paths.shape
+    equity = np.ones(n)
+    peak = np.ones(n)
+    cool = np.zeros(n, dtype=np.int64)
+    triggers = np.zeros(n)
+    cash = np.zeros(n)
+    for t in range(steps):
+        idle = cool > 0
+        cash += idle
+        cool[idle] -= 1
+        reentry = idle & (cool == 0)
+        peak[reentry] = equity[reentry]
+
+        live = ~idle
+        equity[live] *= 1.0 + paths[live, t]
+        np.maximum(peak, equity, out=peak)
+        hit = live & (1.0 - equity / peak >= breaker_dd)
+        triggers += hit
+        cool[hit] = cooldown
+        if cooldown == 0:
+            # no cooldown: re-anchor right away so one drawdown is one liquidation
+            peak[hit] = equity[hit]
+    return triggers, cash / max(steps, 1)
+
+
+def path_metrics(paths: np.ndarray, years: float, breaker_dd: float, cooldown: int = 0,
+                 with_cagr: bool = True) -> dict[str, np.ndarray]:
+    """
+    paths: (n_paths, steps) simple returns.
+    Recovery time is measured in steps from the deepest trough back to its prior peak
+    (NaN if the path never recovers). Breaker metrics come from `breaker_replay`.
+    """
+    equity = np.cumprod(1.0 + paths, axis=1)
+    peak = np.maximum.accumulate(np.maximum(equity, 1.0), axis=1)
+    dd = 1.0 - equity / peak
+
+    cagr = np.power(np.maximum(equity[:, -1], 0.0), 1.0 / max(years, 1e-9)) - 1.0
+    max_dd = dd.max(axis=1)
+
+    triggers, cash = breaker_replay(paths, breaker_dd, cooldown)
+
+    trough = dd.argmax(axis=1)
+    rows = np.arange(len(paths))
+    peak_at_trough = peak[rows, trough]
+    steps = np.arange(paths.shape[1])[None, :]
+    recovered = (equity >= peak_at_trough[:, None]) & (steps > trough[:, None])
+    first = recovered.argmax(axis=1)
+    recovery = np.where(recovered.any(axis=1), first - trough, np.nan).astype(np.float64)
+    recovery[max_dd <= 0] = 0.0
+
+    out = {
+        "cagr": cagr,
+        "max_drawdown": max_dd,
+        "breaker_triggered": (triggers > 0).astype(np.float64),
+        "breaker_triggers": triggers,
+        "breaker_cash_frac": cash,
+        "recovery_steps": recovery,
+    }
+    if not with_cagr:
+        del out["cagr"]
+    return out
+
+
+def _simulate_chunk(args: tuple) -> dict[str, np.ndarray]:
+    method, data, n_paths, horizon, block, years, breaker_dd, cooldown, seed = args
+    rng = np.random.default_rng(seed)
+    if method == "block":
+        paths = block_bootstrap(data, n_paths, horizon, block, rng)
+    elif method == "start":
+        paths = random_starts(data, n_paths, horizon, rng)
+    elif method == "trades":
+        paths = reshuffled_trades(data, n_paths, rng)
+    else:
+        raise ValueError(f"unknown method: {method}")
+    return path_metrics(paths, years, breaker_dd, cooldown, with_cagr=method != "trades")
+
+
+def simulate(
+    run: RunData,
+    breaker_dd: float,
+    method: str = "block",
+    cooldown_days: int = 0,
+    n_paths: int = 5000,
+    horizon_days: int | None = None,
+    block: int = 20,
+    seed: int | None = None,
+    workers: int | None = None,
+    chunk: int = 1000,
+) -> dict[str, np.ndarray]:
+    """
+    Runs one resampling method and returns per-path metric arrays.
+    `cooldown_days` are calendar days (as in the profile); trade paths have no
+    calendar, so there a breaker hit only liquidates and re-anchors the peak.
+    """
+    if method == "trades":
+        data = run.trade_returns
+        horizon = len(data)
+        years = run.years
+        cooldown = 0
+    else:
+        data = run.daily_returns
+        horizon = int(horizon_days or len(data))
+        if method == "start":
+            # full-length windows would all be the same path
+            horizon = min(horizon, len(data)) if horizon_days else len(data) // 2
+        years = horizon / TRADING_DAYS
+        cooldown = -(-int(cooldown_days) * 5 // 7)
+
+    if len(data) < 2 or horizon < 2:
+        return {}
+
+    sizes = [chunk] * (n_paths // chunk) + ([n_paths % chunk] if n_paths % chunk else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(method, data, n, horizon, block, years, breaker_dd, cooldown, s) for n, s in zip(sizes, seeds)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(jobs) <= 1:
+        parts = [_simulate_chunk(j) for j in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as ex:
+            parts = list(ex.map(_simulate_chunk, jobs))
+
+    return {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+
+
+def summarize(metrics: dict[str, np.ndarray]) -> pd.DataFrame:
+    rows = {}
+    for k, v in metrics.items():
+        finite = v[np.isfinite(v)]
+        row = {"mean": float(finite.mean()) if len(finite) else float("nan")}
+        for q in PERCENTILES:
+            row[f"p{q}"] = float(np.percentile(finite, q)) if len(finite) else float("nan")
+        row["nan_frac"] = float(1.0 - len(finite) / max(1, len(v)))
+        rows[k] = row
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+def _profile_breaker(profile_name: str) -> tuple[float, int]:
+    sys.path.append(str(PROJECT_ROOT))
+    from core.profiles import resolve_profile
+
+    p = resolve_profile(profile_name)
+    return float(p.max_drawdown), int(p.cooldown_days)
+
+
+def analyze(
+    run: str | Path,
+    profile: str = "balanced",
+    methods: tuple[str, ...] = METHODS,
+    breaker_dd: float | None = None,
+    cooldown_days: int | None = None,
+    **kwargs,
+) -> pd.DataFrame:
+    """
+    Distribution summary (one row per method x metric) for a run under a profile's breaker.
+    """
+    data = load_run(run)
+    dd_cap, cooldown = _profile_breaker(profile)
+    if breaker_dd is not None:
+        dd_cap = float(breaker_dd)
+    if cooldown_days is not None:
+        cooldown = int(cooldown_days)
+
+    frames = []
+    for m in methods:
+        metrics = simulate(data, dd_cap, method=m, cooldown_days=cooldown, **kwargs)
+        if not metrics:
+            continue
+        df = summarize(metrics).rename_axis("metric").reset_index()
+        df.insert(0, "method", m)
+        frames.append(df)
+
+    if not frames:
+        return pd.DataFrame()
+    out = pd.concat(frames, ignore_index=True)
+    out.insert(0, "profile", profile)
+    out.insert(0, "run", data.name)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Bootstrap robustness of a finished backtest run.")
+    ap.add_argument("runs", nargs="+", help="run prefix, e.g. logs/<name> (or its _stats.csv)")
+    ap.add_argument("--profile", action="append", help="profile per run (repeat; default balanced)")
+    ap.add_argument("--methods", default=",".join(METHODS))
+    ap.add_argument("--paths", type=int, default=5000)
+    ap.add_argument("--horizon", type=int, default=None, help="days per path (default: run length)")
+    ap.add_argument("--block", type=int, default=20)
+    ap.add_argument("--breaker-dd", type=float, default=None, help="override profile max_drawdown")
+    ap.add_argument("--cooldown-days", type=int, default=None, help="override profile cooldown_days")
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--out", default=None, help="optional CSV path")
+    args = ap.parse_args()
+
+    profiles = args.profile or ["balanced"]
+    if len(profiles) == 1:
+        profiles = profiles * len(args.runs)
+    if len(profiles) != len(args.runs):
+        ap.error("pass one --profile per run (or a single one for all)")
+
+    methods = tuple(m.strip() for m in args.methods.split(",") if m.strip())
+    frames = [
+        analyze(
+            run, profile=prof, methods=methods, breaker_dd=args.breaker_dd, cooldown_days=args.cooldown_days,
+            n_paths=args.paths, horizon_days=args.horizon, block=args.block,
+            seed=args.seed, workers=args.workers,
+        )
+        for run, prof in zip(args.runs, profiles)
+    ]
+    result = pd.concat(frames, ignore_index=True)
+
+    with pd.option_context("display.width", 200, "display.max_rows", 200, "display.max_columns", None, "display.float_format", "{:.4f}".format):
+        print(result)
+
+    if args.out:
+        result.to_csv(args.out, index=False)
+        print(f"saved -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
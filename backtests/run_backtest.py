@@ -12,20 +12,24 @@ from lumibot.backtesting import YahooDataBacktesting
 from strategies.conservative import ConservativeStrategy
 
 
-if __name__ == "__main__":
+def run(strategy_class=ConservativeStrategy, name: str = "conservative_strategy"):
     # Choose your date range and starting cash
     backtesting_start = datetime(2020, 2, 2)
     backtesting_end = datetime(2024, 12, 31)
     budget = 100_000  # starting cash
 
     # Run the backtest using keyword arguments
-    result = ConservativeStrategy.backtest(
+    return strategy_class.backtest(
         datasource_class=YahooDataBacktesting,
         backtesting_start=backtesting_start,
         backtesting_end=backtesting_end,
         budget=budget,
         benchmark_asset="SPY",
-        name="conservative_strategy",
+        name=name,
     )
 
+
+if __name__ == "__main__":
+    result = run()
+
     print(result)
\ No newline at end of file
@@ -0,0 +1,138 @@
+# benchmarks/kernels.py
+"""
+Kernel backends: parity check + speed on a synthetic universe
+(default 500 symbols x 5 years of daily bars).
+
+Compares the per-symbol pandas code the strategy used to run (ATR, rolling
+std, trailing-stop loop) with core.kernels on every available backend, and
+fails if any backend disagrees with the others.
+
+Usage:
+    python benchmarks/kernels.py [--symbols 500] [--days 1260]
+"""
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core import kernels  # noqa: E402
+
+ATR_PERIOD = 14
+VOL_LOOKBACK = 63
+ATR_MULT = 2.7
+
+
+def synthetic_panel(n_symbols: int, n_days: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    rets = rng.normal(0.0004, 0.02, size=(n_days, n_symbols))
+    close = 50.0 * np.exp(np.cumsum(rets, axis=0))
+    spread = np.abs(rng.normal(0.0, 0.01, size=close.shape)) * close
+    high = close + spread
+    low = close - spread
+    # a few missing bars, like real listings
+    close[rng.random(close.shape) < 0.001] = np.nan
+    entry = np.zeros(close.shape, dtype=bool)
+    entry[::20] = True
+    return high, low, close, entry
+
+
+def pandas_reference(high, low, close, entry):
+    atr_out = np.empty_like(close)
+    std_out = np.empty_like(close)
+    for j in range(close.shape[1]):
+        h, lo, c = pd.Series(high[:, j]), pd.Series(low[:, j]), pd.Series(close[:, j])
+        pc = c.shift(1)
+        tr = pd.concat([(h - lo).abs(), (h - pc).abs(), (lo - pc).abs()], axis=1).max(axis=1)
+        atr_out[:, j] = tr.rolling(ATR_PERIOD).mean().to_numpy()
+        std_out[:, j] = (c / c.shift(1) - 1.0).rolling(VOL_LOOKBACK).std().to_numpy()
+
+    # trailing stop, the strategy's per-day dict loop
+    exits = np.zeros(close.shape, dtype=bool)
+    for j in range(close.shape[1]):
+        hwm = None
+        for t in range(close.shape[0]):
+            px = close[t, j]
+            if entry[t, j] and (hwm is None or np.isnan(hwm)):
+                hwm = px
+            if hwm is None or np.isnan(px) or np.isnan(hwm):
+                continue
+            hwm = max(hwm, px)
+            stop = hwm - ATR_MULT * atr_out[t, j]
+            if px <= stop:
+                exits[t, j] = True
+                hwm = None
+    return atr_out, std_out, exits
+
+
+def run_kernels(high, low, close, entry, backend):
+    a = kernels.atr(high, low, close, ATR_PERIOD, backend=backend)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rets = np.full_like(close, np.nan)
+        rets[1:] = close[1:] / close[:-1] - 1.0
+    s = kernels.rolling_std(rets, VOL_LOOKBACK, backend=backend)
+    _, _, exits = kernels.trailing_stop(close, a, ATR_MULT, entry, backend=backend)
+    return a, s, exits
+
+
+def _timed(fn, *args, repeat=3):
+    best = float("inf")
+    out = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def _same(a, b, rtol=1e-7, atol=1e-10) -> bool:
+    if a.dtype == bool:
+        return bool(np.array_equal(a, b))
+    return bool(np.allclose(a, b, rtol=rtol, atol=atol, equal_nan=True))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Kernel backend parity + speed.")
+    ap.add_argument("--symbols", type=int, default=500)
+    ap.add_argument("--days", type=int, default=1260)
+    args = ap.parse_args()
+
+    high, low, close, entry = synthetic_panel(args.symbols, args.days)
+    print(f"panel: {args.symbols} symbols x {args.days} days, backends={kernels.BACKENDS}")
+
+    t_pd, ref = _timed(pandas_reference, high, low, close, entry, repeat=1)
+    print(f"  pandas (per symbol) {t_pd*1000:9.1f} ms")
+
+    ok = True
+    results = {}
+    for backend in kernels.BACKENDS:
+        run_kernels(high[:50], low[:50], close[:50], entry[:50], backend)  # JIT warm-up
+        t, out = _timed(run_kernels, high, low, close, entry, backend)
+        results[backend] = out
+        print(f"  {backend:<19} {t*1000:9.1f} ms  speedup x{t_pd / max(t, 1e-9):.0f}")
+
+    names = ("atr", "rolling_std", "trailing_exits")
+    for backend, out in results.items():
+        for name, got, want in zip(names, out, ref):
+            if not _same(got, want, rtol=1e-6):
+                ok = False
+                print(f"  MISMATCH {backend} vs pandas: {name}")
+    backends = list(results)
+    for other in backends[1:]:
+        for name, a, b in zip(names, results[backends[0]], results[other]):
+            if not _same(a, b):
+                ok = False
+                print(f"  MISMATCH {backends[0]} vs {other}: {name}")
+
+    print("parity: OK" if ok else "parity: FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# benchmarks/startup.py
+"""
+Startup-time budget checks.
+
+  1) `python -c "import core"` must stay cheap (no numpy / pandas / lumibot at import).
+  2) `backtests/run_backtest.py` must reach its first trading iteration within budget.
+
+Usage:
+    python benchmarks/startup.py                 # both checks
+    python benchmarks/startup.py --skip-backtest # import budget only
+
+Exits non-zero when a budget is exceeded.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+# Budgets are over a bare `python -c pass` on the same machine (seconds)
+IMPORT_CORE_BUDGET = 0.05
+FIRST_ITERATION_BUDGET = 30.0
+
+HEAVY_MODULES = ("numpy", "pandas", "lumibot")
+
+_PROBE = """
+import sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {root!r})
+sys.argv = [{script!r}]
+import os
+import runpy
+
+mod = runpy.run_path({script!r}, run_name="startup_probe")
+base = mod["ConservativeStrategy"]
+
+class StartupProbe(base):
+    def on_trading_iteration(self):
+        print(f"FIRST_ITERATION {{time.perf_counter() - t0:.3f}}", flush=True)
+        os._exit(0)
+
+mod["run"](StartupProbe, name="startup_probe")
+"""
+
+
+def _time_cmd(code: str, repeat: int) -> float:
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, check=True)
+        runs.append(time.perf_counter() - t0)
+    return statistics.median(runs)
+
+
+def check_import(repeat: int = 7) -> bool:
+    baseline = _time_cmd("pass", repeat)
+    core_t = _time_cmd("import core", repeat)
+    delta = core_t - baseline
+
+    leaked = subprocess.run(
+        [sys.executable, "-c", f"import sys, core, core.profiles; print([m for m in {HEAVY_MODULES!r} if m in sys.modules])"],
+        cwd=PROJECT_ROOT, check=True, capture_output=True, text=True,
+    ).stdout.strip()
+
+    ok = delta <= IMPORT_CORE_BUDGET and leaked == "[]"
+    print(
+        f"[import core] {core_t*1000:.1f} ms (python baseline {baseline*1000:.1f} ms, "
+        f"+{delta*1000:.1f} ms, budget +{IMPORT_CORE_BUDGET*1000:.0f} ms) heavy_imports={leaked} -> {'OK' if ok else 'OVER'}"
+    )
+    return ok
+
+
+def check_first_iteration(timeout: float = 600.0) -> bool:
+    script = str(PROJECT_ROOT / "backtests" / "run_backtest.py")
+    code = _PROBE.format(root=str(PROJECT_ROOT), script=script)
+
+    t0 = time.perf_counter()
+    try:
+        proc = subprocess.run(
+            [sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True,
+            timeout=timeout, env={**os.environ, "PYTHONUNBUFFERED": "1"},
+        )
+    except subprocess.TimeoutExpired:
+        print(f"[first iteration] timed out after {timeout:.0f}s -> OVER")
+        return False
+    wall = time.perf_counter() - t0
+
+    marker = [ln for ln in proc.stdout.splitlines() if ln.startswith("FIRST_ITERATION ")]
+    if not marker:
+        print(f"[first iteration] never reached (exit={proc.returncode})")
+        print(proc.stderr[-2000:])
+        return False
+
+    t = float(marker[-1].split()[1])
+    ok = t <= FIRST_ITERATION_BUDGET
+    print(f"[first iteration] {t:.2f}s in-process ({wall:.2f}s wall, budget {FIRST_ITERATION_BUDGET:.0f}s) -> {'OK' if ok else 'OVER'}")
+    return ok
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Startup-time budgets.")
+    ap.add_argument("--skip-backtest", action="store_true")
+    ap.add_argument("--repeat", type=int, default=7)
+    args = ap.parse_args()
+
+    ok = check_import(args.repeat)
+    if not args.skip_backtest:
+        ok = check_first_iteration() and ok
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
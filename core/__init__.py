@@ -0,0 +1,95 @@
+# core/__init__.py
+"""
+Lumibot-free strategy core: profiles, factor math, ranking, selection and sizing.
+
+Importing `core` is cheap; submodules (and NumPy / pandas) load on first use:
+
+    import core
+    core.PROFILES["balanced"]          # loads core.profiles only
+    core.rank_candidates(...)          # loads core.ranking (+ numpy)
+"""
+from __future__ import annotations
+
+import importlib
+
+_EXPORTS: dict[str, str] = {
+    # profiles
+    "Profile": "core.profiles",
+    "PROFILES": "core.profiles",
+    "resolve_profile": "core.profiles",
+    # factors
+    "Expr": "core.factors",
+    "FACTORS": "core.factors",
+    "FactorEvaluator": "core.factors",
+    "PricePanel": "core.factors",
+    "default_factor_weights": "core.factors",
+    "register_factor": "core.factors",
+    # universe
+    "data_dir": "core.universe",
+    "default_universe": "core.universe",
+    "load_sector_map": "core.universe",
+    # local stock store + shared-memory data plane
+    "load_store": "core.store",
+    "load_store_cached": "core.store",
+    "store_version": "core.store",
+    "DataPlaneClient": "core.dataplane",
+    # NYSE sessions
+    "next_session": "core.sessions",
+    "nyse_sessions": "core.sessions",
+    # weekly / monthly bars
+    "BarCache": "core.bars",
+    "load_bars": "core.bars",
+    # structured event log
+    "EventLog": "core.eventlog",
+    # background history prefetch
+    "PrefetchScheduler": "core.prefetch",
+    # indicators
+    "atr": "core.indicators",
+    "realized_vol": "core.indicators",
+    # ranking / regime
+    "breadth_fraction": "core.ranking",
+    "rank_candidates": "core.ranking",
+    "risk_on_fraction": "core.ranking",
+    "select_with_sector_caps": "core.ranking",
+    "trend_bull": "core.ranking",
+    # change-driven ranking
+    "IncrementalRanker": "core.incremental",
+    # persistent per-date signals
+    "CachedEvaluator": "core.signalcache",
+    "SignalCache": "core.signalcache",
+    # sizing
+    "inverse_vol_weights": "core.sizing",
+    "size_targets": "core.sizing",
+    "stop_distance": "core.sizing",
+    # target portfolio (store -> weights / shares)
+    "TargetPortfolio": "core.targets",
+    "target_portfolio": "core.targets",
+    # daily signals (universe histories -> regime, ranking, indicators)
+    "DailySignals": "core.signals",
+    "SignalSettings": "core.signals",
+    # holdings decisions (trailing exits, drawdown breaker, sized rebalance plan)
+    "HoldingsPlan": "core.book",
+    "drawdown_breach": "core.book",
+    "plan_holdings": "core.book",
+    "record_fills": "core.book",
+    "trailing_exits": "core.book",
+    # rebalance planning
+    "PlannedOrder": "core.rebalance",
+    "RebalanceReport": "core.rebalance",
+    "plan_rebalance": "core.rebalance",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name: str):
+    mod = _EXPORTS.get(name)
+    if mod is None:
+        raise AttributeError(f"module 'core' has no attribute {name!r}")
+    value = getattr(importlib.import_module(mod), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,331 @@
+# core/bars.py
+"""
+Weekly / monthly OHLCV bars derived from the daily panel.
+
+    wk = BarCache("W")
+    wk.update(daily_panel)                 # full build the first time
+    wk.update(daily_panel)                 # later: only the last (open) bar + new ones,
+                                           # if the history it was built from is unchanged
+    wk.window(today, 60, symbols, daily=daily_panel)   # last 60 weekly bars as of today
+
+    load_bars("M")                         # store-backed, persisted under data/.cache
+
+A bar is labelled with the last trading day it contains: open = first valid
+open, high/low = max/min, close = last valid close, volume = sum. The newest
+bar can be partial (the week / month still in progress); `window()` only
+returns bars of periods before `end`, plus a partial bar for `end`'s own
+period when given the daily panel to build it from.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from core.factors import PricePanel
+from core.store import cache_dir, load_store_cached, store_version
+
+FREQS = {"W": "W-FRI", "M": "M"}
+
+
+def _period_ids(dates: pd.DatetimeIndex, freq: str) -> np.ndarray:
+    if freq not in FREQS:
+        raise ValueError(f"unknown bar frequency: {freq} (use one of {tuple(FREQS)})")
+    if not len(dates):
+        return np.zeros(0, dtype=np.int64)
+    return dates.to_period(FREQS[freq]).asi8
+
+
+# -------------------------
+# Resampling
+# -------------------------
+def resample(panel: PricePanel, freq: str) -> PricePanel:
+    """
+    Daily panel -> one bar per week ("W", weeks end Friday) or calendar month ("M").
+    """
+    pid = _period_ids(panel.dates, freq)
+    n = len(pid)
+    if n == 0:
+        return PricePanel(panel.dates[:0], panel.symbols, {f: v[:0] for f, v in panel.fields.items()})
+
+    starts = np.flatnonzero(np.r_[True, pid[1:] != pid[:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    rows = np.arange(n)[:, None]
+
+    out: dict[str, np.ndarray] = {}
+    for f, v in panel.fields.items():
+        ok = np.isfinite(v)
+        if f == "open":
+            # first valid row per group: running min of valid row ids, taken backwards
+            idx = np.where(ok, rows, n)
+            idx = np.minimum.accumulate(idx[::-1], axis=0)[::-1][starts]
+            good = idx <= ends[:, None]
+            out[f] = np.where(good, v[np.minimum(idx, n - 1), np.arange(v.shape[1])], np.nan)
+        elif f == "close":
+            idx = np.maximum.accumulate(np.where(ok, rows, -1), axis=0)[ends]
+            good = idx >= starts[:, None]
+            out[f] = np.where(good, v[np.maximum(idx, 0), np.arange(v.shape[1])], np.nan)
+        elif f == "high":
+            out[f] = np.fmax.reduceat(v, starts, axis=0)
+        elif f == "low":
+            out[f] = np.fmin.reduceat(v, starts, axis=0)
+        else:
+            total = np.add.reduceat(np.where(ok, v, 0.0), starts, axis=0)
+            cnt = np.add.reduceat(ok, starts, axis=0)
+            out[f] = np.where(cnt > 0, total, np.nan)
+
+    return PricePanel(panel.dates[ends], panel.symbols, out)
+
+
+def _digest(daily: PricePanel, start: int, stop: int, h=None):
+    """
+    Hash of daily rows [start, stop) (dates + every field, row by row), continuing
+    `h`: hashing [0, n) then [n, m) equals hashing [0, m) in one go.
+    """
+    h = h if h is not None else hashlib.blake2b(digest_size=16)
+    names = sorted(daily.fields)
+    dates = daily.dates.asi8.view(np.float64)
+    for i in range(start, stop, 256):
+        j = min(stop, i + 256)
+        h.update(np.hstack([dates[i:j, None]] + [np.asarray(daily.fields[f][i:j], dtype=np.float64) for f in names]).data)
+    return h
+
+
+# -------------------------
+# Incremental cache
+# -------------------------
+class BarCache:
+    """
+    Resampled bars for one frequency, kept current against a growing daily panel.
+
+    The daily rows the bars were built from are fingerprinted (first date, row
+    count, content hash). An update with a different (or no) version only
+    extends the bars when the new panel starts with exactly those rows;
+    history extended backwards or corrected past rows rebuild everything.
+
+    The content hash is rolling: the hasher state is kept and only appended
+    rows are fed to it. While that state is held, the prefix is checked
+    against a sample of the cached rows (first, last and up to PROBE_ROWS
+    spread between, which catches re-adjusted history such as splits)
+    instead of re-hashing it; after load() the first update re-hashes the
+    prefix in full. `verify="full"` always re-hashes.
+    """
+
+    PROBE_ROWS = 64
+
+    def __init__(self, freq: str):
+        if freq not in FREQS:
+            raise ValueError(f"unknown bar frequency: {freq} (use one of {tuple(FREQS)})")
+        self.freq = freq
+        self.panel: PricePanel | None = None
+        self.version: str | None = None
+        self.n_daily = 0
+        self.first_daily: pd.Timestamp | None = None
+        self.digest: str | None = None
+        self._hasher = None                          # rolling hash state over the n_daily rows
+        self._probe: tuple[np.ndarray, np.ndarray, dict[str, np.ndarray]] | None = None
+        self.rebuilt = 0
+        self.appended = 0
+
+    @property
+    def last_daily(self) -> pd.Timestamp | None:
+        if self.panel is None or not len(self.panel.dates):
+            return None
+        return self.panel.dates[-1]
+
+    def update(self, daily: PricePanel, version: str | None = None, verify: str = "sample") -> int:
+        """
+        Brings the bars up to `daily`. Same version as the cache: nothing to do.
+        Otherwise, if `daily` starts with the rows the cache was built from, only
+        rows from the start of the newest cached period onward are resampled;
+        anything else (other symbols, rows added before the start, changed past
+        rows, shorter history) rebuilds everything. `verify`: "sample" or "full"
+        prefix check (see the class docstring).
+        Returns the number of bars (re)computed.
+        """
+        if verify not in ("sample", "full"):
+            raise ValueError(f"unknown verify mode: {verify}")
+        if self.panel is not None and version is not None and version == self.version:
+            return 0
+
+        h = self._verified_prefix(daily, full=verify == "full")
+        if h is None:
+            self.panel = resample(daily, self.freq)
+            self.version = version
+            self.rebuilt += 1
+            self._fingerprint(daily, None, 0)
+            return len(self.panel.dates)
+
+        if len(daily.dates) == self.n_daily:
+            self.version = version
+            return 0
+
+        # recompute the newest (possibly partial) period plus everything after it
+        open_period = _period_ids(self.panel.dates[-1:], self.freq)[0]
+        daily_pid = _period_ids(daily.dates, self.freq)
+        start = int(np.searchsorted(daily_pid, open_period, side="left"))
+        tail = resample(
+            PricePanel(daily.dates[start:], daily.symbols, {f: v[start:] for f, v in daily.fields.items()}),
+            self.freq,
+        )
+        keep = len(self.panel.dates) - 1
+        fields = {
+            f: np.concatenate([self.panel.fields[f][:keep], tail.fields[f]]) for f in self.panel.fields
+        }
+        self.panel = PricePanel(self.panel.dates[:keep].append(tail.dates), daily.symbols, fields)
+        self.version = version
+        self.appended += len(tail.dates)
+        self._fingerprint(daily, h, self.n_daily)
+        return len(tail.dates)
+
+    def _verified_prefix(self, daily: PricePanel, full: bool = False):
+        """
+        Hasher over daily's first n_daily rows if they are the rows the cache
+        was built from, else None.
+        """
+        n = self.n_daily
+        if (
+            self.panel is None
+            or self.digest is None
+            or self.panel.symbols != daily.symbols
+            or n == 0
+            or len(daily.dates) < n
+            or daily.dates[0] != self.first_daily
+            or daily.dates[n - 1] != self.last_daily
+        ):
+            return None
+        if self._hasher is not None and not full:
+            return self._hasher.copy() if self._probe_matches(daily) else None
+        h = _digest(daily, 0, n)
+        return h if h.hexdigest() == self.digest else None
+
+    def _probe_matches(self, daily: PricePanel) -> bool:
+        rows, dates, values = self._probe
+        if not np.array_equal(daily.dates.asi8[rows], dates):
+            return False
+        return all(
+            f in daily.fields and np.array_equal(np.asarray(daily.fields[f][rows]), v, equal_nan=True)
+            for f, v in values.items()
+        )
+
+    def _fingerprint(self, daily: PricePanel, h, start: int):
+        h = _digest(daily, start, len(daily.dates), h)
+        n = len(daily.dates)
+        self.n_daily = n
+        self.first_daily = daily.dates[0] if n else None
+        self.digest = h.hexdigest()
+        self._hasher = h
+        rows = np.unique(np.linspace(0, n - 1, min(n, self.PROBE_ROWS)).astype(np.intp)) if n else np.zeros(0, np.intp)
+        self._probe = (rows, daily.dates.asi8[rows].copy(), {f: np.array(v[rows]) for f, v in daily.fields.items()})
+
+    def window(self, end, length: int, symbols: list[str] | None = None,
+               inclusive: bool = False, daily: PricePanel | None = None) -> PricePanel:
+        """
+        Last `length` bars as of `end`: every bar of an earlier week / month,
+        plus, when `daily` is given, the in-progress bar for `end`'s period
+        built from its daily rows before `end` (or through it if `inclusive`).
+        Safe for historical as-of dates: no bar contains rows after `end`.
+        """
+        if self.panel is None:
+            raise RuntimeError("BarCache.update() has not been called")
+        end = pd.Timestamp(end)
+        cur = _period_ids(pd.DatetimeIndex([end]), self.freq)[0]
+        pid = _period_ids(self.panel.dates, self.freq)
+        stop = int(np.searchsorted(pid, cur, side="left"))
+        done = self.panel.window(self.panel.dates[stop - 1], length, symbols, inclusive=True) if stop else \
+            self.panel.window(end, 0, symbols)
+
+        if daily is None:
+            return done
+        rows = daily.window(end, 31, symbols, inclusive=inclusive)
+        rows_pid = _period_ids(rows.dates, self.freq)
+        first = int(np.searchsorted(rows_pid, cur, side="left"))
+        if first >= len(rows.dates):
+            return done
+        live = resample(
+            PricePanel(rows.dates[first:], rows.symbols, {f: v[first:] for f, v in rows.fields.items()}),
+            self.freq,
+        )
+        n_done = min(len(done.dates), max(int(length) - 1, 0))
+        start = len(done.dates) - n_done
+        fields = {
+            f: np.concatenate([done.fields[f][start:], live.fields[f]])
+            for f in done.fields if f in live.fields
+        }
+        return PricePanel(done.dates[start:].append(live.dates), done.symbols, fields)
+
+    # -------------------------
+    # Persistence
+    # -------------------------
+    def save(self, path: Path):
+        if self.panel is None:
+            raise RuntimeError("nothing to save")
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp.npz")
+        np.savez(
+            tmp,
+            freq=self.freq,
+            version=self.version or "",
+            n_daily=self.n_daily,
+            first_daily=np.datetime64(self.first_daily, "ns") if self.first_daily is not None else np.datetime64("NaT", "ns"),
+            digest=self.digest or "",
+            dates=self.panel.dates.to_numpy(dtype="datetime64[ns]"),
+            symbols=np.array(self.panel.symbols, dtype=object).astype(str),
+            **{f"f_{f}": v for f, v in self.panel.fields.items()},
+        )
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "BarCache":
+        with np.load(Path(path)) as z:
+            cache = cls(str(z["freq"]))
+            cache.version = str(z["version"]) or None
+            if "digest" in z.files:
+                cache.n_daily = int(z["n_daily"])
+                first = pd.Timestamp(z["first_daily"][()])
+                cache.first_daily = None if pd.isna(first) else first
+                cache.digest = str(z["digest"]) or None
+            fields = {k[2:]: z[k] for k in z.files if k.startswith("f_")}
+            cache.panel = PricePanel(pd.DatetimeIndex(z["dates"]), tuple(z["symbols"].tolist()), fields)
+        return cache
+
+
+# -------------------------
+# Store-backed bars
+# -------------------------
+def cache_path(freq: str, directory: Path | None = None) -> Path:
+    """
+    data/.cache/bars_<freq>.npz (next to the store directory).
+    """
+    return cache_dir(directory) / f"bars_{freq}.npz"
+
+
+def load_bars(freq: str, directory: Path | None = None, daily: PricePanel | None = None, save: bool = True) -> BarCache:
+    """
+    Bars for the local store. Served from the on-disk cache when it matches the
+    store version; otherwise the cached bars are brought up to date from the
+    daily panel (loaded from the store unless given; rebuilt unless the cached
+    daily history is unchanged) and written back.
+    """
+    version = store_version(directory)
+    path = cache_path(freq, directory)
+
+    cache: BarCache | None = None
+    try:
+        cache = BarCache.load(path)
+    except (OSError, KeyError, ValueError):
+        cache = None
+    if cache is not None and cache.freq == freq and cache.version == version:
+        return cache
+
+    if daily is None:
+        daily, _ = load_store_cached(directory)
+    if cache is None or cache.freq != freq:
+        cache = BarCache(freq)
+    cache.update(daily, version)
+    if save:
+        cache.save(path)
+    return cache
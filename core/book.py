@@ -0,0 +1,178 @@
+# core/book.py
+"""
+Holdings decisions without a broker: trailing-stop exits, the drawdown
+breaker and the sized, turnover-aware rebalance plan.
+
+The caller owns the state (highest close per held symbol, equity peak) and
+passes it in; functions that advance it say so. Prices, vols and ATRs are
+looked up through callables so only the names a decision needs are fetched.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Callable
+
+from core.defaults import MIN_ORDER_DOLLARS
+from core.profiles import Profile
+from core.rebalance import RebalanceReport, plan_rebalance
+from core.sizing import inverse_vol_weights, size_targets, stop_distance
+
+Lookup = Callable[[str], "float | None"]
+
+
+# -------------------------
+# Stops / exits
+# -------------------------
+@dataclass(frozen=True)
+class TrailExit:
+    symbol: str
+    quantity: float
+    price: float
+    stop: float
+
+
+def trailing_exits(
+    held: dict[str, float],
+    price: Lookup,
+    atr: Lookup,
+    highest: dict[str, float],
+    mult: float,
+) -> list[TrailExit]:
+    """
+    Ratchets `highest` (in place) to today's prices and returns the long
+    positions whose price closed at / below highest - mult * ATR; their
+    anchors are dropped. Symbols without a positive price are left untouched.
+    """
+    from core import kernels
+
+    syms, qtys, pxs, atrs = [], [], [], []
+    for sym, qty in held.items():
+        if qty <= 0:
+            continue
+        px = price(sym)
+        if px is None or px <= 0:
+            continue
+        a = atr(sym)
+        syms.append(sym)
+        qtys.append(float(qty))
+        pxs.append(float(px))
+        atrs.append(float("nan") if a is None else a)
+    if not syms:
+        return []
+
+    prev = [highest.get(sym, px) for sym, px in zip(syms, pxs)]
+    highs, stops, hits = kernels.trail_update(prev, pxs, atrs, mult)
+
+    exits: list[TrailExit] = []
+    for sym, qty, px, high, stop, hit in zip(syms, qtys, pxs, highs, stops, hits):
+        highest[sym] = float(high)
+        if hit:
+            exits.append(TrailExit(sym, qty, px, float(stop)))
+            highest.pop(sym, None)
+    return exits
+
+
+def drawdown_breach(peak: float | None, value: float, max_drawdown: float) -> tuple[float, float | None]:
+    """
+    (new equity peak, drawdown from it when it reached `max_drawdown`, else None).
+    """
+    value = float(value)
+    if peak is None or value > peak:
+        return value, None
+    dd = (peak - value) / max(1e-9, peak)
+    return peak, (dd if dd >= max_drawdown else None)
+
+
+# -------------------------
+# Rebalance: inverse-vol weights + ATR risk sizing
+# -------------------------
+@dataclass
+class HoldingsPlan:
+    report: RebalanceReport
+    targets: dict[str, int] = field(default_factory=dict)   # sized shares per selected name
+    prices: dict[str, float] = field(default_factory=dict)
+    vols: dict[str, float] = field(default_factory=dict)
+    invested: float = 0.0                                     # dollars in targets
+
+
+def plan_holdings(
+    current: dict[str, int],
+    selected: list[str],
+    exposure: float,
+    portfolio_value: float,
+    profile: Profile,
+    price: Lookup,
+    vol: Lookup,
+    atr: Lookup,
+    highest: dict[str, float],
+    min_order_dollars: float = MIN_ORDER_DOLLARS,
+) -> HoldingsPlan:
+    """
+    Sells what left the selection, sizes the selection (inverse-vol weights,
+    ATR risk caps) and plans the orders with the profile's no-trade bands and
+    turnover budget. Held positions are measured against their trailing stop
+    (`highest` - stop distance).
+    """
+    pv = float(portfolio_value)
+    exposure = max(0.0, min(1.0, float(exposure)))
+    selected_set = set(selected)
+
+    exits = {s for s in current if s not in selected_set}
+    prices: dict[str, float] = {}
+    for sym in exits:
+        px = price(sym)
+        if px is not None and px > 0:
+            prices[sym] = float(px)
+
+    vols: dict[str, float] = {}
+    for sym in selected:
+        v = vol(sym)
+        if v is not None and v > 0:
+            vols[sym] = v
+    weights = inverse_vol_weights(vols)
+
+    atrs: dict[str, float] = {}
+    for sym in set(weights) | exits:
+        if sym in weights:
+            px = price(sym)
+            if px is None or px <= 0:
+                continue
+            prices[sym] = float(px)
+        a = atr(sym)
+        if a is not None:
+            atrs[sym] = a
+
+    targets, invested = size_targets(weights, prices, atrs, pv, exposure, profile, min_order_dollars)
+
+    report = plan_rebalance(
+        current,
+        targets,
+        prices,
+        {s: stop_distance(a, profile) for s, a in atrs.items()},
+        pv,
+        exits=exits,
+        stops={
+            s: highest[s] - stop_distance(a, profile)
+            for s, a in atrs.items() if s in current and s in highest
+        },
+        weight_band=profile.weight_band,
+        risk_band=profile.risk_band,
+        turnover_budget=profile.turnover_budget,
+        min_order_dollars=min_order_dollars,
+    )
+    return HoldingsPlan(report, targets, prices, vols, invested)
+
+
+def record_fills(plan: HoldingsPlan, current: dict[str, int], highest: dict[str, float]):
+    """
+    Moves the trailing-stop anchors for the planned orders (in place): buys
+    start / raise the anchor at the price, closed positions drop it.
+    """
+    for order in plan.report.orders:
+        sym = order.symbol
+        if order.side == "buy" and order.reason != "exit":
+            last = float(plan.prices.get(sym) or 0.0)
+            if last > 0:
+                highest[sym] = max(highest.get(sym, last), last)
+        elif order.reason == "exit" or current.get(sym, 0) - order.quantity <= 0:
+            highest.pop(sym, None)
@@ -0,0 +1,378 @@
+# core/dataplane.py
+"""
+Shared-memory market data plane.
+
+One daemon parses data/STOCKS once, copies the price panel into a POSIX
+shared-memory block and publishes a small JSON manifest (version, shapes,
+symbols, sectors). Strategies, notebooks and sweep workers attach to that
+block zero-copy instead of each parsing the CSVs and holding their own copies.
+
+    python -m core.dataplane serve            # daemon (polls the store for changes)
+    python -m core.dataplane publish          # ask a running daemon to reload now
+
+    from core.dataplane import DataPlaneClient
+    client = DataPlaneClient()
+    panel = client.panel()                    # read-only PricePanel views
+
+Versioning: every publish goes to a new block named after the store version.
+The manifest is swapped atomically; readers pick up the new version on their
+next `panel()` call while arrays they already hold stay mapped. Old blocks are
+unlinked after a grace period (an unlinked block stays valid for processes
+that still map it).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from pathlib import Path
+import argparse
+import json
+import os
+import signal
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.factors import PricePanel
+from core.store import FIELDS, load_store, store_version
+from core.universe import data_dir, sector_map_from_meta
+
+RUNTIME_DIR = Path(os.environ.get("LAWVISORY_DATAPLANE_DIR", Path(tempfile.gettempdir()) / "lawvisory-dataplane"))
+MANIFEST = "manifest.json"
+SEGMENT_PREFIX = "lawvisory_"
+
+
+# -------------------------
+# Shared segment layout
+# -------------------------
+def _layout(n_dates: int, n_symbols: int) -> dict[str, int]:
+    """
+    Byte offsets inside one block: dates (int64 ns) then one float64 matrix per field.
+    """
+    offsets = {"dates": 0}
+    pos = n_dates * 8
+    for f in FIELDS:
+        offsets[f] = pos
+        pos += n_dates * n_symbols * 8
+    offsets["_size"] = max(pos, 1)
+    return offsets
+
+
+# Attached blocks stay mapped until release(). Reader arrays are built with
+# np.frombuffer, so every view of a block holds an export on its buffer and
+# release() fails (BufferError) instead of unmapping memory still in use.
+_ATTACHED: dict[str, shared_memory.SharedMemory] = {}
+
+# Blocks created by a DataPlaneServer in this process. Their resource-tracker
+# entry belongs to the server (dropped by unlink()); a reader in the same
+# process must leave it alone, or the tracker reports a KeyError at unlink.
+_OWNED: set[str] = set()
+
+
+def _attach_segment(name: str) -> shared_memory.SharedMemory:
+    if name in _ATTACHED:
+        return _ATTACHED[name]
+    shm = _open_segment(name)
+    _ATTACHED[name] = shm
+    return shm
+
+
+def release(segment: str) -> bool:
+    """
+    Unmap a previously attached block. Returns False (and keeps it mapped)
+    while arrays from it are still alive.
+    """
+    shm = _ATTACHED.pop(segment, None)
+    if shm is None:
+        return False
+    try:
+        shm.close()
+    except BufferError:
+        _ATTACHED[segment] = shm
+        return False
+    return True
+
+
+def _open_segment(name: str) -> shared_memory.SharedMemory:
+    try:  # Python 3.13+: don't let this process' resource tracker own the block
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        if name in _OWNED:
+            # registered once already by the server here; the tracker keeps a set
+            return shm
+        try:
+            from multiprocessing import resource_tracker
+
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return shm
+
+
+# -------------------------
+# Publisher (daemon side)
+# -------------------------
+class DataPlaneServer:
+    def __init__(self, store_dir: Path | None = None, runtime_dir: Path = RUNTIME_DIR, grace_seconds: float = 300.0):
+        self.store_dir = store_dir or data_dir()
+        self.runtime_dir = Path(runtime_dir)
+        self.grace_seconds = float(grace_seconds)
+        self.version: str | None = None
+        self._segments: dict[str, shared_memory.SharedMemory] = {}
+        self._retired: list[tuple[float, str]] = []
+        self._reload = False
+
+    def publish(self, force: bool = False) -> str:
+        version = store_version(self.store_dir)
+        if version == self.version and not force:
+            return version
+
+        panel, meta = load_store(self.store_dir)
+        n_dates, n_sym = len(panel.dates), len(panel.symbols)
+        layout = _layout(n_dates, n_sym)
+
+        name = f"{SEGMENT_PREFIX}{version}_{int(time.time())}"
+        shm = shared_memory.SharedMemory(name=name, create=True, size=layout["_size"])
+        _OWNED.add(name)
+        np.ndarray((n_dates,), dtype=np.int64, buffer=shm.buf, offset=layout["dates"])[:] = (
+            panel.dates.to_numpy(dtype="datetime64[ns]").view(np.int64)
+        )
+        for f in FIELDS:
+            dst = np.ndarray((n_dates, n_sym), dtype=np.float64, buffer=shm.buf, offset=layout[f])
+            dst[:] = panel.fields[f]
+
+        manifest = {
+            "version": version,
+            "segment": name,
+            "published_at": time.time(),
+            "pid": os.getpid(),
+            "n_dates": n_dates,
+            "symbols": list(panel.symbols),
+            "fields": list(FIELDS),
+            "offsets": {k: v for k, v in layout.items() if not k.startswith("_")},
+            "meta": meta,
+        }
+        self._write_manifest(manifest)
+
+        old = [n for n in self._segments if n != name]
+        self._segments[name] = shm
+        self._retired.extend((time.time(), n) for n in old)
+        self.version = version
+        print(f"[dataplane] published version={version} symbols={n_sym} dates={n_dates} segment={name}", flush=True)
+        return version
+
+    def _write_manifest(self, manifest: dict):
+        self.runtime_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.runtime_dir / f".{MANIFEST}.{os.getpid()}.tmp"
+        tmp.write_text(json.dumps(manifest))
+        os.replace(tmp, self.runtime_dir / MANIFEST)
+
+    def _reap(self, now: float, force: bool = False):
+        keep: list[tuple[float, str]] = []
+        for retired_at, name in self._retired:
+            if force or now - retired_at >= self.grace_seconds:
+                shm = self._segments.pop(name, None)
+                if shm is not None:
+                    _unlink(shm)
+            else:
+                keep.append((retired_at, name))
+        self._retired = keep
+
+    def close(self):
+        for shm in list(self._segments.values()):
+            _unlink(shm)
+        self._segments.clear()
+        self._retired.clear()
+        try:
+            (self.runtime_dir / MANIFEST).unlink()
+        except FileNotFoundError:
+            pass
+
+    def serve(self, poll_seconds: float = 30.0):
+        """
+        Publish, then republish whenever the store fingerprint changes
+        (or on SIGHUP). SIGINT / SIGTERM unlink everything.
+        """
+        def _hup(*_):
+            self._reload = True
+
+        def _stop(*_):
+            raise KeyboardInterrupt
+
+        signal.signal(signal.SIGHUP, _hup)
+        signal.signal(signal.SIGTERM, _stop)
+
+        self.publish(force=True)
+        try:
+            while True:
+                waited = 0.0
+                while waited < poll_seconds and not self._reload:
+                    time.sleep(0.5)
+                    waited += 0.5
+                force, self._reload = self._reload, False
+                try:
+                    self.publish(force=force)
+                except Exception as e:
+                    print(f"[dataplane] publish failed: {e}", flush=True)
+                self._reap(time.time())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+
+def _unlink(shm: shared_memory.SharedMemory):
+    # the server's own mapping; readers (here or elsewhere) keep theirs until release()
+    shm.close()
+    shm.unlink()
+    _OWNED.discard(shm.name)
+
+
+# -------------------------
+# Readers
+# -------------------------
+@dataclass
+class DataPlaneHandle:
+    version: str
+    segment: str
+    panel: PricePanel                  # read-only views into shared memory
+    meta: dict[str, dict[str, str]]
+
+    def sectors(self) -> dict[str, str]:
+        # same symbols / values as core.universe.load_sector_map (first CSV row)
+        return sector_map_from_meta(self.meta)
+
+
+def read_manifest(runtime_dir: Path = RUNTIME_DIR) -> dict | None:
+    try:
+        return json.loads((Path(runtime_dir) / MANIFEST).read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def attach(runtime_dir: Path = RUNTIME_DIR) -> DataPlaneHandle | None:
+    """
+    Zero-copy handle on the currently published version (None if no daemon).
+    """
+    manifest = read_manifest(runtime_dir)
+    if manifest is None:
+        return None
+    try:
+        shm = _attach_segment(manifest["segment"])
+    except FileNotFoundError:
+        return None
+
+    n_dates, symbols = int(manifest["n_dates"]), tuple(manifest["symbols"])
+    offsets = manifest["offsets"]
+
+    dates = np.frombuffer(shm.buf, dtype=np.int64, count=n_dates, offset=offsets["dates"]).view("datetime64[ns]")
+    fields: dict[str, np.ndarray] = {}
+    for f in manifest["fields"]:
+        arr = np.frombuffer(shm.buf, dtype=np.float64, count=n_dates * len(symbols), offset=offsets[f])
+        arr = arr.reshape(n_dates, len(symbols))
+        arr.flags.writeable = False
+        fields[f] = arr
+
+    panel = PricePanel(pd.DatetimeIndex(dates), symbols, fields)
+    return DataPlaneHandle(manifest["version"], manifest["segment"], panel, manifest.get("meta", {}))
+
+
+class DataPlaneClient:
+    """
+    Keeps a handle on the latest version; `panel()` switches to a newer
+    version on the next call after the daemon publishes one.
+    """
+
+    def __init__(self, runtime_dir: Path = RUNTIME_DIR, check_every: float = 1.0):
+        self.runtime_dir = Path(runtime_dir)
+        self.check_every = float(check_every)
+        self._handle: DataPlaneHandle | None = None
+        self._manifest_mtime: float | None = None
+        self._checked_at = 0.0
+        self._retired: list[str] = []      # replaced segments not yet unmapped
+
+    @property
+    def available(self) -> bool:
+        return self.handle() is not None
+
+    def handle(self) -> DataPlaneHandle | None:
+        now = time.monotonic()
+        if self._handle is not None and now - self._checked_at < self.check_every:
+            return self._handle
+        self._checked_at = now
+        self._release_retired()
+
+        try:
+            mtime = (self.runtime_dir / MANIFEST).stat().st_mtime
+        except FileNotFoundError:
+            return self._handle
+
+        if self._handle is None or mtime != self._manifest_mtime:
+            fresh = attach(self.runtime_dir)
+            if fresh is not None:
+                old, self._handle = self._handle, fresh
+                self._manifest_mtime = mtime
+                if old is not None and old.segment != fresh.segment:
+                    # unmapped once nobody holds arrays from it (retried on later checks)
+                    self._retired.append(old.segment)
+                    del old
+                    self._release_retired()
+        return self._handle
+
+    def _release_retired(self):
+        if self._retired:
+            self._retired = [seg for seg in self._retired if not release(seg)]
+
+    def panel(self) -> PricePanel | None:
+        h = self.handle()
+        return h.panel if h is not None else None
+
+    def version(self) -> str | None:
+        h = self.handle()
+        return h.version if h is not None else None
+
+
+def request_publish(runtime_dir: Path = RUNTIME_DIR) -> bool:
+    """
+    Signal a running daemon to reload the store now (used by the updater).
+    """
+    manifest = read_manifest(runtime_dir)
+    if manifest is None:
+        return False
+    try:
+        os.kill(int(manifest["pid"]), signal.SIGHUP)
+        return True
+    except (ProcessLookupError, PermissionError, KeyError, ValueError):
+        return False
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Shared-memory market data plane.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser("serve", help="run the daemon")
+    s.add_argument("--poll", type=float, default=30.0, help="seconds between store checks")
+    s.add_argument("--grace", type=float, default=300.0, help="seconds before old versions are unlinked")
+    sub.add_parser("publish", help="ask the running daemon to reload now")
+    sub.add_parser("status", help="print the published version")
+    args = ap.parse_args()
+
+    if args.cmd == "serve":
+        DataPlaneServer(grace_seconds=args.grace).serve(poll_seconds=args.poll)
+    elif args.cmd == "publish":
+        ok = request_publish()
+        print("reload requested" if ok else "no running data plane")
+        sys.exit(0 if ok else 1)
+    else:
+        m = read_manifest()
+        if m is None:
+            print("no running data plane")
+            sys.exit(1)
+        print(f"version={m['version']} symbols={len(m['symbols'])} dates={m['n_dates']} pid={m['pid']}")
+
+
+if __name__ == "__main__":
+    main()
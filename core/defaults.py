@@ -0,0 +1,45 @@
+# core/defaults.py
+"""
+Strategy windows and limits, defined once.
+
+LawvisoryBaseStrategy exposes them as class attributes (subclasses may
+override); core.ranking, core.targets and core.sizing use them as defaults.
+"""
+from __future__ import annotations
+
+# Trend / momentum windows (daily)
+TREND_SMA_DAYS = 200
+MOM_12M = 252
+MOM_6M = 126
+MOM_3M = 63
+VOL_LOOKBACK = 63
+
+# Extra bars fetched beyond the longest window
+HISTORY_PAD = 30
+
+# Resampled bars handed to long-horizon factors (weekly / monthly bars per as-of date)
+BAR_WINDOWS = {"W": 60, "M": 24}
+
+# Regime indicator
+REGIME_SYMBOL = "SPY"
+
+# Universe speed limiter
+MAX_UNIVERSE = 500
+
+# Breadth dial sampling (keeps it fast)
+BREADTH_SAMPLE = 150
+BREADTH_LOW = 0.35   # below = risk-off
+BREADTH_HIGH = 0.65  # above = risk-on
+
+# Minimum dollars per order to avoid churn
+MIN_ORDER_DOLLARS = 150.0
+
+# If True: compute signals from the prior completed daily bar (more realistic)
+NO_LOOKAHEAD = True
+
+
+def history_needed(sma_days: int = TREND_SMA_DAYS, mom_12m: int = MOM_12M) -> int:
+    """
+    Daily bars a ranking day reads (longest window + padding).
+    """
+    return max(int(sma_days), int(mom_12m)) + HISTORY_PAD
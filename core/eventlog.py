@@ -0,0 +1,310 @@
+# core/eventlog.py
+"""
+Structured, buffered event log for the strategy hot path.
+
+    log = EventLog(path="logs/run_events.jsonl", echo=strategy.log_message)
+    log.info("exit_trail", "TRAIL %s qty=%.0f px=%.2f stop=%.2f", sym, qty, px, stop,
+             symbol=sym, price=px, stop=stop)
+    ...
+    log.close()
+    EventLog.read("logs/run_events.jsonl")          # -> DataFrame
+
+- level check happens before anything else; messages are (format, args) and
+  only rendered when echoed (WARNING+ by default), written or queried
+- records go into an in-memory ring buffer (bounded) and, if a path is set, a
+  background thread writes them to JSONL / CSV / Parquet. The file is replaced
+  per run; CSV and Parquet use fixed columns with free-form fields as one JSON
+  column, Parquet in row groups of `row_group_size`. A failing write disables
+  the file sink (reported on stderr) instead of stopping the run.
+- high-volume events can be sampled (keep 1 in N) per event name
+"""
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable
+import json
+import queue
+import sys
+import threading
+import time
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+
+LEVELS = {"DEBUG": DEBUG, "INFO": INFO, "WARNING": WARNING, "ERROR": ERROR, "OFF": OFF}
+_LEVEL_NAMES = {v: k for k, v in LEVELS.items()}
+
+FORMATS = ("jsonl", "csv", "parquet")
+
+
+def level_value(level: int | str) -> int:
+    if isinstance(level, str):
+        return LEVELS[level.upper()]
+    return int(level)
+
+
+@dataclass
+class Record:
+    ts: Any
+    level: int
+    event: str
+    symbol: str | None = None
+    price: float | None = None
+    stop: float | None = None
+    exposure: float | None = None
+    fields: dict[str, Any] = field(default_factory=dict)
+    fmt: str | None = None
+    args: tuple = ()
+
+    @property
+    def message(self) -> str:
+        if self.fmt is None:
+            return ""
+        try:
+            return self.fmt % self.args if self.args else self.fmt
+        except (TypeError, ValueError):
+            return f"{self.fmt} {self.args}"
+
+    def base_dict(self) -> dict[str, Any]:
+        ts = self.ts.isoformat() if isinstance(self.ts, (datetime, date)) else self.ts
+        return {
+            "ts": ts,
+            "level": _LEVEL_NAMES.get(self.level, str(self.level)),
+            "event": self.event,
+            "symbol": self.symbol,
+            "price": self.price,
+            "stop": self.stop,
+            "exposure": self.exposure,
+            "message": self.message,
+        }
+
+    def as_dict(self) -> dict[str, Any]:
+        out = self.base_dict()
+        out.update(self.fields)
+        return out
+
+
+def _parquet_schema():
+    import pyarrow as pa
+
+    numeric = ("price", "stop", "exposure")
+    return pa.schema([
+        (name, pa.float64() if name in numeric else pa.string())
+        for name in ("ts", "level", "event", "symbol", "price", "stop", "exposure", "message", "fields")
+    ])
+
+
+class EventLog:
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        fmt: str | None = None,
+        level: int | str = DEBUG,
+        echo: Callable[[str], Any] | None = None,
+        echo_level: int | str = WARNING,
+        capacity: int = 100_000,
+        sample_every: dict[str, int] | None = None,
+        clock: Callable[[], Any] | None = None,
+        flush_interval: float = 1.0,
+        row_group_size: int = 10_000,
+    ):
+        self.level = level_value(level)
+        self.echo = echo
+        self.echo_level = level_value(echo_level)
+        self.sample_every = dict(sample_every or {})
+        self.clock = clock or time.time
+        self.buffer: deque[Record] = deque(maxlen=int(capacity))
+        self.dropped_by_sampling = 0
+
+        self._seen: dict[str, int] = {}
+        self.path = Path(path) if path is not None else None
+        self.fmt = (fmt or (self.path.suffix.lstrip(".") if self.path else "jsonl")).lower()
+        if self.fmt not in FORMATS:
+            raise ValueError(f"unknown event log format: {self.fmt} (use one of {FORMATS})")
+
+        self._pending: queue.SimpleQueue[Record | None] = queue.SimpleQueue()
+        self._writer: threading.Thread | None = None
+        self._flush_interval = float(flush_interval)
+        self._columnar: list[dict[str, Any]] = []
+        self._row_group_size = max(1, int(row_group_size))
+        self._parquet = None
+        self._header_written = False
+        self.write_error: Exception | None = None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.unlink(missing_ok=True)
+            self._writer = threading.Thread(target=self._write_loop, name="eventlog-writer", daemon=True)
+            self._writer.start()
+
+    # -------------------------
+    # Recording
+    # -------------------------
+    def enabled(self, level: int) -> bool:
+        return level >= self.level
+
+    def log(self, level: int, event: str, fmt: str | None = None, *args, symbol: str | None = None,
+            price: float | None = None, stop: float | None = None, exposure: float | None = None, **fields):
+        if level < self.level:
+            return
+
+        every = self.sample_every.get(event)
+        if every and every > 1:
+            n = self._seen.get(event, 0)
+            self._seen[event] = n + 1
+            if n % every:
+                self.dropped_by_sampling += 1
+                return
+
+        rec = Record(self.clock(), level, event, symbol, price, stop, exposure, fields, fmt, args)
+        self.buffer.append(rec)
+        if self._writer is not None and self.write_error is None:
+            self._pending.put(rec)
+        if self.echo is not None and level >= self.echo_level and fmt is not None:
+            self.echo(f"[{event}] {rec.message}")
+
+    def debug(self, event: str, fmt: str | None = None, *args, **kw):
+        self.log(DEBUG, event, fmt, *args, **kw)
+
+    def info(self, event: str, fmt: str | None = None, *args, **kw):
+        self.log(INFO, event, fmt, *args, **kw)
+
+    def warning(self, event: str, fmt: str | None = None, *args, **kw):
+        self.log(WARNING, event, fmt, *args, **kw)
+
+    def error(self, event: str, fmt: str | None = None, *args, **kw):
+        self.log(ERROR, event, fmt, *args, **kw)
+
+    # -------------------------
+    # Query
+    # -------------------------
+    def records(self, event: str | None = None, symbol: str | None = None, min_level: int | str = DEBUG) -> list[Record]:
+        lvl = level_value(min_level)
+        return [
+            r for r in list(self.buffer)
+            if r.level >= lvl and (event is None or r.event == event) and (symbol is None or r.symbol == symbol)
+        ]
+
+    def to_frame(self, **filters):
+        import pandas as pd
+
+        return pd.DataFrame([r.as_dict() for r in self.records(**filters)])
+
+    def counts(self) -> dict[str, int]:
+        out: dict[str, int] = {}
+        for r in list(self.buffer):
+            out[r.event] = out.get(r.event, 0) + 1
+        return out
+
+    @staticmethod
+    def read(path: str | Path):
+        """
+        Load a flushed event file back into a DataFrame.
+        """
+        import pandas as pd
+
+        p = Path(path)
+        if p.suffix == ".parquet":
+            return pd.read_parquet(p)
+        if p.suffix == ".csv":
+            return pd.read_csv(p)
+        return pd.read_json(p, lines=True)
+
+    # -------------------------
+    # Background writer
+    # -------------------------
+    def _drain(self, first: Record | None = None) -> tuple[list[Record], bool]:
+        batch: list[Record] = [] if first is None else [first]
+        stop = False
+        while True:
+            try:
+                rec = self._pending.get_nowait()
+            except queue.Empty:
+                break
+            if rec is None:
+                stop = True
+                break
+            batch.append(rec)
+        return batch, stop
+
+    def _write_loop(self):
+        stop = False
+        while not stop:
+            try:
+                first = self._pending.get(timeout=self._flush_interval)
+            except queue.Empty:
+                continue
+            if first is None:
+                batch, stop = self._drain()
+                stop = True
+            else:
+                batch, stop = self._drain(first)
+            if batch and self.write_error is None:
+                self._guarded(self._write, batch)
+        if self.write_error is None:
+            self._guarded(self._finish)
+
+    def _guarded(self, fn, *args):
+        # a broken sink must not kill the writer: the loop keeps draining (and
+        # discarding) what is already queued, log() stops queueing, and the
+        # in-memory buffer keeps working
+        try:
+            fn(*args)
+        except Exception as e:
+            self.write_error = e
+            print(f"[eventlog] writing {self.path} failed, file sink disabled: {e!r}", file=sys.stderr, flush=True)
+
+    @staticmethod
+    def _flat(r: Record) -> dict[str, Any]:
+        # fixed columns; free-form fields as one JSON column
+        return {**r.base_dict(), "fields": json.dumps(r.fields, default=str)}
+
+    def _write(self, batch: list[Record]):
+        if self.fmt == "csv":
+            import pandas as pd
+
+            pd.DataFrame([self._flat(r) for r in batch]).to_csv(
+                self.path, mode="a", header=not self._header_written, index=False
+            )
+            self._header_written = True
+        elif self.fmt == "jsonl":
+            with open(self.path, "a", encoding="utf-8") as fh:
+                for r in batch:
+                    fh.write(json.dumps(r.as_dict(), default=str))
+                    fh.write("\n")
+        else:
+            self._columnar.extend(self._flat(r) for r in batch)
+            if len(self._columnar) >= self._row_group_size:
+                self._write_row_group()
+
+    def _write_row_group(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        rows, self._columnar = self._columnar, []
+        for row in rows:
+            row["ts"] = None if row["ts"] is None else str(row["ts"])
+        table = pa.Table.from_pylist(rows, schema=_parquet_schema())
+        if self._parquet is None:
+            self._parquet = pq.ParquetWriter(self.path, table.schema)
+        self._parquet.write_table(table)
+
+    def _finish(self):
+        if self.fmt != "parquet":
+            return
+        if self._columnar:
+            self._write_row_group()
+        if self._parquet is not None:
+            self._parquet.close()
+            self._parquet = None
+
+    def close(self):
+        if self._writer is not None:
+            self._pending.put(None)
+            self._writer.join()
+            self._writer = None
@@ -0,0 +1,397 @@
+# core/factors.py
+"""
+Declarative factors over a daily price panel.
+
+Factors are expressions (Expr nodes) over panel fields. The evaluator walks the
+dependency graph and memoizes every node by its structural key, so shared
+intermediates (daily returns, rolling sums, lookback ratios, SMAs) are computed
+once per date for the whole universe, however many factors use them.
+
+    ev = FactorEvaluator(PricePanel.from_frames(frames))
+    ev.factor("mom_12m")          # (n_symbols,) cross-section at the last bar
+    ev.score({"mom_12m": 0.5, "vol_63d": -0.25})
+
+Adding a factor = registering an expression; only nodes not already in the
+cache cost anything.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable
+import math
+
+import numpy as np
+import pandas as pd
+
+
+# -------------------------
+# Panel
+# -------------------------
+@dataclass(frozen=True)
+class PricePanel:
+    dates: pd.DatetimeIndex
+    symbols: tuple[str, ...]
+    fields: dict[str, np.ndarray]      # name -> (n_dates, n_symbols) float64, NaN where missing
+
+    @classmethod
+    def from_frames(cls, frames: dict[str, pd.DataFrame], fields: tuple[str, ...] = ("open", "high", "low", "close", "volume")) -> "PricePanel":
+        """
+        frames: symbol -> daily OHLCV DataFrame (lower-case columns, DatetimeIndex).
+        """
+        symbols = tuple(frames)
+        if not symbols:
+            return cls(pd.DatetimeIndex([]), (), {f: np.empty((0, 0)) for f in fields})
+
+        out: dict[str, np.ndarray] = {}
+        dates = None
+        for f in fields:
+            cols = {s: df[f] for s, df in frames.items() if f in df.columns}
+            if not cols:
+                continue
+            wide = pd.concat(cols, axis=1, sort=True)
+            if dates is None:
+                dates = wide.index
+            wide = wide.reindex(index=dates, columns=list(symbols))
+            out[f] = wide.to_numpy(dtype=np.float64)
+        return cls(pd.DatetimeIndex(dates if dates is not None else []), symbols, out)
+
+    def window(self, end, length: int, symbols: list[str] | None = None, inclusive: bool = False) -> "PricePanel":
+        """
+        Last `length` bars before `end` (or up to and including it), optionally
+        for a subset of symbols renamed to the requested names. Row slices are
+        views; a symbol subset copies (missing symbols become NaN columns).
+        """
+        stop = int(self.dates.searchsorted(pd.Timestamp(end), side="right" if inclusive else "left"))
+        start = max(0, stop - int(length))
+        fields = {f: v[start:stop] for f, v in self.fields.items()}
+        if symbols is None:
+            return PricePanel(self.dates[start:stop], self.symbols, fields)
+
+        col = {s: i for i, s in enumerate(self.symbols)}
+        idx = np.array([col.get(s, -1) for s in symbols], dtype=np.int64)
+        missing = idx < 0
+        out = {}
+        for f, v in fields.items():
+            sub = v[:, np.where(missing, 0, idx)] if len(self.symbols) else np.full((len(v), len(idx)), np.nan)
+            if missing.any():
+                sub[:, missing] = np.nan
+            out[f] = sub
+        return PricePanel(self.dates[start:stop], tuple(symbols), out)
+
+    def field(self, name: str) -> np.ndarray:
+        if name not in self.fields:
+            raise KeyError(f"panel has no field {name!r}")
+        return self.fields[name]
+
+
+def align_last_valid(fields: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """
+    Per symbol, complete rows (every field finite) moved to the bottom in order,
+    NaN above: row -k of a column is that symbol's k-th bar from the end, as in a
+    per-symbol dropna(). A symbol missing the final bar (or with gaps) then gets
+    its own last bar, windows and lookbacks. Returned as is when nothing is missing.
+    """
+    arrays = list(fields.values())
+    if not arrays or arrays[0].size == 0:
+        return fields
+    valid = np.isfinite(arrays[0])
+    for a in arrays[1:]:
+        valid &= np.isfinite(a)
+    if valid.all():
+        return fields
+
+    n = valid.shape[0]
+    order = np.argsort(valid, axis=0, kind="stable")      # missing rows first, bars in order after
+    blank = np.arange(n)[:, None] < (n - valid.sum(axis=0))[None, :]
+    out = {}
+    for f, v in fields.items():
+        a = np.take_along_axis(v, order, axis=0)
+        a[blank] = np.nan
+        out[f] = a
+    return out
+
+
+# -------------------------
+# Expressions
+# -------------------------
+@dataclass(frozen=True)
+class Expr:
+    """
+    Node of the factor graph. (op, args) is the memoization key, so two
+    structurally equal expressions share one cached result.
+    """
+    op: str
+    args: tuple = ()
+
+    def __add__(self, other):
+        return Expr("add", (self, _lift(other)))
+
+    def __radd__(self, other):
+        return Expr("add", (_lift(other), self))
+
+    def __sub__(self, other):
+        return Expr("sub", (self, _lift(other)))
+
+    def __rsub__(self, other):
+        return Expr("sub", (_lift(other), self))
+
+    def __mul__(self, other):
+        return Expr("mul", (self, _lift(other)))
+
+    def __rmul__(self, other):
+        return Expr("mul", (_lift(other), self))
+
+    def __truediv__(self, other):
+        return Expr("div", (self, _lift(other)))
+
+    def __gt__(self, other):
+        return Expr("gt", (self, _lift(other)))
+
+
+def _lift(x) -> Expr:
+    return x if isinstance(x, Expr) else Expr("const", (float(x),))
+
+
+def field(name: str) -> Expr:
+    return Expr("field", (name,))
+
+
+def returns(x: Expr) -> Expr:
+    """Simple 1-bar returns."""
+    return Expr("returns", (x,))
+
+
+def rolling_sum(x: Expr, window: int) -> Expr:
+    return Expr("rolling_sum", (x, int(window)))
+
+
+def rolling_mean(x: Expr, window: int) -> Expr:
+    return Expr("rolling_mean", (x, int(window)))
+
+
+def rolling_std(x: Expr, window: int) -> Expr:
+    """Sample std (ddof=1) over a full window."""
+    return Expr("rolling_std", (x, int(window)))
+
+
+def last(x: Expr) -> Expr:
+    """Cross-section at the last bar."""
+    return Expr("last", (x,))
+
+
+def lookback_ratio(x: Expr, lookback: int) -> Expr:
+    """last / x[-lookback] - 1 (same indexing as close.iloc[-lookback])."""
+    return Expr("lookback_ratio", (x, int(lookback)))
+
+
+def count(x: Expr) -> Expr:
+    """Number of non-missing bars per symbol."""
+    return Expr("count", (x,))
+
+
+def true_range() -> Expr:
+    """max(high - low, |high - prev close|, |low - prev close|)."""
+    return Expr("true_range")
+
+
+def on(freq: str, x: Expr) -> Expr:
+    """Evaluate `x` on weekly ("W") or monthly ("M") bars instead of daily ones."""
+    return Expr("on", (freq, x))
+
+
+# -------------------------
+# Registry
+# -------------------------
+CLOSE = field("close")
+
+FACTORS: dict[str, Expr] = {}
+
+
+def register_factor(name: str, expr: Expr) -> Expr:
+    FACTORS[name] = expr
+    return expr
+
+
+register_factor("close", last(CLOSE))
+register_factor("bars", count(CLOSE))
+register_factor("sma_200", last(rolling_mean(CLOSE, 200)))
+register_factor("mom_12m", lookback_ratio(CLOSE, 252))
+register_factor("mom_6m", lookback_ratio(CLOSE, 126))
+register_factor("mom_3m", lookback_ratio(CLOSE, 63))
+register_factor("vol_63d", last(rolling_std(returns(CLOSE), 63)) * math.sqrt(252))
+
+# long-horizon factors on resampled bars (tens of bars instead of hundreds)
+register_factor("mom_12m_monthly", on("M", lookback_ratio(CLOSE, 12)))
+register_factor("sma_10m", on("M", last(rolling_mean(CLOSE, 10))))
+register_factor("atr_14w", on("W", last(rolling_mean(true_range(), 14))))
+
+
+def default_factor_weights(vol_penalty: float) -> dict[str, float]:
+    """
+    The original hard-coded score: 0.50*m12 + 0.30*m6 + 0.20*m3 - vol_penalty*vol.
+    """
+    return {"mom_12m": 0.50, "mom_6m": 0.30, "mom_3m": 0.20, "vol_63d": -float(vol_penalty)}
+
+
+# -------------------------
+# Evaluator
+# -------------------------
+class FactorEvaluator:
+    """
+    Evaluates expressions against one panel (one as-of date), caching every node.
+    Series nodes are (n_dates, n_symbols); `last`/ratio nodes are (n_symbols,).
+    Daily fields are read per symbol over its own bars (align_last_valid), so
+    results match per-symbol code on dropna()'d histories.
+
+    `bars` optionally supplies weekly / monthly panels (same symbols) for `on()`
+    nodes, e.g. windows from a core.bars.BarCache, or zero-argument callables
+    returning them (only called if an `on()` node for that frequency is
+    evaluated); otherwise they are resampled from the daily panel on first use.
+    """
+
+    def __init__(self, panel: PricePanel, bars: dict[str, PricePanel | Callable[[], PricePanel]] | None = None):
+        self.panel = panel
+        self.bars = dict(bars or {})
+        self._cache: dict[Expr, np.ndarray | float] = {}
+        self._sub: dict[str, FactorEvaluator] = {}
+        self._fields: dict[str, np.ndarray] | None = None
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def eval(self, expr: Expr):
+        hit = self._cache.get(expr)
+        if hit is not None:
+            return hit
+        fn = getattr(self, f"_op_{expr.op}", None)
+        if fn is None:
+            raise ValueError(f"unknown factor op: {expr.op}")
+        val = fn(*expr.args)
+        self._cache[expr] = val
+        return val
+
+    def factor(self, name: str) -> np.ndarray:
+        if name not in FACTORS:
+            raise KeyError(f"unknown factor {name!r}")
+        return np.broadcast_to(self.eval(FACTORS[name]), (len(self.panel.symbols),))
+
+    def score(self, weights: dict[str, float]) -> np.ndarray:
+        """
+        Weighted sum of factors; NaN for symbols missing any weighted factor.
+        """
+        total = np.zeros(len(self.panel.symbols), dtype=np.float64)
+        for name, w in weights.items():
+            if w == 0:
+                continue
+            total = total + float(w) * self.factor(name)
+        return total
+
+    # --- ops ---
+    def _op_const(self, v):
+        return v
+
+    def _field(self, name: str) -> np.ndarray:
+        if self._fields is None:
+            self._fields = align_last_valid(self.panel.fields)
+        if name not in self._fields:
+            raise KeyError(f"panel has no field {name!r}")
+        return self._fields[name]
+
+    def _op_field(self, name):
+        return self._field(name)
+
+    def _op_add(self, a, b):
+        return self.eval(a) + self.eval(b)
+
+    def _op_sub(self, a, b):
+        return self.eval(a) - self.eval(b)
+
+    def _op_mul(self, a, b):
+        return self.eval(a) * self.eval(b)
+
+    def _op_div(self, a, b):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.eval(a) / self.eval(b)
+
+    def _op_gt(self, a, b):
+        x, y = self.eval(a), self.eval(b)
+        return np.where(np.isnan(x) | np.isnan(y), np.nan, (x > y).astype(np.float64))
+
+    def _op_on(self, freq, x):
+        sub = self._sub.get(freq)
+        if sub is None:
+            bars = self.bars.get(freq)
+            if callable(bars):
+                bars = bars()
+            if bars is None:
+                from core.bars import resample
+
+                bars = resample(self.panel, freq)
+            sub = self._sub[freq] = FactorEvaluator(bars)
+        return sub.eval(x)
+
+    def _op_true_range(self):
+        from core.kernels import true_range as tr
+
+        return tr(self._field("high"), self._field("low"), self._field("close"))
+
+    def _op_returns(self, x):
+        v = self.eval(x)
+        out = np.full_like(v, np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[1:] = v[1:] / v[:-1] - 1.0
+        return out
+
+    def _op_cumsum(self, x):
+        # (running sum ignoring NaN, running count of valid values), padded with a zero row
+        v = self.eval(x)
+        ok = np.isfinite(v)
+        cs = np.vstack([np.zeros((1, v.shape[1])), np.cumsum(np.where(ok, v, 0.0), axis=0)])
+        cnt = np.vstack([np.zeros((1, v.shape[1])), np.cumsum(ok, axis=0)])
+        return cs, cnt
+
+    def _op_square(self, x):
+        return self.eval(x) ** 2
+
+    def _op_rolling_sum(self, x, window):
+        cs, cnt = self.eval(Expr("cumsum", (x,)))
+        n = cs.shape[0] - 1
+        out = np.full((n, cs.shape[1]), np.nan)
+        if window <= n:
+            s = cs[window:] - cs[:-window]
+            c = cnt[window:] - cnt[:-window]
+            out[window - 1:] = np.where(c == window, s, np.nan)
+        return out
+
+    def _op_rolling_mean(self, x, window):
+        return self.eval(rolling_sum(x, window)) / window
+
+    def _op_rolling_std(self, x, window):
+        if window < 2:
+            raise ValueError("rolling_std needs window >= 2")
+        s = self.eval(rolling_sum(x, window))
+        s2 = self.eval(rolling_sum(Expr("square", (x,)), window))
+        var = (s2 - s * s / window) / (window - 1)
+        return np.sqrt(np.maximum(var, 0.0))
+
+    def _op_last(self, x):
+        v = self.eval(x)
+        if np.ndim(v) < 2:
+            return v
+        if v.shape[0] == 0:
+            return np.full(v.shape[1], np.nan)
+        return v[-1]
+
+    def _op_count(self, x):
+        v = self.eval(x)
+        return np.isfinite(v).sum(axis=0).astype(np.float64)
+
+    def _op_lookback_ratio(self, x, lookback):
+        v = self.eval(x)
+        n = v.shape[0]
+        if n <= lookback:
+            return np.full(v.shape[1], np.nan)
+        cur = self.eval(last(x))
+        past = v[n - lookback]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(past > 0, cur / past - 1.0, np.nan)
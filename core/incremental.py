@@ -0,0 +1,198 @@
+# core/incremental.py
+"""
+Change-driven ranking maintained across days.
+
+    ranker = IncrementalRanker(profile, score_tol=0.01)
+    changed = ranker.update(ev)              # ev: today's FactorEvaluator
+    ranker.ranked()                          # same order as rank_candidates()
+    ranker.selected(sectors)                 # sector-capped top N (cached)
+
+Each day the factor inputs are compared with the values each symbol was last
+scored on. A symbol is re-scored only when it enters / leaves the eligible set
+(history, min price), its close crosses the SMA, or a weighted factor moved its
+score by more than `score_tol`. Everything else keeps its last score, so each
+stored score is within len(weights) * score_tol of a fresh one (score_tol=0
+reproduces rank_candidates exactly). Re-scored symbols move within a sorted
+index; the sector-capped selection is only rebuilt when a change reaches the
+part of the ranking it was drawn from.
+
+`update` also takes an evaluator over part of the universe and refreshes only
+those symbols, so a watch day can evaluate (and fetch) just the contenders:
+
+    ranker.update(ev_subset)                 # symbols of ranker.contenders()
+"""
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+
+import numpy as np
+
+from core.defaults import MOM_12M, TREND_SMA_DAYS, history_needed
+from core.factors import CLOSE, FactorEvaluator, last, rolling_mean
+from core.profiles import Profile
+from core.ranking import select_with_sector_caps
+
+
+class IncrementalRanker:
+    def __init__(
+        self,
+        profile: Profile,
+        sma_days: int = TREND_SMA_DAYS,
+        needed: int | None = None,
+        score_tol: float = 0.01,
+    ):
+        self.profile = profile
+        self.weights = {k: float(w) for k, w in profile.weights().items() if w != 0}
+        self.sma_days = int(sma_days)
+        self.needed = needed if needed is not None else history_needed(self.sma_days, MOM_12M)
+        self.score_tol = float(score_tol)
+
+        self._symbols: tuple[str, ...] = ()
+        self._index: dict[str, int] = {}
+        self._inputs: dict[str, np.ndarray] = {}       # factor -> values last scored on
+        self._passed: np.ndarray = np.zeros(0, dtype=bool)
+        self._score: np.ndarray = np.zeros(0)
+        self._order: list[tuple[float, int]] = []      # (-score, universe index), ascending
+        self._selection: list[str] | None = None
+        self._selection_key: tuple | None = None
+        self._selection_depth = 0
+
+        self.evaluations = 0
+        self.rescored = 0
+
+    # -------------------------
+    # Update
+    # -------------------------
+    def _full(self, ev: FactorEvaluator, factors: dict[str, np.ndarray], passed: np.ndarray) -> np.ndarray:
+        self._symbols = tuple(ev.panel.symbols)
+        self._index = {s: i for i, s in enumerate(self._symbols)}
+        self._inputs = {k: v.copy() for k, v in factors.items()}
+        self._passed = passed.copy()
+        self._score = self._combine(factors)
+        self._order = sorted((-self._score[i], i) for i in np.flatnonzero(self._ok()))
+        self._selection = None
+        return np.ones(len(self._symbols), dtype=bool)
+
+    def _combine(self, factors: dict[str, np.ndarray], idx: np.ndarray | None = None) -> np.ndarray:
+        n = len(self._symbols) if idx is None else len(idx)
+        total = np.zeros(n, dtype=np.float64)
+        for name, w in self.weights.items():
+            total = total + w * (factors[name] if idx is None else factors[name][idx])
+        return total
+
+    def _ok(self) -> np.ndarray:
+        return self._passed & np.isfinite(self._score)
+
+    def update(self, ev: FactorEvaluator) -> list[str]:
+        """
+        Re-score symbols whose inputs moved past the thresholds; returns them.
+        An evaluator over a subset of the maintained universe only refreshes
+        that subset; any other universe rescores everything.
+        """
+        self.evaluations += 1
+        last_close = ev.eval(last(CLOSE))
+        sma = ev.eval(last(rolling_mean(CLOSE, self.sma_days)))
+        bars = ev.factor("bars")
+        eligible = (bars >= self.needed - 5) & (last_close >= self.profile.min_price)
+        passed = eligible & np.isfinite(sma) & (last_close > sma)
+        factors = {name: np.asarray(ev.factor(name), dtype=np.float64) for name in self.weights}
+
+        symbols = tuple(ev.panel.symbols)
+        if symbols != self._symbols and not (self._symbols and all(s in self._index for s in symbols)):
+            changed = self._full(ev, factors, passed)
+        else:
+            if symbols != self._symbols:
+                # subset: everything outside it compares equal to what it was scored on
+                cols = np.array([self._index[s] for s in symbols], dtype=np.intp)
+                sub_factors, sub_passed = factors, passed
+                factors = {name: self._inputs[name].copy() for name in self.weights}
+                for name in self.weights:
+                    factors[name][cols] = sub_factors[name]
+                passed = self._passed.copy()
+                passed[cols] = sub_passed
+            changed = passed != self._passed
+            for name, w in self.weights.items():
+                new, old = factors[name], self._inputs[name]
+                with np.errstate(invalid="ignore"):
+                    moved = np.abs(w * (new - old)) > self.score_tol
+                changed |= moved | (np.isfinite(new) != np.isfinite(old))
+            idx = np.flatnonzero(changed)
+            if len(idx):
+                self._rescore(idx, factors, passed)
+
+        n = int(changed.sum())
+        self.rescored += n
+        return [self._symbols[i] for i in np.flatnonzero(changed)]
+
+    def _rescore(self, idx: np.ndarray, factors: dict[str, np.ndarray], passed: np.ndarray):
+        ok_before = self._ok()
+        depth = self._selection_depth
+        for i in idx:
+            if ok_before[i]:
+                pos = bisect_left(self._order, (-self._score[i], i))
+                del self._order[pos]
+                if pos <= depth:
+                    self._selection = None
+        for name in self.weights:
+            self._inputs[name][idx] = factors[name][idx]
+        self._passed[idx] = passed[idx]
+        self._score[idx] = self._combine(self._inputs, idx)
+        ok_after = self._ok()
+        for i in idx:
+            if ok_after[i]:
+                insort(self._order, (-self._score[i], int(i)))
+                if self._selection is not None and bisect_left(self._order, (-self._score[i], int(i))) <= depth:
+                    self._selection = None
+
+    # -------------------------
+    # Queries
+    # -------------------------
+    def ranked(self) -> list[str]:
+        return [self._symbols[i] for _, i in self._order]
+
+    def score(self, symbol: str) -> float | None:
+        try:
+            i = self._symbols.index(symbol)
+        except ValueError:
+            return None
+        return float(self._score[i]) if self._ok()[i] else None
+
+    def contenders(self, extra: int | None = None) -> list[str]:
+        """
+        The ranked names the last selection was drawn from plus `extra` behind
+        them (default max_positions): the part of the ranking a change is most
+        likely to reach. Names below it keep their last scores until a full update.
+        """
+        extra = self.profile.max_positions if extra is None else int(extra)
+        depth = self._selection_depth + 1 if self._selection_key is not None else self.profile.max_positions
+        return [self._symbols[i] for _, i in self._order[: depth + extra]]
+
+    def passed_trend(self) -> int:
+        return int(self._passed.sum())
+
+    def selected(self, sectors: dict[str, str] | None = None, max_positions: int | None = None,
+                 max_sector_positions: int | None = None) -> list[str]:
+        """
+        Sector-capped top N over the maintained order (rebuilt only when needed).
+        """
+        max_pos = int(max_positions if max_positions is not None else self.profile.max_positions)
+        cap = int(max_sector_positions if max_sector_positions is not None else self.profile.max_sector_positions)
+        key = (id(sectors), max_pos, cap)
+        if self._selection is not None and self._selection_key == key:
+            return list(self._selection)
+
+        ranked = self.ranked()
+        picked = select_with_sector_caps(ranked, sectors or {}, max_pos, cap)
+        # deepest rank the selection looked at: changes below it can't alter it
+        pos = {s: k for k, s in enumerate(ranked)}
+        self._selection_depth = max((pos[s] for s in picked), default=len(ranked)) if len(picked) >= max_pos else len(ranked)
+        self._selection = picked
+        self._selection_key = key
+        return list(picked)
+
+    def sector_counts(self, sectors: dict[str, str]) -> dict[str, int]:
+        counts: dict[str, int] = {}
+        for s in self.selected(sectors):
+            sec = sectors.get(s, "UNKNOWN")
+            counts[sec] = counts.get(sec, 0) + 1
+        return counts
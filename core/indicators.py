@@ -0,0 +1,48 @@
+# core/indicators.py
+"""
+Per-symbol indicators on a daily OHLC DataFrame (lower-case columns).
+Return None when the value is missing / not positive, like the strategy expects.
+"""
+from __future__ import annotations
+
+import math
+
+import numpy as np
+import pandas as pd
+
+
+def atr(df: pd.DataFrame | None, period: int) -> float | None:
+    if df is None or any(c not in df.columns for c in ("high", "low", "close")) or len(df) < period:
+        return None
+    from core import kernels  # loads numba (when installed) on first use, not at import
+
+    value = kernels.atr(
+        df["high"].to_numpy(dtype=float),
+        df["low"].to_numpy(dtype=float),
+        df["close"].to_numpy(dtype=float),
+        period,
+    )[-1]
+    if math.isnan(float(value)) or float(value) <= 0:
+        return None
+    return float(value)
+
+
+def realized_vol(df: pd.DataFrame | None, lookback: int, min_returns: int = 25) -> float | None:
+    """
+    Annualized std of the last `lookback` daily returns.
+    """
+    if df is None or "close" not in df.columns:
+        return None
+    from core import kernels
+
+    close = df["close"].to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rets = close[1:] / close[:-1] - 1.0
+    rets = rets[np.isfinite(rets)]
+    if len(rets) < min_returns:
+        return None
+    window = min(int(lookback), len(rets))
+    vol = float(kernels.rolling_std(rets[-window:], window)[-1] * math.sqrt(252))
+    if math.isnan(vol) or vol <= 0:
+        return None
+    return vol
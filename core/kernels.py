@@ -0,0 +1,258 @@
+# core/kernels.py
+"""
+Loop-shaped indicator kernels: true range / ATR, rolling mean / std and the
+ATR trailing stop (high-water mark + stop check).
+
+Inputs are (n_days,) or (n_days, n_symbols) float64 arrays, oldest first, NaN
+for missing bars. Windows containing a NaN produce NaN (pandas `rolling`
+semantics with min_periods=window).
+
+Two backends with identical results:
+  - "numba": compiled loops (used automatically when numba is installed)
+  - "numpy": vectorized fallback
+LAWVISORY_KERNEL_BACKEND=numpy skips importing numba altogether (short-lived
+CLIs where JIT startup costs more than it saves).
+
+    from core import kernels
+    kernels.atr(high, low, close, 14)                      # auto backend
+    kernels.rolling_std(rets, 63, backend="numpy")
+"""
+from __future__ import annotations
+
+import os
+
+import numpy as np
+
+_nb = None
+if os.environ.get("LAWVISORY_KERNEL_BACKEND", "auto").lower() != "numpy":
+    try:  # optional JIT backend
+        import numba as _nb
+    except ImportError:  # pragma: no cover - depends on environment
+        _nb = None
+
+HAVE_NUMBA = _nb is not None
+BACKENDS = ("numba", "numpy") if HAVE_NUMBA else ("numpy",)
+
+
+def _backend(backend: str | None) -> str:
+    if backend in (None, "auto"):
+        return "numba" if HAVE_NUMBA else "numpy"
+    if backend not in ("numba", "numpy"):
+        raise ValueError(f"unknown kernel backend: {backend}")
+    if backend == "numba" and not HAVE_NUMBA:
+        raise RuntimeError("numba backend requested but numba is not installed")
+    return backend
+
+
+def _as_2d(x) -> tuple[np.ndarray, bool]:
+    a = np.asarray(x, dtype=np.float64)
+    if a.ndim == 1:
+        return a[:, None], True
+    return a, False
+
+
+def _out(a: np.ndarray, was_1d: bool) -> np.ndarray:
+    return a[:, 0] if was_1d else a
+
+
+# -------------------------
+# NumPy backend
+# -------------------------
+def _np_true_range(high, low, close):
+    prev = np.full_like(close, np.nan)
+    prev[1:] = close[:-1]
+    hl = np.abs(high - low)
+    with np.errstate(invalid="ignore"):
+        tr = np.fmax(hl, np.fmax(np.abs(high - prev), np.abs(low - prev)))
+    return tr
+
+
+def _np_window_sums(x, window, power):
+    ok = np.isfinite(x)
+    v = np.where(ok, x, 0.0) ** power
+    cs = np.vstack([np.zeros((1, x.shape[1])), np.cumsum(v, axis=0)])
+    cnt = np.vstack([np.zeros((1, x.shape[1])), np.cumsum(ok, axis=0)])
+    n = x.shape[0]
+    s = np.full(x.shape, np.nan)
+    c = np.zeros(x.shape)
+    if window <= n:
+        s[window - 1:] = cs[window:] - cs[:-window]
+        c[window - 1:] = cnt[window:] - cnt[:-window]
+    return s, c
+
+
+def _np_rolling_mean(x, window):
+    s, c = _np_window_sums(x, window, 1)
+    return np.where(c == window, s / window, np.nan)
+
+
+def _np_rolling_std(x, window):
+    s, c = _np_window_sums(x, window, 1)
+    s2, _ = _np_window_sums(x, window, 2)
+    var = (s2 - s * s / window) / (window - 1)
+    return np.where(c == window, np.sqrt(np.maximum(var, 0.0)), np.nan)
+
+
+def _np_trailing_stop(close, atr, mult, entry):
+    n_days, n_sym = close.shape
+    high = np.full(close.shape, np.nan)
+    stop = np.full(close.shape, np.nan)
+    exits = np.zeros(close.shape, dtype=np.bool_)
+
+    hwm = np.full(n_sym, np.nan)
+    for t in range(n_days):
+        px = close[t]
+        hwm = np.where(entry[t] & np.isnan(hwm), px, hwm)
+        hwm = np.fmax(hwm, np.where(np.isnan(hwm), np.nan, px))
+        st = hwm - mult * atr[t]
+        valid = np.isfinite(hwm) & np.isfinite(px) & np.isfinite(st)
+        hit = valid & (px <= st)
+        high[t] = hwm
+        stop[t] = np.where(valid, st, np.nan)
+        exits[t] = hit
+        hwm = np.where(hit, np.nan, hwm)
+    return high, stop, exits
+
+
+# -------------------------
+# Numba backend
+# -------------------------
+if HAVE_NUMBA:
+
+    @_nb.njit(cache=True)
+    def _nb_true_range(high, low, close):
+        n_days, n_sym = close.shape
+        out = np.empty((n_days, n_sym))
+        for j in range(n_sym):
+            for t in range(n_days):
+                v = abs(high[t, j] - low[t, j])
+                if t > 0:
+                    pc = close[t - 1, j]
+                    if not np.isnan(pc):
+                        a = abs(high[t, j] - pc)
+                        b = abs(low[t, j] - pc)
+                        if np.isnan(v) or a > v:
+                            v = a if not np.isnan(a) else v
+                        if np.isnan(v) or b > v:
+                            v = b if not np.isnan(b) else v
+                out[t, j] = v
+        return out
+
+    @_nb.njit(cache=True)
+    def _nb_rolling(x, window, want_std):
+        n_days, n_sym = x.shape
+        out = np.full((n_days, n_sym), np.nan)
+        for j in range(n_sym):
+            s = 0.0
+            s2 = 0.0
+            cnt = 0
+            for t in range(n_days):
+                v = x[t, j]
+                if not np.isnan(v):
+                    s += v
+                    s2 += v * v
+                    cnt += 1
+                if t >= window:
+                    old = x[t - window, j]
+                    if not np.isnan(old):
+                        s -= old
+                        s2 -= old * old
+                        cnt -= 1
+                if t >= window - 1 and cnt == window:
+                    if want_std:
+                        var = (s2 - s * s / window) / (window - 1)
+                        out[t, j] = np.sqrt(var) if var > 0.0 else 0.0
+                    else:
+                        out[t, j] = s / window
+        return out
+
+    @_nb.njit(cache=True)
+    def _nb_trailing_stop(close, atr, mult, entry):
+        n_days, n_sym = close.shape
+        high = np.full((n_days, n_sym), np.nan)
+        stop = np.full((n_days, n_sym), np.nan)
+        exits = np.zeros((n_days, n_sym), dtype=np.bool_)
+        for j in range(n_sym):
+            hwm = np.nan
+            for t in range(n_days):
+                px = close[t, j]
+                if entry[t, j] and np.isnan(hwm):
+                    hwm = px
+                if not np.isnan(hwm) and not np.isnan(px) and px > hwm:
+                    hwm = px
+                high[t, j] = hwm
+                st = hwm - mult * atr[t, j]
+                if not np.isnan(st) and not np.isnan(px):
+                    stop[t, j] = st
+                    if px <= st:
+                        exits[t, j] = True
+                        hwm = np.nan
+        return high, stop, exits
+
+
+# -------------------------
+# Public API
+# -------------------------
+def true_range(high, low, close, backend: str | None = None) -> np.ndarray:
+    h, was_1d = _as_2d(high)
+    lo, _ = _as_2d(low)
+    c, _ = _as_2d(close)
+    if _backend(backend) == "numba":
+        return _out(_nb_true_range(h, lo, c), was_1d)
+    return _out(_np_true_range(h, lo, c), was_1d)
+
+
+def rolling_mean(x, window: int, backend: str | None = None) -> np.ndarray:
+    a, was_1d = _as_2d(x)
+    window = int(window)
+    if _backend(backend) == "numba":
+        return _out(_nb_rolling(a, window, False), was_1d)
+    return _out(_np_rolling_mean(a, window), was_1d)
+
+
+def rolling_std(x, window: int, backend: str | None = None) -> np.ndarray:
+    """Sample std (ddof=1)."""
+    a, was_1d = _as_2d(x)
+    window = int(window)
+    if window < 2:
+        raise ValueError("rolling_std needs window >= 2")
+    if _backend(backend) == "numba":
+        return _out(_nb_rolling(a, window, True), was_1d)
+    return _out(_np_rolling_std(a, window), was_1d)
+
+
+def atr(high, low, close, period: int, backend: str | None = None) -> np.ndarray:
+    """Simple-average ATR (rolling mean of true range)."""
+    return rolling_mean(true_range(high, low, close, backend=backend), period, backend=backend)
+
+
+def trailing_stop(close, atr_values, mult: float, entry, backend: str | None = None):
+    """
+    Simulates the ATR trailing stop per symbol: from an entry day the high-water
+    mark of closes is tracked, stop = high - mult * ATR, and a close at or below
+    the stop exits (the position is flat until the next entry).
+
+    Returns (high_water, stop, exits) arrays shaped like `close`.
+    """
+    c, was_1d = _as_2d(close)
+    a, _ = _as_2d(atr_values)
+    e = np.asarray(entry, dtype=np.bool_)
+    e = e[:, None] if e.ndim == 1 else e
+    if _backend(backend) == "numba":
+        res = _nb_trailing_stop(c, a, float(mult), e)
+    else:
+        res = _np_trailing_stop(c, a, float(mult), e)
+    return tuple(_out(r, was_1d) for r in res)
+
+
+def trail_update(prev_high, price, atr_values, mult: float):
+    """
+    One day of the trailing stop for many open positions at once:
+    returns (new_high, stop, hit). NaN ATR -> NaN stop, never hit.
+    """
+    px = np.asarray(price, dtype=np.float64)
+    hwm = np.fmax(np.asarray(prev_high, dtype=np.float64), px)
+    stop = hwm - float(mult) * np.asarray(atr_values, dtype=np.float64)
+    with np.errstate(invalid="ignore"):
+        hit = np.isfinite(stop) & (px <= stop)
+    return hwm, stop, hit
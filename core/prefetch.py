@@ -0,0 +1,142 @@
+# core/prefetch.py
+"""
+Background prefetch of history for an upcoming day.
+
+    pf = PrefetchScheduler(fetch=lambda key: load(*key), max_workers=4, max_in_flight=16)
+    pf.schedule(tomorrow, [("AAPL", 282), ("MSFT", 282), ...])
+    ...
+    pf.get(tomorrow, ("AAPL", 282))      # value if already fetched, else None
+
+Fetches run on a small thread pool. At most `max_in_flight` are queued on the
+pool at once; the rest wait in a local queue and are submitted as earlier ones
+finish, so a 500-symbol warm-up never floods the data source.
+"""
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date
+from typing import Any, Callable, Hashable, Iterable
+import threading
+
+
+class PrefetchScheduler:
+    def __init__(
+        self,
+        fetch: Callable[[Hashable], Any],
+        max_workers: int = 4,
+        max_in_flight: int = 16,
+    ):
+        self.fetch = fetch
+        self.max_in_flight = max(1, int(max_in_flight))
+        self._pool = ThreadPoolExecutor(max_workers=max(1, int(max_workers)), thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._waiting: deque[tuple[date, Hashable]] = deque()
+        self._in_flight = 0
+        self._futures: dict[tuple[date, Hashable], Future] = {}
+        self._closed = False
+        self._local = threading.local()
+
+        self.scheduled = 0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    # -------------------------
+    # Scheduling
+    # -------------------------
+    def schedule(self, day: date, keys: Iterable[Hashable]) -> int:
+        """
+        Queue fetches of `keys` for `day`. Already scheduled keys are skipped.
+        Returns the number of newly queued keys.
+        """
+        added = 0
+        with self._lock:
+            if self._closed:
+                return 0
+            for key in keys:
+                slot = (day, key)
+                if slot in self._futures or slot in self._waiting:
+                    continue
+                self._waiting.append(slot)
+                added += 1
+            self.scheduled += added
+        self._pump()
+        return added
+
+    def _pump(self):
+        # add_done_callback runs the callback right away on an already finished
+        # future, so callbacks are registered outside the lock; slots they free
+        # on this thread are refilled by the loop here instead of recursing
+        if getattr(self._local, "pumping", False):
+            return
+        self._local.pumping = True
+        try:
+            while True:
+                started: list[Future] = []
+                with self._lock:
+                    while self._waiting and self._in_flight < self.max_in_flight and not self._closed:
+                        slot = self._waiting.popleft()
+                        self._in_flight += 1
+                        fut = self._pool.submit(self.fetch, slot[1])
+                        self._futures[slot] = fut
+                        started.append(fut)
+                if not started:
+                    return
+                for fut in started:
+                    fut.add_done_callback(self._on_done)
+        finally:
+            self._local.pumping = False
+
+    def _on_done(self, fut: Future):
+        # runs on the worker thread, or synchronously inside add_done_callback()
+        # / cancel(): callers must not hold self._lock there
+        with self._lock:
+            self._in_flight -= 1
+            if fut.cancelled():
+                return
+            if fut.exception() is not None:
+                self.errors += 1
+        self._pump()
+
+    # -------------------------
+    # Lookup
+    # -------------------------
+    def get(self, day: date, key: Hashable, timeout: float | None = 0.0) -> Any | None:
+        """
+        Prefetched value for (day, key). Waits up to `timeout` seconds for an
+        in-flight fetch (0 = only if already done). None on miss / failure.
+        """
+        fut = self._futures.get((day, key))
+        if fut is None or (timeout == 0.0 and not fut.done()):
+            self.misses += 1
+            return None
+        try:
+            value = fut.result(timeout=timeout)
+        except Exception:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._waiting) + self._in_flight
+
+    def discard_before(self, day: date):
+        """
+        Drop results (and queued fetches) for days before `day`.
+        """
+        with self._lock:
+            self._waiting = deque(s for s in self._waiting if s[0] >= day)
+            stale = [self._futures.pop(s) for s in [s for s in self._futures if s[0] < day]]
+        # outside the lock: cancel() runs _on_done on this thread
+        for fut in stale:
+            fut.cancel()
+        self._pump()
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            self._waiting.clear()
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,110 @@
+# core/profiles.py
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+
+
+@dataclass(frozen=True)
+class Profile:
+    # Portfolio construction
+    max_positions: int
+    rebalance_every_days: int
+
+    # Risk + exposure
+    risk_per_entry_cap: float          # e.g. 0.01 == ~1% loss if trailing stop hit
+    total_risk_budget: float           # caps sum of per-position risk (at stop)
+    target_exposure_bull: float        # % of portfolio invested when risk-on
+    target_exposure_bear: float        # % invested when risk-off (avoid no-trade deadlocks)
+
+    # Filters + scoring
+    min_price: float
+    vol_penalty: float                 # higher = more penalty on volatile names
+
+    # Diversification
+    max_sector_positions: int           # cap per sector
+
+    # Stops
+    atr_period: int
+    atr_mult_trail: float              # trailing distance = ATR * mult
+
+    # Safety
+    max_drawdown: float                # breaker, e.g. 0.20
+    cooldown_days: int
+
+    # Scoring: ((factor_name, weight), ...) from core.factors.FACTORS
+    # None = classic 0.50*m12 + 0.30*m6 + 0.20*m3 - vol_penalty*vol
+    factor_weights: tuple[tuple[str, float], ...] | None = None
+
+    # Turnover control (core.rebalance): skip held names whose weight AND risk-at-stop
+    # drift are within these relative bands; cap traded dollars per rebalance
+    # (fraction of portfolio; exits always trade and aren't counted). 0 / None = trade every delta.
+    weight_band: float = 0.0
+    risk_band: float = 0.0
+    turnover_budget: float | None = None
+
+    def weights(self) -> dict[str, float]:
+        if self.factor_weights is None:
+            from core.factors import default_factor_weights
+
+            return default_factor_weights(self.vol_penalty)
+        return {str(k): float(w) for k, w in self.factor_weights}
+
+
+PROFILES: dict[str, Profile] = {
+    "balanced": Profile(
+        max_positions=10,
+        rebalance_every_days=14,
+        risk_per_entry_cap=0.01,
+        total_risk_budget=0.07,
+        target_exposure_bull=0.98,
+        target_exposure_bear=0.20,
+        min_price=5.0,
+        vol_penalty=0.25,
+        max_sector_positions=3,
+        atr_period=14,
+        atr_mult_trail=2.7,
+        max_drawdown=0.20,
+        cooldown_days=10,
+    ),
+    "max_return": Profile(
+        max_positions=7,
+        rebalance_every_days=10,
+        risk_per_entry_cap=0.01,
+        total_risk_budget=0.10,
+        target_exposure_bull=0.99,
+        target_exposure_bear=0.30,
+        min_price=5.0,
+        vol_penalty=0.15,
+        max_sector_positions=2,
+        atr_period=14,
+        atr_mult_trail=3.0,
+        max_drawdown=0.20,
+        cooldown_days=7,
+    ),
+}
+
+_INT_FIELDS = ("max_positions", "rebalance_every_days", "max_sector_positions", "atr_period", "cooldown_days")
+
+
+def resolve_profile(name: str | None, **overrides) -> Profile:
+    """
+    Profile by name (unknown names fall back to "balanced"), with optional
+    field overrides for parameter sweeps. None overrides are ignored.
+    """
+    key = str(name or "balanced").lower().strip()
+    prof = PROFILES.get(key, PROFILES["balanced"])
+
+    changes = {}
+    for field, value in overrides.items():
+        if value is None:
+            continue
+        if field == "factor_weights":
+            value = tuple((str(k), float(w)) for k, w in dict(value).items())
+        elif field in _INT_FIELDS:
+            value = int(value)
+        else:
+            value = float(value)
+        changes[field] = value
+
+    # keeps dataclass frozen
+    return replace(prof, **changes) if changes else prof
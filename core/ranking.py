@@ -0,0 +1,148 @@
+# core/ranking.py
+"""
+Regime dial, trend + momentum ranking and sector-capped selection.
+"""
+from __future__ import annotations
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from core.defaults import BREADTH_HIGH, BREADTH_LOW, MOM_12M, TREND_SMA_DAYS, history_needed
+from core.factors import CLOSE, FactorEvaluator, last, rolling_mean
+from core.profiles import Profile
+
+
+def trend_bull(close: pd.Series | None, sma_days: int = TREND_SMA_DAYS) -> bool | None:
+    """
+    Last close above its SMA (None if not enough history).
+    """
+    if close is None or len(close) < sma_days:
+        return None
+    close = close.astype(float)
+    sma = close.rolling(sma_days).mean().iloc[-1]
+    if sma is None or math.isnan(float(sma)):
+        return None
+    return float(close.iloc[-1]) > float(sma)
+
+
+def breadth_fraction(ev: FactorEvaluator, sample: list[str], sma_days: int = TREND_SMA_DAYS) -> float | None:
+    """
+    % of sampled universe trading above SMA200.
+    """
+    if not sample:
+        return None
+
+    col = {s: i for i, s in enumerate(ev.panel.symbols)}
+    idx = [col[s] for s in sample if s in col]
+    if not idx:
+        return None
+
+    last_close = ev.eval(last(CLOSE))[idx]
+    sma = ev.eval(last(rolling_mean(CLOSE, sma_days)))[idx]
+    ok = np.isfinite(last_close) & np.isfinite(sma)
+
+    total = int(ok.sum())
+    if total < max(30, int(0.3 * len(sample))):
+        return None
+    return int((last_close[ok] > sma[ok]).sum()) / total
+
+
+def risk_on_fraction(
+    profile: Profile,
+    spy_bull: bool | None,
+    breadth: float | None,
+    low: float = BREADTH_LOW,
+    high: float = BREADTH_HIGH,
+) -> float:
+    """
+    Final exposure is a dial between bear and bull exposure.
+    Uses SPY trend as the base, then smooths via breadth if available.
+    """
+    bear = float(profile.target_exposure_bear)
+    bull = float(profile.target_exposure_bull)
+
+    base = bull if spy_bull is True else bear if spy_bull is False else 1.0
+    if breadth is None:
+        return base
+
+    # map breadth into [0,1] dial
+    dial = (breadth - low) / max(1e-9, (high - low))
+    dial = max(0.0, min(1.0, dial))
+
+    # blend bear->bull by breadth
+    exp = bear + dial * (bull - bear)
+    return max(0.0, min(1.0, float(exp)))
+
+
+def rank_candidates(
+    ev: FactorEvaluator,
+    profile: Profile,
+    sma_days: int = TREND_SMA_DAYS,
+    needed: int | None = None,
+) -> tuple[list[str], int]:
+    """
+    Trend filter (price > SMA200, min price, enough history) then factor score,
+    best first. Returns (ranked symbols, number that passed the trend filter).
+    """
+    if not ev.panel.symbols:
+        return [], 0
+    needed = needed if needed is not None else history_needed(sma_days, MOM_12M)
+
+    last_close = ev.eval(last(CLOSE))
+    sma = ev.eval(last(rolling_mean(CLOSE, sma_days)))
+    bars = ev.factor("bars")
+
+    eligible = (bars >= needed - 5) & (last_close >= profile.min_price)
+    trend = eligible & np.isfinite(sma) & (last_close > sma)
+
+    score = ev.score(profile.weights())
+    ok = trend & np.isfinite(score)
+
+    symbols = np.asarray(ev.panel.symbols, dtype=object)[ok]
+    order = np.argsort(-score[ok], kind="stable")
+    return [str(s) for s in symbols[order]], int(trend.sum())
+
+
+def select_with_sector_caps(
+    ranked: list[str],
+    sector_by_symbol: dict[str, str],
+    max_positions: int,
+    max_sector_positions: int,
+) -> list[str]:
+    """
+    Pick top names but cap per sector to reduce concentration drawdowns.
+    If we don't have sector data, it behaves like plain top-N.
+    """
+    max_pos = int(max_positions)
+    cap = int(max_sector_positions)
+
+    if not ranked:
+        return []
+
+    if not sector_by_symbol:
+        return ranked[:max_pos]
+
+    sector_count: dict[str, int] = {}
+    selected: list[str] = []
+
+    for sym in ranked:
+        sec = sector_by_symbol.get(sym, "UNKNOWN")
+        if sector_count.get(sec, 0) >= cap:
+            continue
+        selected.append(sym)
+        sector_count[sec] = sector_count.get(sec, 0) + 1
+        if len(selected) >= max_pos:
+            break
+
+    # fallback: if caps too strict, fill remaining without caps
+    if len(selected) < max_pos:
+        for sym in ranked:
+            if sym in selected:
+                continue
+            selected.append(sym)
+            if len(selected) >= max_pos:
+                break
+
+    return selected
@@ -0,0 +1,159 @@
+# core/rebalance.py
+"""
+Turnover-aware rebalance planning.
+
+Turns (current shares, target shares) into an ordered list of orders:
+
+  - exits (held, no longer selected) always trade and go first
+  - positions inside their no-trade band are left alone: relative weight drift
+    <= weight_band AND relative risk-at-stop drift <= risk_band. Current risk
+    is measured to the position's actual stop (the trailing stop hangs off its
+    highest close, so it drifts apart from weight as the price moves); target
+    risk is to a fresh stop one stop distance below the price
+  - remaining orders are prioritized (risk-reducing trims, new entries, top-ups;
+    bigger risk gaps first) and filled until the per-rebalance turnover budget
+    (fraction of portfolio value) is spent. Exits don't draw on the budget, so
+    a day with many exits can't starve entries; trims do (they come first)
+
+With zero bands and no budget this is the plain "trade every delta" rebalance.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+# priority classes (lower trades first)
+EXIT = 0
+TRIM = 1
+ENTRY = 2
+TOP_UP = 3
+
+_REASONS = {EXIT: "exit", TRIM: "trim", ENTRY: "entry", TOP_UP: "top_up"}
+
+
+@dataclass(frozen=True)
+class PlannedOrder:
+    symbol: str
+    side: str                  # "buy" | "sell"
+    quantity: int
+    dollars: float
+    reason: str                # exit | trim | entry | top_up
+    risk_gap: float            # |target - current| risk at stop, in dollars
+
+
+@dataclass
+class RebalanceReport:
+    orders: list[PlannedOrder] = field(default_factory=list)
+    skipped_band: list[str] = field(default_factory=list)
+    skipped_budget: list[str] = field(default_factory=list)
+    skipped_min_order: list[str] = field(default_factory=list)
+    turnover: float = 0.0              # dollars traded
+    turnover_avoided: float = 0.0      # dollars not traded because of bands / budget
+
+    @property
+    def orders_avoided(self) -> int:
+        return len(self.skipped_band) + len(self.skipped_budget)
+
+    def __str__(self) -> str:
+        return self.summary()
+
+    def summary(self) -> str:
+        return (
+            f"orders={len(self.orders)} avoided={self.orders_avoided} "
+            f"(band={len(self.skipped_band)} budget={len(self.skipped_budget)}) "
+            f"turnover=${self.turnover:,.0f} avoided=${self.turnover_avoided:,.0f}"
+        )
+
+
+def _rel_drift(cur: float, tgt: float) -> float:
+    if tgt <= 0:
+        return 0.0 if cur <= 0 else float("inf")
+    return abs(cur - tgt) / tgt
+
+
+def plan_rebalance(
+    current: dict[str, int],
+    targets: dict[str, int],
+    prices: dict[str, float],
+    stop_dist: dict[str, float],
+    portfolio_value: float,
+    exits: set[str] | None = None,
+    stops: dict[str, float] | None = None,
+    weight_band: float = 0.0,
+    risk_band: float = 0.0,
+    turnover_budget: float | None = None,
+    min_order_dollars: float = 0.0,
+) -> RebalanceReport:
+    """
+    current: held shares (signed); targets: desired shares for sized names.
+    exits: held symbols to close completely (defaults to held - targets).
+    stops: current stop price of held positions; without one a position's stop
+    is taken as one stop distance below the price (as at entry).
+    """
+    pv = max(1e-9, float(portfolio_value))
+    stops = stops or {}
+    report = RebalanceReport()
+    if exits is None:
+        exits = {s for s, q in current.items() if q != 0 and s not in targets}
+
+    candidates: list[tuple[int, float, PlannedOrder]] = []
+
+    for sym in sorted(exits):
+        qty = int(current.get(sym, 0))
+        if qty == 0:
+            continue
+        px = float(prices.get(sym) or 0.0)
+        gap = abs(qty) * float(stop_dist.get(sym, 0.0))
+        order = PlannedOrder(sym, "sell" if qty > 0 else "buy", abs(qty), abs(qty) * px, _REASONS[EXIT], gap)
+        candidates.append((EXIT, -gap, order))
+
+    for sym, target in targets.items():
+        px = prices.get(sym)
+        if px is None or px <= 0:
+            continue
+        px = float(px)
+        cur = int(current.get(sym, 0))
+        delta = int(target) - cur
+        if delta == 0:
+            continue
+
+        dollars = abs(delta) * px
+        if dollars < min_order_dollars:
+            report.skipped_min_order.append(sym)
+            continue
+
+        dist = float(stop_dist.get(sym, 0.0))
+        cur_w, tgt_w = cur * px / pv, target * px / pv
+        stop = stops.get(sym)
+        cur_dist = max(0.0, px - float(stop)) if stop is not None else dist
+        cur_r, tgt_r = cur * cur_dist / pv, target * dist / pv
+
+        if cur > 0 and _rel_drift(cur_w, tgt_w) <= weight_band and _rel_drift(cur_r, tgt_r) <= risk_band:
+            report.skipped_band.append(sym)
+            report.turnover_avoided += dollars
+            continue
+
+        gap = abs(delta) * dist
+        if delta < 0:
+            cls = TRIM
+        elif cur <= 0:
+            cls = ENTRY
+        else:
+            cls = TOP_UP
+        order = PlannedOrder(sym, "buy" if delta > 0 else "sell", abs(delta), dollars, _REASONS[cls], gap)
+        candidates.append((cls, -gap, order))
+
+    candidates.sort(key=lambda c: (c[0], c[1], c[2].symbol))
+
+    budget = None if turnover_budget is None else max(0.0, float(turnover_budget)) * pv
+    spent = 0.0   # budgeted turnover (everything but exits)
+    for cls, _, order in candidates:
+        if cls != EXIT:
+            if budget is not None and spent + order.dollars > budget:
+                report.skipped_budget.append(order.symbol)
+                report.turnover_avoided += order.dollars
+                continue
+            spent += order.dollars
+        report.orders.append(order)
+        report.turnover += order.dollars
+
+    return report
@@ -0,0 +1,77 @@
+# core/sessions.py
+"""
+NYSE trading sessions.
+
+    nyse_sessions("2024-01-01", "2024-12-31")   # DatetimeIndex of session dates
+    next_session(date(2024, 3, 28))              # 2024-04-01 (Good Friday skipped)
+
+Uses pandas_market_calendars (what Lumibot trades on) when installed; otherwise
+the NYSE full-day holiday rules below, which differ from the federal calendar
+(Good Friday closed; Columbus / Veterans Day open; Juneteenth from 2022).
+"""
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import pandas as pd
+from pandas.tseries.holiday import (
+    AbstractHolidayCalendar,
+    GoodFriday,
+    Holiday,
+    USLaborDay,
+    USMemorialDay,
+    USPresidentsDay,
+    USThanksgivingDay,
+    nearest_workday,
+    sunday_to_monday,
+)
+from pandas.tseries.offsets import DateOffset
+from dateutil.relativedelta import MO
+
+# one-off full-day closures (national days of mourning, weather, 9/11)
+SPECIAL_CLOSURES = (
+    "2001-09-11", "2001-09-12", "2001-09-13", "2001-09-14",
+    "2004-06-11", "2007-01-02", "2012-10-29", "2012-10-30",
+    "2018-12-05", "2025-01-09",
+)
+
+
+class NYSEHolidayCalendar(AbstractHolidayCalendar):
+    rules = [
+        # a Saturday New Year's Day is not observed on the Friday before
+        Holiday("New Year's Day", month=1, day=1, observance=sunday_to_monday),
+        Holiday("Martin Luther King Jr. Day", month=1, day=1, start_date="1998-01-01", offset=DateOffset(weekday=MO(3))),
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday("Juneteenth", month=6, day=19, start_date="2022-01-01", observance=nearest_workday),
+        Holiday("Independence Day", month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday("Christmas Day", month=12, day=25, observance=nearest_workday),
+    ]
+
+
+def nyse_sessions(start, end) -> pd.DatetimeIndex:
+    """
+    Session dates in [start, end] (tz-naive, midnight).
+    """
+    start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+    try:
+        import pandas_market_calendars as mcal
+
+        days = mcal.get_calendar("NYSE").valid_days(start, end)
+        return pd.DatetimeIndex(days.tz_localize(None) if days.tz is not None else days).normalize()
+    except ImportError:
+        pass
+    hol = NYSEHolidayCalendar().holidays(start, end).union(pd.DatetimeIndex(SPECIAL_CLOSURES))
+    return pd.bdate_range(start, end, freq="C", holidays=hol)
+
+
+def next_session(day: date) -> date:
+    """
+    First session after `day`.
+    """
+    start = day + timedelta(days=1)
+    sessions = nyse_sessions(start, start + timedelta(days=10))
+    return sessions[0].date()
@@ -0,0 +1,260 @@
+# core/signalcache.py
+"""
+Per-date signals persisted across backtests.
+
+Sweeps over sizing / risk parameters (risk_per_entry_cap, total_risk_budget,
+atr_mult_trail, max_drawdown, ...) don't change what the ranking reads, so the
+cross-sections a day computed are written once and read back by every later run:
+
+    data/.cache/signals/<data version>/<params hash>/<YYYY-MM-DD>.npz
+
+    cache = SignalCache(universe, params={"needed": 282, "no_lookahead": True})
+    day = cache.day(today, version)              # loaded from disk if present
+                                                 # version: data snapshot, e.g. store_version()
+    ev = CachedEvaluator(day, build=lambda: FactorEvaluator(panel))
+    ev.factor("mom_12m")                         # from disk, or computed and recorded
+    day.indicator("atr_14_80", "AAPL")           # per-symbol values (ATR, vol, ...)
+    cache.flush()                                # writes days that gained values
+
+A day file holds factor-graph nodes (one value per symbol, keyed by the node's
+structure, so redefining a factor never reads stale values), per-symbol
+indicators over the cache universe (0.0 = computed but unavailable, NaN = not
+computed yet) and scalars. Files are written atomically, so parallel backtests
+can share a directory; the last writer of a day wins.
+"""
+from __future__ import annotations
+
+from datetime import date
+from pathlib import Path
+from typing import Callable
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from core.factors import FACTORS, FactorEvaluator, PricePanel
+from core.store import cache_dir
+
+SIGNALS_DIR_NAME = "signals"
+# bump when stored values change meaning (2: per-symbol bars, core.factors.align_last_valid)
+SIGNALS_FORMAT = 2
+
+
+def params_key(params: dict) -> str:
+    blob = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode()).hexdigest()[:16]
+
+
+def expr_key(expr) -> str:
+    # Expr is a frozen dataclass: its repr is the full structure (op, args, constants)
+    return hashlib.sha1(repr(expr).encode()).hexdigest()[:16]
+
+
+# -------------------------
+# One day
+# -------------------------
+class SignalDay:
+    """
+    Values recorded for one date. `symbols` is the node axis (the evaluator's
+    panel symbols); indicators use the cache universe.
+    """
+
+    def __init__(self, day: date, universe: tuple[str, ...], path: Path | None = None):
+        self.day = day
+        self.universe = universe
+        self.path = path
+        self.symbols: tuple[str, ...] | None = None
+        self.values: dict[str, np.ndarray] = {}
+        self.dirty = False
+        self._col = {s: i for i, s in enumerate(universe)}
+
+    def bind(self, symbols: tuple[str, ...]):
+        """
+        Sets the node axis; recorded nodes over a different axis are dropped.
+        """
+        symbols = tuple(symbols)
+        if self.symbols == symbols:
+            return
+        if self.symbols is not None:
+            self.values = {k: v for k, v in self.values.items() if not k.startswith("n:")}
+        self.symbols = symbols
+        self.dirty = True
+
+    # --- factor-graph nodes ---
+    def node(self, key: str) -> np.ndarray | None:
+        return self.values.get(f"n:{key}")
+
+    def put_node(self, key: str, value):
+        self.values[f"n:{key}"] = np.array(value, dtype=np.float64)
+        self.dirty = True
+
+    # --- per-symbol indicators ---
+    def indicator(self, name: str, symbol: str) -> tuple[bool, float | None]:
+        i = self._col.get(symbol)
+        v = self.values.get(f"i:{name}")
+        if i is None or v is None or np.isnan(v[i]):
+            return False, None
+        return True, (float(v[i]) if v[i] > 0 else None)
+
+    def put_indicator(self, name: str, symbol: str, value: float | None):
+        i = self._col.get(symbol)
+        if i is None:
+            return
+        v = self.values.get(f"i:{name}")
+        if v is None:
+            v = self.values[f"i:{name}"] = np.full(len(self.universe), np.nan)
+        v[i] = 0.0 if value is None else float(value)
+        self.dirty = True
+
+    # --- scalars ---
+    def scalar(self, name: str) -> tuple[bool, float | None]:
+        v = self.values.get(f"s:{name}")
+        if v is None:
+            return False, None
+        return True, (None if np.isnan(v) else float(v))
+
+    def put_scalar(self, name: str, value: float | None):
+        self.values[f"s:{name}"] = np.float64(np.nan if value is None else value)
+        self.dirty = True
+
+    # --- persistence ---
+    def save(self):
+        if self.path is None or not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".{os.getpid()}.{id(self)}.tmp.npz")
+        extra = {"symbols": np.array(self.symbols, dtype=str)} if self.symbols is not None else {}
+        np.savez_compressed(tmp, universe=np.array(self.universe, dtype=str), **extra, **self.values)
+        tmp.replace(self.path)
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: Path, day: date, universe: tuple[str, ...]) -> "SignalDay":
+        out = cls(day, universe, path)
+        with np.load(path, allow_pickle=False) as z:
+            if tuple(z["universe"].tolist()) != universe:
+                return out
+            if "symbols" in z.files:
+                out.symbols = tuple(z["symbols"].tolist())
+            out.values = {k: z[k] for k in z.files if k[:2] in ("n:", "i:", "s:")}
+        return out
+
+
+# -------------------------
+# Cache
+# -------------------------
+class SignalCache:
+    """
+    Day files for one universe + parameter set (the hash of `params` and the
+    universe). Pass everything the signals depend on apart from the data itself:
+    window lengths, no-lookahead, bar settings, ...
+    """
+
+    def __init__(self, universe: list[str], params: dict | None = None, directory: Path | None = None):
+        self.universe = tuple(universe)
+        self.params = dict(params or {})
+        self.root = Path(directory) if directory is not None else cache_dir() / SIGNALS_DIR_NAME
+        self.key = params_key({**self.params, "universe": list(self.universe), "format": SIGNALS_FORMAT})
+        self._days: dict[tuple[str, date], SignalDay] = {}
+
+        self.loaded = 0
+        self.created = 0
+        self.written = 0
+
+    def path(self, day: date, version: str) -> Path:
+        return self.root / str(version) / self.key / f"{pd.Timestamp(day):%Y-%m-%d}.npz"
+
+    def day(self, day: date, version: str) -> SignalDay:
+        k = (str(version), day)
+        hit = self._days.get(k)
+        if hit is not None:
+            return hit
+
+        path = self.path(day, version)
+        entry = None
+        if path.exists():
+            try:
+                entry = SignalDay.load(path, day, self.universe)
+                self.loaded += 1
+            except (OSError, KeyError, ValueError):
+                entry = None
+        if entry is None:
+            entry = SignalDay(day, self.universe, path)
+            self.created += 1
+        self._days[k] = entry
+        return entry
+
+    def flush(self, keep: date | None = None):
+        """
+        Writes days that gained values and forgets all but `keep`.
+        """
+        for k, entry in list(self._days.items()):
+            if entry.dirty:
+                entry.save()
+                self.written += 1
+            if k[1] != keep:
+                del self._days[k]
+
+
+# -------------------------
+# Evaluator backed by a day
+# -------------------------
+class CachedEvaluator:
+    """
+    FactorEvaluator stand-in: cross-sections come from the day when recorded;
+    otherwise `build()` makes the real evaluator (once) and its results are
+    recorded. Series nodes (one row per date) are computed but not stored.
+
+    `panel` is only the symbol axis (no rows) until a miss builds the evaluator.
+    """
+
+    def __init__(self, day: SignalDay, build: Callable[[], FactorEvaluator]):
+        self.signals = day
+        self._build = build
+        self._ev: FactorEvaluator | None = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def evaluator(self) -> FactorEvaluator:
+        if self._ev is None:
+            self._ev = self._build()
+            self.signals.bind(self._ev.panel.symbols)
+        return self._ev
+
+    @property
+    def panel(self) -> PricePanel:
+        if self._ev is None and self.signals.symbols is not None:
+            return PricePanel(pd.DatetimeIndex([]), self.signals.symbols, {})
+        return self.evaluator.panel
+
+    def __len__(self) -> int:
+        return len(self._ev) if self._ev is not None else 0
+
+    def eval(self, expr):
+        key = expr_key(expr)
+        if self.signals.symbols is not None:
+            hit = self.signals.node(key)
+            if hit is not None:
+                self.hits += 1
+                return hit
+        val = self.evaluator.eval(expr)
+        self.misses += 1
+        if np.ndim(val) <= 1:
+            self.signals.put_node(key, val)
+        return val
+
+    def factor(self, name: str) -> np.ndarray:
+        if name not in FACTORS:
+            raise KeyError(f"unknown factor {name!r}")
+        return np.broadcast_to(self.eval(FACTORS[name]), (len(self.panel.symbols),))
+
+    def score(self, weights: dict[str, float]) -> np.ndarray:
+        total = np.zeros(len(self.panel.symbols), dtype=np.float64)
+        for name, w in weights.items():
+            if w == 0:
+                continue
+            total = total + float(w) * self.factor(name)
+        return total
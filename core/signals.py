@@ -0,0 +1,330 @@
+# core/signals.py
+"""
+A trading day's signals for one universe, independent of broker and data source.
+
+    sig = DailySignals(universe, profile, fetch=lambda sym, length: daily_frame_or_none)
+    sig.start_day(today)
+    sig.exposure(with_breadth=True)          # SPY trend + breadth dial
+    ranked, passed = sig.ranked()
+    sig.selected(ranked, sectors)            # sector-capped top N
+    sig.atr("AAPL"), sig.realized_vol("AAPL")
+
+Histories come from a shared PricePanel when `panel()` returns one (data
+plane), else from `fetch(symbol, length)`: completed daily bars, lower-case
+columns, None on failure. Both are cached for the day.
+
+Optional pieces, imported only when used: a core.signalcache.SignalCache
+replaying cross-sections, indicators and the regime from disk; weekly /
+monthly core.bars.BarCache windows over the shared panel; a
+core.incremental.IncrementalRanker maintained across days.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date
+from functools import partial
+from typing import TYPE_CHECKING, Any, Callable
+
+import pandas as pd
+
+from core.defaults import (
+    BAR_WINDOWS,
+    BREADTH_HIGH,
+    BREADTH_LOW,
+    BREADTH_SAMPLE,
+    MOM_12M,
+    NO_LOOKAHEAD,
+    REGIME_SYMBOL,
+    TREND_SMA_DAYS,
+    VOL_LOOKBACK,
+    history_needed,
+)
+from core.factors import FactorEvaluator, PricePanel
+from core.indicators import atr as atr_indicator, realized_vol as realized_vol_indicator
+from core.profiles import Profile
+from core.ranking import breadth_fraction, rank_candidates, risk_on_fraction, select_with_sector_caps, trend_bull
+
+if TYPE_CHECKING:
+    from core.bars import BarCache
+    from core.incremental import IncrementalRanker
+    from core.signalcache import CachedEvaluator, SignalCache, SignalDay
+
+
+@dataclass(frozen=True)
+class SignalSettings:
+    sma_days: int = TREND_SMA_DAYS
+    mom_12m: int = MOM_12M
+    vol_lookback: int = VOL_LOOKBACK
+    regime_symbol: str = REGIME_SYMBOL
+    breadth_sample: int = BREADTH_SAMPLE
+    breadth_low: float = BREADTH_LOW
+    breadth_high: float = BREADTH_HIGH
+    bar_windows: dict[str, int] = field(default_factory=lambda: dict(BAR_WINDOWS))
+    no_lookahead: bool = NO_LOOKAHEAD
+
+    @property
+    def needed(self) -> int:
+        return history_needed(self.sma_days, self.mom_12m)
+
+    def cache_params(self, bar_windows: bool) -> dict[str, Any]:
+        # everything a SignalCache day depends on apart from the data
+        return {
+            "needed": self.needed,
+            "no_lookahead": self.no_lookahead,
+            "bar_windows": self.bar_windows if bar_windows else None,
+            "regime": [self.regime_symbol, self.sma_days],
+        }
+
+
+def store_symbol(symbol: str) -> str:
+    # data/STOCKS names use BRK-B style
+    return str(symbol).upper().strip().replace(".", "-")
+
+
+class DailySignals:
+    def __init__(
+        self,
+        universe: list[str],
+        profile: Profile,
+        fetch: Callable[[str, int], pd.DataFrame | None],
+        settings: SignalSettings | None = None,
+        panel: Callable[[], PricePanel | None] | None = None,
+        version: Callable[[], str | None] | None = None,
+        cache: SignalCache | None = None,
+        cache_version: str | None = None,
+        ranker: IncrementalRanker | None = None,
+        events=None,
+    ):
+        self.universe = list(universe)
+        self.profile = profile
+        self.fetch = fetch
+        self.settings = settings or SignalSettings()
+        self._panel = panel
+        self._version = version
+        self.cache = cache
+        self.cache_version = cache_version
+        self.ranker = ranker
+        self.events = events
+
+        self.day: date | None = None
+        self._hist: dict[tuple[str, int], pd.DataFrame | None] = {}
+        self._factor_eval: FactorEvaluator | CachedEvaluator | None = None
+        self._bar_caches: dict[str, BarCache] = {}
+        self._ranker_day: date | None = None
+        self._cache_warned = False
+
+    # -------------------------
+    # Day / data
+    # -------------------------
+    def start_day(self, today: date):
+        if self.day != today:
+            self.day = today
+            self._hist.clear()
+            self._factor_eval = None
+
+    def shared_panel(self) -> PricePanel | None:
+        return self._panel() if self._panel is not None else None
+
+    def data_version(self) -> str | None:
+        return self._version() if self._version is not None else None
+
+    def history(self, symbol: str, length: int) -> pd.DataFrame | None:
+        """
+        Daily bars for `symbol` (the shared panel's rows, or `fetch`), cached for the day.
+        """
+        key = (symbol, int(length))
+        if key in self._hist:
+            return self._hist[key]
+
+        shared = self.shared_panel()
+        sym = store_symbol(symbol)
+        if shared is not None and sym in shared.symbols:
+            w = shared.window(self.day, length, [sym], inclusive=not self.settings.no_lookahead)
+            df = pd.DataFrame({f: v[:, 0] for f, v in w.fields.items()}, index=w.dates).dropna()
+        else:
+            df = self.fetch(symbol, int(length))
+        self._hist[key] = df
+        return df
+
+    # -------------------------
+    # Signal cache
+    # -------------------------
+    def signal_day(self) -> SignalDay | None:
+        if self.cache is None:
+            return None
+        version = self.cache_version or self.data_version()
+        if version is None:
+            # bars come from the data source, whose snapshot has no version
+            if not self._cache_warned and self.events is not None:
+                self.events.warning("signal_cache", "no data version (no data plane, no signal_cache_version) -> cache off")
+            self._cache_warned = True
+            return None
+        return self.cache.day(self.day, version)
+
+    def _cached_indicator(self, name: str, symbol: str, compute: Callable[[], float | None]) -> float | None:
+        day = self.signal_day()
+        if day is None:
+            return compute()
+        hit, value = day.indicator(name, store_symbol(symbol))
+        if hit:
+            return value
+        value = compute()
+        day.put_indicator(name, store_symbol(symbol), value)
+        return value
+
+    # -------------------------
+    # Per-symbol indicators
+    # -------------------------
+    def atr(self, symbol: str) -> float | None:
+        period = self.profile.atr_period
+        length = max(period + 10, 80)
+        return self._cached_indicator(
+            f"atr_{period}_{length}", symbol,
+            lambda: atr_indicator(self.history(symbol, length), period),
+        )
+
+    def realized_vol(self, symbol: str) -> float | None:
+        lookback = self.settings.vol_lookback
+        length = max(lookback + 10, 120)
+        return self._cached_indicator(
+            f"vol_{lookback}_{length}", symbol,
+            lambda: realized_vol_indicator(self.history(symbol, length), lookback),
+        )
+
+    # -------------------------
+    # Regime: SPY trend + breadth dial
+    # -------------------------
+    def spy_bull(self) -> bool | None:
+        day = self.signal_day()
+        if day is not None:
+            hit, value = day.scalar("spy_bull")
+            if hit:
+                return None if value is None else bool(value)
+        df = self.history(self.settings.regime_symbol, self.settings.sma_days + 30)
+        bull = None if df is None or "close" not in df.columns else trend_bull(df["close"], self.settings.sma_days)
+        if day is not None:
+            day.put_scalar("spy_bull", None if bull is None else float(bull))
+        return bull
+
+    def breadth(self) -> float | None:
+        """
+        % of the sampled universe trading above its SMA.
+        """
+        sample = self.universe[: min(len(self.universe), self.settings.breadth_sample)]
+        if not sample:
+            return None
+        return breadth_fraction(self.factors(), sample, self.settings.sma_days)
+
+    def exposure(self, with_breadth: bool) -> float:
+        """
+        Dial between bear and bull exposure: SPY trend, smoothed by breadth when asked.
+        """
+        b = self.breadth() if with_breadth else None
+        return risk_on_fraction(self.profile, self.spy_bull(), b, self.settings.breadth_low, self.settings.breadth_high)
+
+    # -------------------------
+    # Factors
+    # -------------------------
+    def factors(self) -> FactorEvaluator | CachedEvaluator:
+        """
+        One evaluator per day over the whole universe panel, so breadth, ranking
+        and any extra factors share returns / rolling sums / SMAs. With the
+        signal cache, cross-sections already on disk for the day are read back
+        and the panel is only built for the ones that aren't.
+        """
+        if self._factor_eval is not None:
+            return self._factor_eval
+        day = self.signal_day()
+        if day is not None:
+            from core.signalcache import CachedEvaluator
+
+            self._factor_eval = CachedEvaluator(day, self._build_factors)
+        else:
+            self._factor_eval = self._build_factors()
+        return self._factor_eval
+
+    def _build_factors(self, symbols: list[str] | None = None) -> FactorEvaluator:
+        symbols = self.universe if symbols is None else symbols
+        needed = self.settings.needed
+        shared = self.shared_panel()
+        if shared is not None:
+            # slice the shared panel directly: no per-symbol frames at all
+            w = shared.window(self.day, needed, [store_symbol(s) for s in symbols],
+                              inclusive=not self.settings.no_lookahead)
+            return FactorEvaluator(PricePanel(w.dates, tuple(symbols), w.fields), bars=self._bar_windows(shared, symbols))
+
+        frames: dict[str, pd.DataFrame] = {}
+        for sym in symbols:
+            df = self.history(sym, needed)
+            if df is None or "close" not in df.columns or df.empty:
+                continue
+            frames[sym] = df
+        return FactorEvaluator(PricePanel.from_frames(frames))
+
+    def _bar_windows(self, shared: PricePanel, symbols: list[str]) -> dict[str, Callable[[], PricePanel]]:
+        """
+        Weekly / monthly bars for the universe as of the day, from caches kept in
+        step with the shared panel (only the open bar is rebuilt per new day).
+        Lazy: a frequency is only built if the factor graph evaluates an on() node for it.
+        """
+        return {freq: partial(self._bar_window, shared, self.day, freq, length, symbols)
+                for freq, length in self.settings.bar_windows.items()}
+
+    def _bar_window(self, shared: PricePanel, today: date, freq: str, length: int, symbols: list[str]) -> PricePanel:
+        cache = self._bar_caches.get(freq)
+        if cache is None:
+            from core.bars import BarCache
+
+            cache = self._bar_caches[freq] = BarCache(freq)
+        cache.update(shared, self.data_version())
+        w = cache.window(today, length, [store_symbol(s) for s in symbols],
+                         inclusive=not self.settings.no_lookahead, daily=shared)
+        return PricePanel(w.dates, tuple(symbols), w.fields)
+
+    # -------------------------
+    # Ranking / selection
+    # -------------------------
+    def update_ranker(self) -> list[str]:
+        """
+        Brings the maintained ranking to the day (once); returns the re-scored symbols.
+        """
+        if self.ranker is None or self._ranker_day == self.day:
+            return []
+        changed = self.ranker.update(self.factors())
+        self._ranker_day = self.day
+        return changed
+
+    def ranked(self) -> tuple[list[str], int]:
+        """
+        Trend-filtered symbols by score (best first), number that passed the trend filter.
+        """
+        if self.ranker is not None:
+            self.update_ranker()
+            return self.ranker.ranked(), self.ranker.passed_trend()
+        return rank_candidates(self.factors(), self.profile, self.settings.sma_days, self.settings.needed)
+
+    def selected(self, ranked: list[str], sectors: dict[str, str]) -> list[str]:
+        """
+        Top names with at most max_sector_positions per sector (plain top N without sector data).
+        """
+        if self.ranker is not None:
+            return self.ranker.selected(sectors, self.profile.max_positions, self.profile.max_sector_positions)
+        return select_with_sector_caps(ranked, sectors, self.profile.max_positions, self.profile.max_sector_positions)
+
+    def watch(self, last_selected: list[str], sectors: dict[str, str]) -> tuple[list[str], list[str]]:
+        """
+        Daily check of the maintained ranking between rebalances: only its
+        contenders (ranker.contenders()) are evaluated, so only their histories
+        are read; the rest of the universe is refreshed on the next full update
+        (ranked()). Returns (re-scored symbols, names the selection would add
+        to `last_selected`).
+        """
+        if self._ranker_day == self.day:
+            rescored = []
+        elif self.ranker.evaluations == 0:
+            rescored = self.update_ranker()
+        else:
+            rescored = self.ranker.update(self._build_factors(self.ranker.contenders()))
+        held = set(last_selected)
+        entered = [s for s in self.selected(self.ranker.ranked(), sectors) if s not in held]
+        return rescored, entered
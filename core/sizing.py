@@ -0,0 +1,76 @@
+# core/sizing.py
+"""
+Inverse-vol weights + ATR risk sizing (per-entry risk cap + total risk budget).
+"""
+from __future__ import annotations
+
+from core.defaults import MIN_ORDER_DOLLARS
+from core.profiles import Profile
+
+
+def inverse_vol_weights(vols: dict[str, float]) -> dict[str, float]:
+    inv = {s: 1.0 / v for s, v in vols.items() if v is not None and v > 0}
+    inv_sum = sum(inv.values())
+    if inv_sum <= 0:
+        return {}
+    return {s: inv[s] / inv_sum for s in inv}
+
+
+def stop_distance(atr: float, profile: Profile) -> float:
+    """
+    Distance from price to the ATR trailing stop (risk per share).
+    """
+    return max(0.01, profile.atr_mult_trail * float(atr))
+
+
+def size_targets(
+    weights: dict[str, float],
+    prices: dict[str, float],
+    atrs: dict[str, float],
+    portfolio_value: float,
+    exposure: float,
+    profile: Profile,
+    min_order_dollars: float = MIN_ORDER_DOLLARS,
+) -> tuple[dict[str, int], float]:
+    """
+    Target share counts: min(shares by risk at the ATR stop, shares by capital).
+    Symbols without a price / ATR, or below the minimum order size, are skipped.
+    Returns (symbol -> shares, dollars invested).
+    """
+    pv = float(portfolio_value)
+    exposure = max(0.0, min(1.0, float(exposure)))
+
+    total_risk_dollars = pv * profile.total_risk_budget
+    risk_dollars_cap = pv * profile.risk_per_entry_cap
+
+    desired_qty: dict[str, int] = {}
+    invested = 0.0
+
+    for sym, w in weights.items():
+        px = prices.get(sym)
+        if px is None or px <= 0:
+            continue
+        px = float(px)
+
+        atr = atrs.get(sym)
+        if atr is None:
+            continue
+
+        stop_dist = stop_distance(atr, profile)
+
+        risk_dollars = min(total_risk_dollars * float(w), risk_dollars_cap)
+
+        shares_by_risk = int(risk_dollars // stop_dist)
+        shares_by_capital = int((pv * exposure * float(w)) // px)
+
+        shares = max(0, min(shares_by_risk, shares_by_capital))
+        if shares <= 0:
+            continue
+
+        if shares * px < min_order_dollars:
+            continue
+
+        desired_qty[sym] = shares
+        invested += shares * px
+
+    return desired_qty, invested
@@ -0,0 +1,190 @@
+# core/store.py
+"""
+Local stock store: data/STOCKS/<TICKER>_data.csv -> one PricePanel.
+
+    panel, meta = load_store()
+    panel.fields["close"]           # (n_dates, n_symbols)
+    meta["AAPL"]["sector"]
+
+`store_version()` fingerprints the store (file names, sizes, mtimes) so caches
+and the shared-memory data plane can tell when the updater changed it.
+`load_store_cached()` keeps a binary snapshot of the parsed panel under
+data/.cache and only re-parses the CSVs when that fingerprint changes.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+import csv
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+from core.factors import PricePanel
+from core.universe import data_dir, symbol_from_path
+
+FIELDS = ("open", "high", "low", "close", "volume")
+# bump when what load_store() returns changes, so binary snapshots are rebuilt
+SNAPSHOT_FORMAT = 2
+CACHE_DIR_NAME = ".cache"
+META_FIELDS = ("company_name", "sector", "industry")
+
+_CSV_COLUMNS = {"Open": "open", "High": "high", "Low": "low", "Close": "close", "Volume": "volume"}
+
+
+def store_files(directory: Path | None = None) -> list[Path]:
+    directory = directory or data_dir()
+    return sorted(directory.glob("*_data.csv"))
+
+
+def cache_dir(directory: Path | None = None) -> Path:
+    """
+    data/.cache (next to the store directory) for derived binary snapshots.
+    """
+    directory = directory or data_dir()
+    return directory.parent / CACHE_DIR_NAME
+
+
+def store_version(directory: Path | None = None) -> str:
+    h = hashlib.sha1()
+    for p in store_files(directory):
+        st = p.stat()
+        h.update(f"{p.name}:{st.st_size}:{st.st_mtime_ns};".encode())
+    return h.hexdigest()[:16]
+
+
+def _read_arrays(path: Path) -> tuple[np.ndarray, dict[str, np.ndarray], dict[str, str]]:
+    """
+    One store CSV -> (datetime64[ns] dates, field -> float64 values, metadata from the first row).
+    Only numeric columns go through the CSV parser; metadata is read off the first data line,
+    like core.universe.load_sector_map (later rows can carry a different sector taxonomy).
+    """
+    with open(path, "rb") as fh:
+        header = next(csv.reader([fh.readline().decode("utf-8-sig").strip()]))
+        first = fh.readline().decode("utf-8", errors="replace").strip()
+
+    usecols = [c for c in header if c in _CSV_COLUMNS or c == "date"]
+    df = pd.read_csv(path, usecols=usecols, dtype={c: np.float64 for c in usecols if c != "date"})
+
+    meta: dict[str, str] = {}
+    if len(df) and first:
+        row = next(csv.reader([first]))
+        if len(row) == len(header):
+            values = dict(zip(header, row))
+            meta = {k: values.get(k, "") for k in META_FIELDS}
+
+    dates = df["date"].to_numpy(dtype="datetime64[D]").astype("datetime64[ns]")
+    fields = {_CSV_COLUMNS[c]: df[c].to_numpy() for c in usecols if c != "date"}
+
+    order = np.argsort(dates, kind="stable")
+    if not np.all(order == np.arange(len(order))):
+        dates = dates[order]
+        fields = {f: v[order] for f, v in fields.items()}
+    # duplicates: keep the last row for a date
+    keep = np.append(dates[1:] != dates[:-1], True) if len(dates) else np.zeros(0, dtype=bool)
+    return dates[keep], {f: v[keep] for f, v in fields.items()}, meta
+
+
+def read_symbol(path: Path) -> tuple[pd.DataFrame, dict[str, str]]:
+    """
+    One store CSV -> (daily OHLCV indexed by date, metadata from the first row).
+    """
+    dates, fields, meta = _read_arrays(path)
+    df = pd.DataFrame({f: fields[f] for f in FIELDS if f in fields}, index=pd.DatetimeIndex(dates))
+    return df, meta
+
+
+def load_store(directory: Path | None = None, symbols: list[str] | None = None) -> tuple[PricePanel, dict[str, dict[str, str]]]:
+    """
+    Reads every store CSV (or just `symbols`) into a date-aligned panel.
+    """
+    files = store_files(directory)
+    if symbols is not None:
+        wanted = set(symbols)
+        files = [p for p in files if symbol_from_path(p) in wanted]
+
+    series: list[tuple[str, np.ndarray, dict[str, np.ndarray]]] = []
+    meta: dict[str, dict[str, str]] = {}
+    for p in files:
+        try:
+            dates, fields, m = _read_arrays(p)
+        except Exception:
+            continue
+        if not len(dates):
+            continue
+        sym = symbol_from_path(p)
+        series.append((sym, dates, fields))
+        meta[sym] = m
+
+    return _scatter(series), meta
+
+
+def _scatter(series: list[tuple[str, np.ndarray, dict[str, np.ndarray]]]) -> PricePanel:
+    """
+    Place per-symbol arrays into preallocated (dates x symbols) arrays.
+    """
+    if not series:
+        return PricePanel(pd.DatetimeIndex([]), (), {f: np.empty((0, 0)) for f in FIELDS})
+
+    all_dates = np.unique(np.concatenate([d for _, d, _ in series]))
+    n_dates, n_sym = len(all_dates), len(series)
+    panel = {f: np.full((n_dates, n_sym), np.nan) for f in FIELDS}
+
+    for j, (_, dates, fields) in enumerate(series):
+        rows = np.searchsorted(all_dates, dates)
+        for f, v in fields.items():
+            panel[f][rows, j] = v
+
+    return PricePanel(pd.DatetimeIndex(all_dates), tuple(s for s, _, _ in series), panel)
+
+
+def panel_from_frames(frames: list[tuple[str, pd.DataFrame]]) -> PricePanel:
+    """
+    (symbol, daily OHLCV frame) pairs -> date-aligned panel.
+    """
+    return _scatter([
+        (sym, df.index.to_numpy(dtype="datetime64[ns]"), {f: df[f].to_numpy(dtype=np.float64) for f in FIELDS if f in df.columns})
+        for sym, df in frames
+    ])
+
+
+# -------------------------
+# Binary snapshot
+# -------------------------
+def load_store_cached(directory: Path | None = None, save: bool = True) -> tuple[PricePanel, dict[str, dict[str, str]]]:
+    """
+    load_store() for the whole store, served from data/.cache/store.npz when
+    the snapshot matches the current store version.
+    """
+    directory = directory or data_dir()
+    version = store_version(directory)
+    path = cache_dir(directory) / "store.npz"
+
+    try:
+        with np.load(path) as z:
+            if str(z["version"]) == version and int(z.get("format", 1)) == SNAPSHOT_FORMAT:
+                panel = PricePanel(
+                    pd.DatetimeIndex(z["dates"]),
+                    tuple(z["symbols"].tolist()),
+                    {f: z[f"f_{f}"] for f in FIELDS},
+                )
+                return panel, json.loads(str(z["meta"]))
+    except (OSError, KeyError, ValueError):
+        pass
+
+    panel, meta = load_store(directory)
+    if save:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp.npz")
+        np.savez(
+            tmp,
+            version=version,
+            format=SNAPSHOT_FORMAT,
+            dates=panel.dates.to_numpy(dtype="datetime64[ns]"),
+            symbols=np.array(panel.symbols, dtype=str),
+            meta=json.dumps(meta),
+            **{f"f_{f}": panel.fields[f] for f in FIELDS},
+        )
+        tmp.replace(path)
+    return panel, meta
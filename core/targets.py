@@ -0,0 +1,154 @@
+# core/targets.py
+"""
+Target portfolio for one profile as of a date, straight from a price panel.
+
+Same steps as a LawvisoryBaseStrategy rebalance day: SPY trend + breadth dial,
+trend / factor ranking, sector-capped selection, inverse-vol weights and ATR
+risk sizing. Prices are the last close before the as-of date (the strategy
+uses the broker's last price).
+
+    panel, meta = load_store_cached()
+    t = target_portfolio(panel, profile, as_of=date.today(), portfolio_value=100_000,
+                         sectors={s: m["sector"] for s, m in meta.items()})
+    t.to_frame()
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date
+
+import pandas as pd
+
+from core.defaults import (
+    BREADTH_HIGH,
+    BREADTH_LOW,
+    BREADTH_SAMPLE,
+    MAX_UNIVERSE,
+    MIN_ORDER_DOLLARS,
+    REGIME_SYMBOL,
+    TREND_SMA_DAYS,
+    VOL_LOOKBACK,
+    history_needed,
+)
+from core.factors import FactorEvaluator, PricePanel
+from core.indicators import atr, realized_vol
+from core.profiles import Profile
+from core.ranking import (
+    breadth_fraction,
+    rank_candidates,
+    risk_on_fraction,
+    select_with_sector_caps,
+    trend_bull,
+)
+from core.sizing import inverse_vol_weights, size_targets
+
+
+@dataclass
+class TargetPortfolio:
+    profile: str
+    as_of: date
+    portfolio_value: float
+    spy_bull: bool | None
+    breadth: float | None
+    exposure: float
+    selected: list[str]
+    weights: dict[str, float] = field(default_factory=dict)
+    shares: dict[str, int] = field(default_factory=dict)
+    prices: dict[str, float] = field(default_factory=dict)
+    atrs: dict[str, float] = field(default_factory=dict)
+    invested: float = 0.0
+
+    def to_frame(self) -> pd.DataFrame:
+        rows = []
+        for sym in self.selected:
+            qty = self.shares.get(sym, 0)
+            px = self.prices.get(sym)
+            rows.append({
+                "profile": self.profile,
+                "symbol": sym,
+                "weight": self.weights.get(sym, 0.0),
+                "shares": qty,
+                "price": px,
+                "value": qty * px if px else 0.0,
+                "portfolio_weight": qty * px / self.portfolio_value if px and self.portfolio_value else 0.0,
+                "atr": self.atrs.get(sym),
+            })
+        return pd.DataFrame(rows)
+
+    def summary(self) -> str:
+        bull = "n/a" if self.spy_bull is None else ("bull" if self.spy_bull else "bear")
+        breadth = "n/a" if self.breadth is None else f"{self.breadth:.0%}"
+        return (
+            f"{self.profile}: as_of={self.as_of} spy={bull} breadth={breadth} "
+            f"exposure={self.exposure:.0%} held={len(self.shares)} "
+            f"invested={self.invested:,.0f} ({self.invested / self.portfolio_value:.0%})"
+        )
+
+
+def _frame(panel: PricePanel, sym: str, as_of, length: int) -> pd.DataFrame:
+    # same as the strategy's shared-panel path: last `length` rows before as_of, NaN rows dropped
+    w = panel.window(as_of, length, [sym])
+    return pd.DataFrame({f: v[:, 0] for f, v in w.fields.items()}, index=w.dates).dropna()
+
+
+def target_portfolio(
+    panel: PricePanel,
+    profile: Profile,
+    as_of,
+    portfolio_value: float,
+    sectors: dict[str, str] | None = None,
+    universe: list[str] | None = None,
+    name: str = "",
+    ev: FactorEvaluator | None = None,
+) -> TargetPortfolio:
+    """
+    `ev` can be shared across profiles (it only depends on panel, universe and as_of).
+    """
+    as_of = pd.Timestamp(as_of)
+    universe = list(universe if universe is not None else panel.symbols[:MAX_UNIVERSE])
+    needed = history_needed()
+
+    if ev is None:
+        ev = FactorEvaluator(panel.window(as_of, needed, universe))
+
+    spy = _frame(panel, REGIME_SYMBOL, as_of, TREND_SMA_DAYS + 30)
+    spy_bull = trend_bull(spy["close"], TREND_SMA_DAYS) if "close" in spy.columns else None
+    breadth = breadth_fraction(ev, universe[:BREADTH_SAMPLE], TREND_SMA_DAYS)
+    exposure = risk_on_fraction(profile, spy_bull, breadth, BREADTH_LOW, BREADTH_HIGH)
+
+    ranked, _ = rank_candidates(ev, profile, TREND_SMA_DAYS, needed)
+    selected = select_with_sector_caps(ranked, sectors or {}, profile.max_positions, profile.max_sector_positions)
+
+    vols: dict[str, float] = {}
+    for sym in selected:
+        v = realized_vol(_frame(panel, sym, as_of, max(VOL_LOOKBACK + 10, 120)), VOL_LOOKBACK)
+        if v is not None and v > 0:
+            vols[sym] = v
+    weights = inverse_vol_weights(vols)
+
+    prices: dict[str, float] = {}
+    atrs: dict[str, float] = {}
+    for sym in weights:
+        df = _frame(panel, sym, as_of, max(profile.atr_period + 10, 80))
+        if df.empty:
+            continue
+        prices[sym] = float(df["close"].iloc[-1])
+        a = atr(df, profile.atr_period)
+        if a is not None:
+            atrs[sym] = a
+
+    shares, invested = size_targets(weights, prices, atrs, portfolio_value, exposure, profile, MIN_ORDER_DOLLARS)
+    return TargetPortfolio(
+        profile=name,
+        as_of=as_of.date(),
+        portfolio_value=float(portfolio_value),
+        spy_bull=spy_bull,
+        breadth=breadth,
+        exposure=exposure,
+        selected=selected,
+        weights=weights,
+        shares=shares,
+        prices=prices,
+        atrs=atrs,
+        invested=invested,
+    )
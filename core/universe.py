@@ -0,0 +1,84 @@
+# core/universe.py
+from __future__ import annotations
+
+from pathlib import Path
+import re
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+# common US equity ticker patterns, incl BRK.B / BF.B
+TICKER_RE = re.compile(r"[A-Z]{1,5}(\.[A-Z])?")
+
+
+def data_dir() -> Path:
+    """
+    data/STOCKS (or fallback STOCKS/) at the repo root.
+    """
+    d = PROJECT_ROOT / "data" / "STOCKS"
+    if not d.exists():
+        d = PROJECT_ROOT / "STOCKS"
+    return d
+
+
+def symbol_from_path(p: Path) -> str:
+    t = p.stem.replace("_data", "").upper().strip()
+    return re.sub(r"[^A-Z0-9\.\-]", "", t)
+
+
+def default_universe(limit: int, directory: Path | None = None) -> list[str]:
+    """
+    Uses the repo CSV names as the universe source:
+    data/STOCKS/*.csv  (or fallback STOCKS/*.csv)
+    Accepts tickers like BRK.B, BF.B, etc.
+    """
+    directory = directory or data_dir()
+
+    tickers: list[str] = []
+    for p in directory.glob("*.csv"):
+        t = symbol_from_path(p)
+        if 1 <= len(t) <= 8 and TICKER_RE.fullmatch(t):
+            tickers.append(t)
+
+    tickers = sorted(set(tickers))
+    return tickers[:limit]
+
+
+def sector_map_from_meta(meta: dict[str, dict[str, str]]) -> dict[str, str]:
+    """
+    load_sector_map() from already parsed store metadata (core.store, first row).
+    """
+    out: dict[str, str] = {}
+    for sym, m in meta.items():
+        sec = str(m.get("sector", "") or "").strip()
+        if TICKER_RE.fullmatch(sym) and sec and sec.lower() != "nan":
+            out[sym] = sec
+    return out
+
+
+def load_sector_map(directory: Path | None = None) -> dict[str, str]:
+    """
+    Optional: tries to read 'sector' from the local STOCKS CSV files.
+    If not present, just returns {} (strategy still works).
+    """
+    import pandas as pd
+
+    directory = directory or data_dir()
+
+    sector_map: dict[str, str] = {}
+    if not directory.exists():
+        return sector_map
+
+    for p in directory.glob("*.csv"):
+        sym = symbol_from_path(p)
+        if not TICKER_RE.fullmatch(sym):
+            continue
+        try:
+            df0 = pd.read_csv(p, nrows=1)
+            cols = {c.lower(): c for c in df0.columns}
+            if "sector" in cols and not df0.empty:
+                sec = str(df0.iloc[0][cols["sector"]]).strip()
+                if sec and sec.lower() != "nan":
+                    sector_map[sym] = sec
+        except Exception:
+            continue
+    return sector_map
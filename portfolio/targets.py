@@ -0,0 +1,151 @@
+# portfolio/targets.py
+"""
+What would each profile hold today?
+
+Reads the local stock store (binary snapshot under data/.cache, rebuilt when
+the store changes; or a running data plane) and runs the strategy's rebalance
+steps for every profile in core.profiles.PROFILES and
+portfolio/risk_profiles.py. Names the strategy doesn't know resolve the same
+way `initialize(risk_profile_name=...)` does (fallback: balanced), so each
+distinct strategy profile is computed and printed once, with the names that
+map to it; risk_profiles.py's own settings are not used by the strategy.
+Sectors are the first-row ones core.universe.load_sector_map gives the strategy,
+read from the snapshot's metadata.
+
+Without --as-of, signals use the last bar in the store (not today), with a
+warning when the store is more than a few days old.
+
+Usage:
+    python -m portfolio.targets --value 100000
+    python -m portfolio.targets --value 250000 --profile max_return --as-of 2025-06-02 --out targets.csv
+"""
+from __future__ import annotations
+
+from datetime import date
+from pathlib import Path
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+# a few hundred short windows: numba's import + JIT load costs more than it saves here
+os.environ.setdefault("LAWVISORY_KERNEL_BACKEND", "numpy")
+
+import pandas as pd  # noqa: E402
+
+from core.factors import FactorEvaluator  # noqa: E402
+from core.profiles import PROFILES, resolve_profile  # noqa: E402
+from core.defaults import MAX_UNIVERSE, history_needed  # noqa: E402
+from core.store import load_store_cached  # noqa: E402
+from core.targets import TargetPortfolio, target_portfolio  # noqa: E402
+from core.universe import default_universe, sector_map_from_meta  # noqa: E402
+from portfolio.risk_profiles import RISK_PROFILES  # noqa: E402
+
+
+# store older than this (calendar days before today) gets a warning
+STALE_DAYS = 5
+
+
+def profile_names() -> list[str]:
+    return list(PROFILES) + [n for n in RISK_PROFILES if n not in PROFILES]
+
+
+def strategy_profile(name: str) -> str:
+    """
+    PROFILES key the strategy runs for `name` (unknown names -> balanced).
+    """
+    key = str(name or "balanced").lower().strip()
+    return key if key in PROFILES else "balanced"
+
+
+def profile_groups(names: list[str]) -> dict[str, list[str]]:
+    """
+    Strategy profile -> requested names that resolve to it (first-seen order).
+    """
+    groups: dict[str, list[str]] = {}
+    for name in names:
+        groups.setdefault(strategy_profile(name), []).append(name)
+    return groups
+
+
+def _load(use_data_plane: bool):
+    if use_data_plane:
+        from core.dataplane import attach
+
+        handle = attach()
+        if handle is not None:
+            return handle.panel, handle.sectors()
+    panel, meta = load_store_cached()
+    return panel, sector_map_from_meta(meta)
+
+
+def targets(
+    portfolio_value: float,
+    as_of=None,
+    names: list[str] | None = None,
+    use_data_plane: bool = False,
+) -> list[TargetPortfolio]:
+    """
+    One TargetPortfolio per distinct strategy profile among `names`.
+    """
+    panel, sectors = _load(use_data_plane)
+    store_end = panel.dates[-1]
+    wanted = min(pd.Timestamp(as_of or date.today()), pd.Timestamp(date.today()))
+    stale = (wanted - store_end).days
+    if stale > STALE_DAYS:
+        print(
+            f"warning: store ends {store_end.date()}, {stale} days before {wanted.date()}; "
+            "targets use that last bar (run update_stocks.py to refresh)",
+            file=sys.stderr,
+        )
+    if as_of is None:
+        # signals read bars before as_of: the day after the last stored bar uses all of them
+        as_of = store_end + pd.Timedelta(days=1)
+    as_of = pd.Timestamp(as_of)
+    universe = default_universe(MAX_UNIVERSE)
+
+    # one factor graph for all profiles: it depends only on the panel window
+    ev = FactorEvaluator(panel.window(as_of, history_needed(), universe))
+    out = []
+    for key in profile_groups(names or profile_names()):
+        out.append(target_portfolio(
+            panel, resolve_profile(key), as_of, portfolio_value,
+            sectors=sectors, universe=universe, name=key, ev=ev,
+        ))
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Target portfolio per risk profile from the local stock store.")
+    ap.add_argument("--value", type=float, default=100_000.0, help="portfolio value in dollars")
+    ap.add_argument("--as-of", default=None, help="YYYY-MM-DD (signals use bars before this date; default: day after the last stored bar)")
+    ap.add_argument("--profile", action="append", help="profile name (repeat; default: all)")
+    ap.add_argument("--data-plane", action="store_true", help="read a running `python -m core.dataplane serve`")
+    ap.add_argument("--out", default=None, help="optional CSV path")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    results = targets(args.value, as_of=args.as_of, names=args.profile, use_data_plane=args.data_plane)
+    elapsed = time.perf_counter() - t0
+
+    groups = profile_groups(args.profile or profile_names())
+    with pd.option_context("display.width", 200, "display.max_rows", 200, "display.float_format", "{:.4f}".format):
+        for t in results:
+            aliases = [n for n in groups.get(t.profile, []) if n != t.profile]
+            note = f" (also for: {', '.join(aliases)})" if aliases else ""
+            print(t.summary() + note)
+            frame = t.to_frame()
+            if not frame.empty:
+                print(frame.drop(columns=["profile"]).to_string(index=False))
+            print()
+    print(f"{len(results)} profiles in {elapsed:.2f}s")
+
+    if args.out:
+        pd.concat([t.to_frame() for t in results], ignore_index=True).to_csv(args.out, index=False)
+        print(f"saved -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
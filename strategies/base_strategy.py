@@ -1,76 +1,28 @@
 # strategies/base_strategy.py
 from __future__ import annotations
 
-from dataclasses import dataclass, replace
 from datetime import date, timedelta
-from pathlib import Path
-import math
-import re
+from typing import TYPE_CHECKING
+
 import pandas as pd
 
 from lumibot.strategies import Strategy
 
+from core import defaults
+from core.book import drawdown_breach, plan_holdings, record_fills, trailing_exits
+from core.profiles import PROFILES, Profile, resolve_profile
+from core.rebalance import RebalanceReport
+from core.sessions import next_session
+from core.signals import DailySignals, SignalSettings, store_symbol
+from core.universe import default_universe, load_sector_map
+
+if TYPE_CHECKING:
+    from core.dataplane import DataPlaneClient
+    from core.eventlog import EventLog
+    from core.prefetch import PrefetchScheduler
+    from core.signalcache import SignalCache
 
-@dataclass(frozen=True)
-class Profile:
-    # Portfolio construction
-    max_positions: int
-    rebalance_every_days: int
-
-    # Risk + exposure
-    risk_per_entry_cap: float          # e.g. 0.01 == ~1% loss if trailing stop hit
-    total_risk_budget: float           # caps sum of per-position risk (at stop)
-    target_exposure_bull: float        # % of portfolio invested when risk-on
-    target_exposure_bear: float        # % invested when risk-off (avoid no-trade deadlocks)
-
-    # Filters + scoring
-    min_price: float
-    vol_penalty: float                 # higher = more penalty on volatile names
-
-    # Diversification
-    max_sector_positions: int           # cap per sector
-
-    # Stops
-    atr_period: int
-    atr_mult_trail: float              # trailing distance = ATR * mult
-
-    # Safety
-    max_drawdown: float                # breaker, e.g. 0.20
-    cooldown_days: int
-
-
-PROFILES: dict[str, Profile] = {
-    "balanced": Profile(
-        max_positions=10,
-        rebalance_every_days=14,
-        risk_per_entry_cap=0.01,
-        total_risk_budget=0.07,
-        target_exposure_bull=0.98,
-        target_exposure_bear=0.20,
-        min_price=5.0,
-        vol_penalty=0.25,
-        max_sector_positions=3,
-        atr_period=14,
-        atr_mult_trail=2.7,
-        max_drawdown=0.20,
-        cooldown_days=10,
-    ),
-    "max_return": Profile(
-        max_positions=7,
-        rebalance_every_days=10,
-        risk_per_entry_cap=0.01,
-        total_risk_budget=0.10,
-        target_exposure_bull=0.99,
-        target_exposure_bear=0.30,
-        min_price=5.0,
-        vol_penalty=0.15,
-        max_sector_positions=2,
-        atr_period=14,
-        atr_mult_trail=3.0,
-        max_drawdown=0.20,
-        cooldown_days=7,
-    ),
-}
+__all__ = ["LawvisoryBaseStrategy", "PROFILES", "Profile"]
 
 
 class LawvisoryBaseStrategy(Strategy):
@@ -85,31 +37,28 @@ class LawvisoryBaseStrategy(Strategy):
       - Drawdown breaker + cooldown
       - Per-day historical data cache for speed
       - Sector cap to reduce concentration drawdowns
-    """
-
-    # Trend / momentum windows (daily)
-    TREND_SMA_DAYS = 200
-    MOM_12M = 252
-    MOM_6M = 126
-    MOM_3M = 63
-    VOL_LOOKBACK = 63
-
-    # Regime indicator
-    REGIME_SYMBOL = "SPY"
-
-    # Universe speed limiter
-    MAX_UNIVERSE_FOR_SPEED = 500
 
-    # Breadth dial sampling (keeps it fast)
-    BREADTH_SAMPLE = 150
-    BREADTH_LOW = 0.35   # below = risk-off
-    BREADTH_HIGH = 0.65  # above = risk-on
-
-    # Minimum dollars per order to avoid churn
-    MIN_ORDER_DOLLARS = 150.0
+    Signals live in core.signals, holdings decisions in core.book; this class
+    feeds them Lumibot data and turns their decisions into orders.
+    """
 
-    # If True: compute signals from the prior completed daily bar (more realistic)
-    NO_LOOKAHEAD = True
+    # Windows, regime, breadth and order limits: core.defaults (override per subclass)
+    TREND_SMA_DAYS = defaults.TREND_SMA_DAYS
+    MOM_12M = defaults.MOM_12M
+    MOM_6M = defaults.MOM_6M
+    MOM_3M = defaults.MOM_3M
+    VOL_LOOKBACK = defaults.VOL_LOOKBACK
+    BAR_WINDOWS = defaults.BAR_WINDOWS
+    REGIME_SYMBOL = defaults.REGIME_SYMBOL
+    MAX_UNIVERSE_FOR_SPEED = defaults.MAX_UNIVERSE
+    BREADTH_SAMPLE = defaults.BREADTH_SAMPLE
+    BREADTH_LOW = defaults.BREADTH_LOW
+    BREADTH_HIGH = defaults.BREADTH_HIGH
+    MIN_ORDER_DOLLARS = defaults.MIN_ORDER_DOLLARS
+    NO_LOOKAHEAD = defaults.NO_LOOKAHEAD
+
+    # Longest wait (seconds) for an in-flight prefetch before fetching synchronously
+    PREFETCH_WAIT = 10.0
 
     def initialize(
         self,
@@ -124,31 +73,51 @@ class LawvisoryBaseStrategy(Strategy):
         max_drawdown: float | None = None,
         target_exposure_bear: float | None = None,
         target_exposure_bull: float | None = None,
+        factor_weights: dict[str, float] | None = None,
+        weight_band: float | None = None,
+        risk_band: float | None = None,
+        turnover_budget: float | None = None,
+        # read bars zero-copy from a running `python -m core.dataplane serve`
+        use_data_plane: bool = False,
+        # structured events: optional JSONL / CSV / Parquet file (replaced per run) + minimum
+        # level echoed to log_message ("INFO" for the old per-event lines, "OFF" for none)
+        event_log_path: str | None = None,
+        log_echo_level: str = "WARNING",
+        # live only: fetch tomorrow's rebalance histories the evening before (0 = off)
+        prefetch_workers: int = 4,
+        prefetch_in_flight: int = 16,
+        # re-score only symbols whose inputs moved (core.incremental) and watch the
+        # selection daily; watch days read only the ranking's contenders' histories.
+        # early_rebalance_changes > 0: rebalance early once that many names changed.
+        incremental_ranking: bool = False,
+        ranking_tol: float = 0.01,
+        early_rebalance_changes: int = 0,
+        # backtests: per-date signals (factors, breadth, SPY trend, vol / ATR) persisted
+        # under data/.cache/signals and reused by later runs with the same data + windows.
+        # signal_cache_version names the data snapshot (default: the data plane's store
+        # version); without either the cache is off, since re-fetched or re-adjusted
+        # source data would otherwise reuse stale signals. Change it with the data.
+        signal_cache: bool = False,
+        signal_cache_version: str | None = None,
     ):
         self.sleeptime = "1D"
 
         name = str(risk_profile_name or "balanced").lower().strip()
-        prof = PROFILES.get(name, PROFILES["balanced"])
-
-        # apply overrides safely (keeps dataclass frozen)
-        if risk_per_entry_cap is not None:
-            prof = replace(prof, risk_per_entry_cap=float(risk_per_entry_cap))
-        if total_risk_budget is not None:
-            prof = replace(prof, total_risk_budget=float(total_risk_budget))
-        if atr_mult_trail is not None:
-            prof = replace(prof, atr_mult_trail=float(atr_mult_trail))
-        if rebalance_every_days is not None:
-            prof = replace(prof, rebalance_every_days=int(rebalance_every_days))
-        if vol_penalty is not None:
-            prof = replace(prof, vol_penalty=float(vol_penalty))
-        if max_drawdown is not None:
-            prof = replace(prof, max_drawdown=float(max_drawdown))
-        if target_exposure_bear is not None:
-            prof = replace(prof, target_exposure_bear=float(target_exposure_bear))
-        if target_exposure_bull is not None:
-            prof = replace(prof, target_exposure_bull=float(target_exposure_bull))
-
-        self.profile = prof
+        self.profile = resolve_profile(
+            name,
+            risk_per_entry_cap=risk_per_entry_cap,
+            total_risk_budget=total_risk_budget,
+            atr_mult_trail=atr_mult_trail,
+            rebalance_every_days=rebalance_every_days,
+            vol_penalty=vol_penalty,
+            max_drawdown=max_drawdown,
+            target_exposure_bear=target_exposure_bear,
+            target_exposure_bull=target_exposure_bull,
+            factor_weights=factor_weights,
+            weight_band=weight_band,
+            risk_band=risk_band,
+            turnover_budget=turnover_budget,
+        )
 
         self.universe = universe or self._default_universe(self.MAX_UNIVERSE_FOR_SPEED)
         self._last_rebalance_day: date | None = None
@@ -160,86 +129,127 @@ class LawvisoryBaseStrategy(Strategy):
         self._equity_peak: float | None = None
         self._cooldown_until: date | None = None
 
-        # per-day cache
-        self._cache_day: date | None = None
-        self._hist_cache: dict[tuple[str, int], pd.DataFrame] = {}
+        self._early_rebalance_changes = int(early_rebalance_changes)
+        self._last_selected: list[str] = []
+
+        # per-rebalance order plans (orders sent, orders / turnover avoided)
+        self.rebalance_reports: list[tuple[date, RebalanceReport]] = []
+
+        # structured event log (ring buffer; optional background file writer)
+        from core.eventlog import EventLog
+
+        self.events: EventLog = EventLog(
+            path=event_log_path,
+            echo=self.log_message,
+            echo_level=log_echo_level,
+            sample_every={"data": 10},
+            clock=self.get_datetime,
+        )
+
+        # Optional features import their modules only when switched on (the
+        # JIT kernels, shared memory, thread pools and cache files stay unloaded).
+
+        # shared-memory price panel (falls back to the data source when absent)
+        self._data_plane: DataPlaneClient | None = None
+        if use_data_plane:
+            from core.dataplane import DataPlaneClient
+
+            self._data_plane = DataPlaneClient()
+
+        # background history warm-up ahead of rebalance days (live trading only)
+        self._prefetch: PrefetchScheduler | None = None
+        if prefetch_workers and not self.is_backtesting:
+            from core.prefetch import PrefetchScheduler
+
+            self._prefetch = PrefetchScheduler(
+                fetch=lambda sym: self._fetch_daily_raw(sym, self._prefetch_length()),
+                max_workers=prefetch_workers,
+                max_in_flight=prefetch_in_flight,
+            )
+
+        settings = SignalSettings(
+            sma_days=self.TREND_SMA_DAYS,
+            mom_12m=self.MOM_12M,
+            vol_lookback=self.VOL_LOOKBACK,
+            regime_symbol=self.REGIME_SYMBOL,
+            breadth_sample=self.BREADTH_SAMPLE,
+            breadth_low=self.BREADTH_LOW,
+            breadth_high=self.BREADTH_HIGH,
+            bar_windows=dict(self.BAR_WINDOWS),
+            no_lookahead=self.NO_LOOKAHEAD,
+        )
+
+        # persistent signal cache (backtests only)
+        self._signal_cache: SignalCache | None = None
+        if signal_cache and self.is_backtesting:
+            from core.signalcache import SignalCache
+
+            self._signal_cache = SignalCache(
+                [store_symbol(s) for s in self.universe],
+                params=settings.cache_params(bar_windows=use_data_plane),
+            )
+
+        # change-driven ranking (None = full re-rank on rebalance days only)
+        ranker = None
+        if incremental_ranking:
+            from core.incremental import IncrementalRanker
+
+            ranker = IncrementalRanker(self.profile, self.TREND_SMA_DAYS, settings.needed, score_tol=ranking_tol)
+
+        dp = self._data_plane
+        self.signals = DailySignals(
+            self.universe,
+            self.profile,
+            fetch=self._fetch_history,
+            settings=settings,
+            panel=dp.panel if dp is not None else None,
+            version=dp.version if dp is not None else None,
+            cache=self._signal_cache,
+            cache_version=signal_cache_version,
+            ranker=ranker,
+            events=self.events,
+        )
 
         # optional sector map (from your CSVs if present)
         self._sector_by_symbol: dict[str, str] = self._load_sector_map()
 
-        self.log_message(
-            f"[INIT] profile={name} universe={len(self.universe)} "
-            f"max_pos={self.profile.max_positions} dd_cap={self.profile.max_drawdown:.0%} "
-            f"risk_entry_cap={self.profile.risk_per_entry_cap:.2%} total_risk={self.profile.total_risk_budget:.2%}"
+        self.events.info(
+            "INIT",
+            "profile=%s universe=%d max_pos=%d dd_cap=%.0f%% risk_entry_cap=%.2f%% total_risk=%.2f%%",
+            name, len(self.universe), self.profile.max_positions, self.profile.max_drawdown * 100,
+            self.profile.risk_per_entry_cap * 100, self.profile.total_risk_budget * 100,
         )
 
     # -------------------------
     # Universe helpers
     # -------------------------
     def _default_universe(self, limit: int) -> list[str]:
-        """
-        Uses your repo CSV names as the universe source:
-        data/STOCKS/*.csv  (or fallback STOCKS/*.csv)
-        Accepts tickers like BRK.B, BF.B, etc.
-        """
-        data_dir = Path(__file__).resolve().parents[1] / "data" / "STOCKS"
-        if not data_dir.exists():
-            data_dir = Path(__file__).resolve().parents[1] / "STOCKS"
-
-        tickers: list[str] = []
-        for p in data_dir.glob("*.csv"):
-            t = p.stem.replace("_data", "").upper().strip()
-            t = re.sub(r"[^A-Z0-9\.\-]", "", t)
-
-            # keep common US equity ticker patterns, incl BRK.B / BF.B
-            if 1 <= len(t) <= 8 and re.fullmatch(r"[A-Z]{1,5}(\.[A-Z])?", t):
-                tickers.append(t)
-
-        tickers = sorted(set(tickers))
-        return tickers[:limit]
+        return default_universe(limit)
 
     def _load_sector_map(self) -> dict[str, str]:
-        """
-        Optional: tries to read 'sector' from your local STOCKS CSV files.
-        If not present, just returns {} (strategy still works).
-        """
-        data_dir = Path(__file__).resolve().parents[1] / "data" / "STOCKS"
-        if not data_dir.exists():
-            data_dir = Path(__file__).resolve().parents[1] / "STOCKS"
-
-        sector_map: dict[str, str] = {}
-        if not data_dir.exists():
-            return sector_map
-
-        for p in data_dir.glob("*.csv"):
-            sym = p.stem.replace("_data", "").upper().strip()
-            sym = re.sub(r"[^A-Z0-9\.\-]", "", sym)
-            if not re.fullmatch(r"[A-Z]{1,5}(\.[A-Z])?", sym):
-                continue
-            try:
-                df0 = pd.read_csv(p, nrows=1)
-                cols = {c.lower(): c for c in df0.columns}
-                if "sector" in cols and not df0.empty:
-                    sec = str(df0.iloc[0][cols["sector"]]).strip()
-                    if sec and sec.lower() != "nan":
-                        sector_map[sym] = sec
-            except Exception:
-                continue
-        return sector_map
+        handle = self._data_plane.handle() if self._data_plane is not None else None
+        if handle is not None:
+            return handle.sectors()
+        return load_sector_map()
 
     # -------------------------
     # Scheduling / guards
     # -------------------------
+    def _today(self) -> date:
+        return self.get_datetime().date()
+
     def _should_rebalance_today(self) -> bool:
-        today = self.get_datetime().date()
+        return self._should_rebalance_on(self._today())
+
+    def _should_rebalance_on(self, day: date) -> bool:
         if self._last_rebalance_day is None:
             return True
-        return (today - self._last_rebalance_day).days >= self.profile.rebalance_every_days
+        return (day - self._last_rebalance_day).days >= self.profile.rebalance_every_days
 
     def _in_cooldown(self) -> bool:
         if self._cooldown_until is None:
             return False
-        return self.get_datetime().date() <= self._cooldown_until
+        return self._today() <= self._cooldown_until
 
     # -------------------------
     # Symbol mapping (Yahoo uses BRK-B style)
@@ -251,409 +261,226 @@ class LawvisoryBaseStrategy(Strategy):
         return s
 
     # -------------------------
-    # Data helpers
+    # Data source (DailySignals asks here when the data plane can't serve)
     # -------------------------
-    def _get_daily_df(self, symbol: str, length: int) -> pd.DataFrame | None:
+    def _fetch_history(self, symbol: str, length: int) -> pd.DataFrame | None:
         """
-        Cached daily bars. Drops current day bar (no-lookahead).
+        Completed daily bars from the data source (or an in-flight prefetch).
         """
-        today = self.get_datetime().date()
-        if self._cache_day != today:
-            self._cache_day = today
-            self._hist_cache.clear()
-
+        today = self._today()
         sym = self._src_symbol(symbol)
-        key = (sym, int(length))
-        if key in self._hist_cache:
-            return self._hist_cache[key]
+
+        if self._prefetch is not None:
+            # wait (bounded) for an in-flight fetch rather than issuing the same request again
+            df = self._prefetch.get(today, sym, timeout=self.PREFETCH_WAIT)
+            if df is not None and len(df) >= length:
+                return self._drop_current_bar(df.iloc[-length:], today)
 
         try:
-            bars = self.get_historical_prices(sym, length=length, timestep="day")
-            df = bars.df.copy()
-            df.columns = [c.lower() for c in df.columns]
-            df = df.dropna()
-
-            if self.NO_LOOKAHEAD and isinstance(df.index, pd.DatetimeIndex) and len(df) >= 3:
-                last_date = df.index[-1].date()
-                if last_date >= today:
-                    df = df.iloc[:-1]
-
-            self._hist_cache[key] = df
-            return df
+            return self._drop_current_bar(self._fetch_daily_raw(sym, length), today)
         except Exception as e:
-            self.log_message(f"[data] Failed {sym} length={length}: {e}")
-            return None
-
-    def _atr(self, symbol: str) -> float | None:
-        length = max(self.profile.atr_period + 10, 80)
-        df = self._get_daily_df(symbol, length=length)
-        if df is None or any(c not in df.columns for c in ("high", "low", "close")):
+            self.events.debug("data", "Failed %s length=%d: %s", sym, length, e, symbol=sym)
             return None
 
-        high = df["high"].astype(float)
-        low = df["low"].astype(float)
-        close = df["close"].astype(float)
-        prev_close = close.shift(1)
+    def _fetch_daily_raw(self, sym: str, length: int) -> pd.DataFrame:
+        bars = self.get_historical_prices(sym, length=length, timestep="day")
+        df = bars.df.copy()
+        df.columns = [c.lower() for c in df.columns]
+        return df.dropna()
 
-        tr = pd.concat(
-            [(high - low).abs(), (high - prev_close).abs(), (low - prev_close).abs()],
-            axis=1,
-        ).max(axis=1)
+    def _drop_current_bar(self, df: pd.DataFrame, today: date) -> pd.DataFrame:
+        if self.NO_LOOKAHEAD and isinstance(df.index, pd.DatetimeIndex) and len(df) >= 3:
+            last_date = df.index[-1].date()
+            if last_date >= today:
+                df = df.iloc[:-1]
+        return df
 
-        atr = tr.rolling(self.profile.atr_period).mean().iloc[-1]
-        if atr is None or math.isnan(float(atr)) or float(atr) <= 0:
-            return None
-        return float(atr)
+    def _price(self, symbol: str) -> float | None:
+        return self.get_last_price(self._src_symbol(symbol))
 
-    def _realized_vol(self, symbol: str) -> float | None:
-        length = max(self.VOL_LOOKBACK + 10, 120)
-        df = self._get_daily_df(symbol, length=length)
-        if df is None or "close" not in df.columns:
-            return None
-        close = df["close"].astype(float)
-        rets = close.pct_change().dropna()
-        if len(rets) < 25:
-            return None
-        vol = float(rets.tail(self.VOL_LOOKBACK).std() * math.sqrt(252))
-        if math.isnan(vol) or vol <= 0:
-            return None
-        return vol
+    def _held(self) -> dict[str, float]:
+        held: dict[str, float] = {}
+        for pos in self.get_positions():
+            sym = getattr(pos.asset, "symbol", None) or str(pos.asset)
+            qty = float(getattr(pos, "quantity", 0) or 0)
+            if qty != 0:
+                held[sym] = qty
+        return held
 
     # -------------------------
-    # Regime: SPY trend + breadth dial
+    # Prefetch (live)
     # -------------------------
-    def _spy_trend_bull(self) -> bool | None:
-        needed = self.TREND_SMA_DAYS + 30
-        df = self._get_daily_df(self.REGIME_SYMBOL, length=needed)
-        if df is None or "close" not in df.columns or len(df) < self.TREND_SMA_DAYS:
-            return None
-        close = df["close"].astype(float)
-        sma = close.rolling(self.TREND_SMA_DAYS).mean().iloc[-1]
-        if sma is None or math.isnan(float(sma)):
-            return None
-        return float(close.iloc[-1]) > float(sma)
-
-    def _breadth_fraction(self) -> float | None:
+    def _prefetch_length(self) -> int:
         """
-        % of sampled universe trading above SMA200.
-        Computed only on rebalance days (so it doesn't slow daily loops too much).
+        One fetch per symbol covers every window a rebalance reads (factors,
+        regime, ATR, vol); shorter requests are served from its tail.
         """
-        needed = self.TREND_SMA_DAYS + 30
-        sample = self.universe[: min(len(self.universe), self.BREADTH_SAMPLE)]
-        if not sample:
-            return None
-
-        above = 0
-        total = 0
-        for sym in sample:
-            df = self._get_daily_df(sym, length=needed)
-            if df is None or "close" not in df.columns or len(df) < self.TREND_SMA_DAYS:
-                continue
-            close = df["close"].astype(float)
-            last = float(close.iloc[-1])
-            sma = close.rolling(self.TREND_SMA_DAYS).mean().iloc[-1]
-            if sma is None or math.isnan(float(sma)):
-                continue
-            total += 1
-            if last > float(sma):
-                above += 1
-
-        if total < max(30, int(0.3 * len(sample))):
-            return None
-        return above / total
+        return max(
+            self.signals.settings.needed,
+            self.profile.atr_period + 10, 80,
+            self.VOL_LOOKBACK + 10, 120,
+        )
 
-    def _risk_on_fraction(self) -> float:
+    def _next_session(self, day: date) -> date:
         """
-        Final exposure is a dial between bear and bull exposure.
-        Uses SPY trend as the base, then smooths via breadth if available.
+        Next NYSE session after `day`.
         """
-        bear = float(self.profile.target_exposure_bear)
-        bull = float(self.profile.target_exposure_bull)
-
-        spy_bull = self._spy_trend_bull()
-        base = bull if spy_bull is True else bear if spy_bull is False else 1.0
-
-        # breadth smoothing only on rebalance days (keeps speed)
-        if not self._should_rebalance_today():
-            return base
-
-        b = self._breadth_fraction()
-        if b is None:
-            return base
-
-        # map breadth into [0,1] dial
-        dial = (b - self.BREADTH_LOW) / max(1e-9, (self.BREADTH_HIGH - self.BREADTH_LOW))
-        dial = max(0.0, min(1.0, dial))
+        return next_session(day)
 
-        # blend bear->bull by breadth
-        exp = bear + dial * (bull - bear)
-        return max(0.0, min(1.0, float(exp)))
+    def _schedule_prefetch(self):
+        """
+        If the next session is a rebalance day, start fetching its histories now.
+        """
+        if self._prefetch is None or self.signals.shared_panel() is not None:
+            return
+        nxt = self._next_session(self._today())
+        if not self._should_rebalance_on(nxt):
+            return
+        if self._cooldown_until is not None and nxt <= self._cooldown_until:
+            return
+        symbols = [self._src_symbol(s) for s in [self.REGIME_SYMBOL, *self.universe]]
+        queued = self._prefetch.schedule(nxt, dict.fromkeys(symbols))
+        self.events.info("prefetch", "day=%s queued=%d", nxt, queued, day=nxt, queued=queued)
 
     # -------------------------
-    # Ranking: trend + momentum ensemble
+    # Ranking watch (incremental_ranking)
     # -------------------------
-    def _rank_candidates(self) -> list[str]:
-        needed = max(self.TREND_SMA_DAYS, self.MOM_12M) + 30
-        scored: list[tuple[str, float]] = []
-
-        passed_trend = 0
-        for sym in self.universe:
-            df = self._get_daily_df(sym, length=needed)
-            if df is None or "close" not in df.columns or len(df) < needed - 5:
-                continue
-
-            close = df["close"].astype(float)
-            last_close = float(close.iloc[-1])
-            if last_close < self.profile.min_price:
-                continue
-
-            sma200 = close.rolling(self.TREND_SMA_DAYS).mean().iloc[-1]
-            if sma200 is None or math.isnan(float(sma200)) or last_close <= float(sma200):
-                continue
-
-            passed_trend += 1
-
-            def mom(lb: int) -> float | None:
-                if len(close) <= lb:
-                    return None
-                past = float(close.iloc[-lb])
-                if past <= 0:
-                    return None
-                return (last_close / past) - 1.0
-
-            m12 = mom(self.MOM_12M)
-            m6 = mom(self.MOM_6M)
-            m3 = mom(self.MOM_3M)
-            if m12 is None or m6 is None or m3 is None:
-                continue
-
-            vol = self._realized_vol(sym)
-            if vol is None:
-                continue
-
-            score = (0.50 * m12) + (0.30 * m6) + (0.20 * m3) - (self.profile.vol_penalty * vol)
-            scored.append((sym, float(score)))
-
-        scored.sort(key=lambda x: x[1], reverse=True)
-
-        if self._should_rebalance_today():
-            self.log_message(f"[rank] trend_pass={passed_trend} scored={len(scored)}")
-
-        return [s for s, _ in scored]
-
-    def _select_with_sector_caps(self, ranked: list[str]) -> list[str]:
+    def _watch_ranking(self) -> bool:
         """
-        Pick top names but cap per sector to reduce concentration drawdowns.
-        If we don't have sector data, it behaves like plain top-N.
+        Daily: compare the maintained ranking's selection with the one last
+        traded. True when enough names changed to rebalance early.
         """
-        max_pos = int(self.profile.max_positions)
-        cap = int(self.profile.max_sector_positions)
-
-        if not ranked:
-            return []
-
-        if not self._sector_by_symbol:
-            return ranked[:max_pos]
-
-        sector_count: dict[str, int] = {}
-        selected: list[str] = []
-
-        for sym in ranked:
-            sec = self._sector_by_symbol.get(sym, "UNKNOWN")
-            if sector_count.get(sec, 0) >= cap:
-                continue
-            selected.append(sym)
-            sector_count[sec] = sector_count.get(sec, 0) + 1
-            if len(selected) >= max_pos:
-                break
-
-        # fallback: if caps too strict, fill remaining without caps
-        if len(selected) < max_pos:
-            for sym in ranked:
-                if sym in selected:
-                    continue
-                selected.append(sym)
-                if len(selected) >= max_pos:
-                    break
-
-        return selected
+        if not self._last_selected:
+            return False
+        rescored, entered = self.signals.watch(self._last_selected, self._sector_by_symbol)
+        self.events.debug("rank_watch", "rescored=%d", len(rescored), rescored=len(rescored))
+        if entered:
+            self.events.info(
+                "rank_drift", "%d changed since last rebalance: in=%s", len(entered), entered[:8],
+                changed=len(entered),
+            )
+        return 0 < self._early_rebalance_changes <= len(entered)
 
     # -------------------------
     # Stops / exits
     # -------------------------
     def _apply_trailing_stops(self):
-        for pos in self.get_positions():
-            sym = getattr(pos.asset, "symbol", None) or str(pos.asset)
-            qty = float(getattr(pos, "quantity", 0) or 0)
-            if qty <= 0:
-                continue
-
-            px = self.get_last_price(self._src_symbol(sym))
-            if px is None or px <= 0:
-                continue
-            px = float(px)
-
-            prev_high = self._highest_close.get(sym, px)
-            if px > prev_high:
-                prev_high = px
-            self._highest_close[sym] = prev_high
-
-            atr = self._atr(sym)
-            if atr is None:
-                continue
-
-            stop = prev_high - self.profile.atr_mult_trail * atr
-            if px <= stop:
-                self.log_message(f"[EXIT] TRAIL {sym} qty={qty:.0f} px={px:.2f} stop={stop:.2f}")
-                self.submit_order(self.create_order(self._src_symbol(sym), abs(qty), "sell"))
-                self._highest_close.pop(sym, None)
+        exits = trailing_exits(
+            self._held(), self._price, self.signals.atr, self._highest_close, self.profile.atr_mult_trail,
+        )
+        for ex in exits:
+            self.events.info(
+                "EXIT", "TRAIL %s qty=%.0f px=%.2f stop=%.2f", ex.symbol, ex.quantity, ex.price, ex.stop,
+                symbol=ex.symbol, price=ex.price, stop=ex.stop, qty=ex.quantity,
+            )
+            self.submit_order(self.create_order(self._src_symbol(ex.symbol), abs(ex.quantity), "sell"))
 
     def _apply_drawdown_breaker(self):
-        pv = float(self.get_portfolio_value())
-        if self._equity_peak is None:
-            self._equity_peak = pv
-            return
-
-        if pv > self._equity_peak:
-            self._equity_peak = pv
+        self._equity_peak, dd = drawdown_breach(
+            self._equity_peak, float(self.get_portfolio_value()), self.profile.max_drawdown,
+        )
+        if dd is None:
             return
 
-        dd = (self._equity_peak - pv) / max(1e-9, self._equity_peak)
-        if dd >= self.profile.max_drawdown:
-            self.log_message(f"[DD] breaker dd={dd:.2%} -> liquidate + cooldown")
-            for pos in self.get_positions():
-                sym = getattr(pos.asset, "symbol", None) or str(pos.asset)
-                qty = float(getattr(pos, "quantity", 0) or 0)
-                if qty != 0:
-                    self.submit_order(self.create_order(self._src_symbol(sym), abs(qty), "sell" if qty > 0 else "buy"))
-                self._highest_close.pop(sym, None)
+        self.events.warning("DD", "breaker dd=%.2f%% -> liquidate + cooldown", dd * 100, drawdown=dd)
+        for sym, qty in self._held().items():
+            self.submit_order(self.create_order(self._src_symbol(sym), abs(qty), "sell" if qty > 0 else "buy"))
+        self._highest_close.clear()
 
-            self._cooldown_until = self.get_datetime().date() + timedelta(days=self.profile.cooldown_days)
+        self._cooldown_until = self._today() + timedelta(days=self.profile.cooldown_days)
 
     # -------------------------
-    # Rebalance: inverse-vol weights + ATR risk sizing
+    # Rebalance
     # -------------------------
     def _rebalance(self, selected: list[str], exposure: float):
         if not selected:
-            self.log_message("[rebalance] none selected -> cash")
+            self.events.info("rebalance", "none selected -> cash")
             return
 
         pv = float(self.get_portfolio_value())
-        exposure = max(0.0, min(1.0, float(exposure)))
-
-        selected_set = set(selected)
-
-        # 1) sell anything not in selected
-        for pos in self.get_positions():
-            sym = getattr(pos.asset, "symbol", None) or str(pos.asset)
-            qty = float(getattr(pos, "quantity", 0) or 0)
-            if qty != 0 and sym not in selected_set:
-                self.submit_order(self.create_order(self._src_symbol(sym), abs(qty), "sell" if qty > 0 else "buy"))
-                self._highest_close.pop(sym, None)
-
-        # 2) build inverse-vol weights
-        vols: dict[str, float] = {}
-        for sym in selected:
-            v = self._realized_vol(sym)
-            if v is not None and v > 0:
-                vols[sym] = v
-
-        if not vols:
-            self.log_message("[rebalance] no vols -> cash")
-            return
-
-        inv = {s: 1.0 / v for s, v in vols.items()}
-        inv_sum = sum(inv.values())
-        weights = {s: inv[s] / inv_sum for s in inv}
-
-        # 3) risk sizing
-        total_risk_dollars = pv * self.profile.total_risk_budget
-        risk_dollars_cap = pv * self.profile.risk_per_entry_cap
-
-        desired_qty: dict[str, int] = {}
-        invested = 0.0
-
-        for sym, w in weights.items():
-            px = self.get_last_price(self._src_symbol(sym))
-            if px is None or px <= 0:
-                continue
-            px = float(px)
-
-            atr = self._atr(sym)
-            if atr is None:
-                continue
-
-            stop_dist = max(0.01, self.profile.atr_mult_trail * float(atr))
-
-            risk_dollars = min(total_risk_dollars * float(w), risk_dollars_cap)
-
-            shares_by_risk = int(risk_dollars // stop_dist)
-            shares_by_capital = int((pv * exposure * float(w)) // px)
+        current = {s: int(q) for s, q in self._held().items() if int(q) != 0}
+        plan = plan_holdings(
+            current, selected, exposure, pv, self.profile,
+            price=self._price, vol=self.signals.realized_vol, atr=self.signals.atr,
+            highest=self._highest_close, min_order_dollars=self.MIN_ORDER_DOLLARS,
+        )
 
-            shares = max(0, min(shares_by_risk, shares_by_capital))
-            if shares <= 0:
-                continue
+        for order in plan.report.orders:
+            self.submit_order(self.create_order(self._src_symbol(order.symbol), order.quantity, order.side))
+        record_fills(plan, current, self._highest_close)
 
-            if shares * px < self.MIN_ORDER_DOLLARS:
-                continue
+        self.rebalance_reports.append((self._today(), plan.report))
 
-            desired_qty[sym] = shares
-            invested += shares * px
+        if not plan.vols:
+            self.events.info("rebalance", "no vols -> cash")
+            return
 
-        if not desired_qty:
-            self.log_message("[rebalance] no targets after sizing -> cash (try raising total_risk_budget or bear_exposure)")
+        if not plan.targets:
+            self.events.info("rebalance", "no targets after sizing -> cash (try raising total_risk_budget or bear_exposure)")
             return
 
-        # 4) submit delta orders
-        for sym, target in desired_qty.items():
-            pos = self.get_position(self._src_symbol(sym))
-            cur = int(float(getattr(pos, "quantity", 0) or 0)) if pos else 0
-            delta = int(target) - int(cur)
-            if delta == 0:
-                continue
-
-            px = self.get_last_price(self._src_symbol(sym))
-            if px is None or px <= 0:
-                continue
-            if abs(delta) * float(px) < self.MIN_ORDER_DOLLARS:
-                continue
-
-            if delta > 0:
-                self.submit_order(self.create_order(self._src_symbol(sym), delta, "buy"))
-                last = float(self.get_last_price(self._src_symbol(sym)) or 0) or 0.0
-                if last > 0:
-                    self._highest_close[sym] = max(self._highest_close.get(sym, last), last)
-            else:
-                self.submit_order(self.create_order(self._src_symbol(sym), abs(delta), "sell"))
-                if (cur + delta) <= 0:
-                    self._highest_close.pop(sym, None)
-
-        self.log_message(
-            f"[rebalance] held={len(desired_qty)} exposure≈{invested/pv:.0%} "
-            f"risk_budget={self.profile.total_risk_budget:.0%} regime_exposure={exposure:.0%}"
+        report = plan.report
+        self.events.info(
+            "rebalance", "held=%d exposure≈%.0f%% risk_budget=%.0f%% regime_exposure=%.0f%% %s",
+            len(plan.targets), plan.invested / pv * 100, self.profile.total_risk_budget * 100,
+            max(0.0, min(1.0, exposure)) * 100, report,
+            exposure=plan.invested / pv, held=len(plan.targets), orders=len(report.orders),
+            orders_avoided=report.orders_avoided, turnover=report.turnover,
         )
 
     # -------------------------
     # Main loop
     # -------------------------
+    def after_market_closes(self):
+        self._schedule_prefetch()
+
+    def on_strategy_end(self):
+        if self._prefetch is not None:
+            self.events.info(
+                "prefetch", "hits=%d misses=%d errors=%d",
+                self._prefetch.hits, self._prefetch.misses, self._prefetch.errors,
+            )
+            self._prefetch.shutdown()
+        if self._signal_cache is not None:
+            self._signal_cache.flush()
+            c = self._signal_cache
+            self.events.info(
+                "signals", "days read=%d computed=%d written=%d", c.loaded, c.created, c.written,
+                loaded=c.loaded, created=c.created, written=c.written,
+            )
+        self.events.close()
+
     def on_trading_iteration(self):
+        today = self._today()
+        self.signals.start_day(today)
+        if self._prefetch is not None:
+            self._prefetch.discard_before(today)
+        if self._signal_cache is not None:
+            # previous days are final: write what they computed
+            self._signal_cache.flush(keep=today)
+
         # exits first
         self._apply_trailing_stops()
         self._apply_drawdown_breaker()
 
         if self._in_cooldown():
-            self.log_message(f"[cooldown] until {self._cooldown_until}")
+            self.events.info("cooldown", "until %s", self._cooldown_until)
             return
 
-        if not self._should_rebalance_today():
+        early = self._watch_ranking() if self.signals.ranker is not None else False
+        if not (self._should_rebalance_today() or early):
             return
+        if early:
+            self.events.info("rebalance", "early: selection drifted since %s", self._last_rebalance_day)
 
-        exposure = self._risk_on_fraction()
-        ranked = self._rank_candidates()
+        exposure = self.signals.exposure(with_breadth=True)
+        ranked, passed_trend = self.signals.ranked()
+        self.events.info("rank", "trend_pass=%d scored=%d", passed_trend, len(ranked), trend_pass=passed_trend, scored=len(ranked))
 
-        selected = self._select_with_sector_caps(ranked)
+        selected = self.signals.selected(ranked, self._sector_by_symbol)
+        self._last_selected = list(selected)
 
-        self.log_message(f"[select] n={len(selected)} exposure={exposure:.0%} first={selected[:8]}")
+        self.events.info("select", "n=%d exposure=%.0f%% first=%s", len(selected), exposure * 100, selected[:8], exposure=exposure)
         self._rebalance(selected, exposure=exposure)
 
-        self._last_rebalance_day = self.get_datetime().date()
+        self._last_rebalance_day = today
@@ -0,0 +1,5 @@
+# tests/conftest.py
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
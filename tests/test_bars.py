@@ -0,0 +1,118 @@
+# tests/test_bars.py
+"""
+Weekly / monthly bars: resample() against pandas, incremental updates against
+a full rebuild, and the rolling digest (no prefix re-hash while appending).
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import core.bars as bars
+from core.bars import BarCache, resample
+from core.factors import PricePanel
+
+
+def _daily(n_days: int = 400, n_symbols: int = 4, seed: int = 2) -> PricePanel:
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2022-01-03", periods=n_days)
+    close = 20.0 * np.exp(np.cumsum(rng.normal(0, 0.02, (n_days, n_symbols)), axis=0))
+    fields = {
+        "open": close * 0.995, "high": close * 1.02, "low": close * 0.98, "close": close,
+        "volume": rng.integers(100, 1000, (n_days, n_symbols)).astype(float),
+    }
+    for f in fields:
+        fields[f][30:45, 1] = np.nan            # a symbol missing half a month
+        fields[f][:60, 2] = np.nan              # one that starts late
+    return PricePanel(dates, tuple(f"S{j}" for j in range(n_symbols)), fields)
+
+
+def _head(daily: PricePanel, n: int) -> PricePanel:
+    return PricePanel(daily.dates[:n], daily.symbols, {f: v[:n] for f, v in daily.fields.items()})
+
+
+def test_monthly_matches_pandas_resample():
+    daily = _daily()
+    out = resample(daily, "M")
+    how = {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+    for j, sym in enumerate(daily.symbols):
+        df = pd.DataFrame({f: v[:, j] for f, v in daily.fields.items()}, index=daily.dates)
+        expected = df.resample("ME").agg(how)
+        expected.loc[df["close"].resample("ME").count() == 0, "volume"] = np.nan
+        for f in how:
+            np.testing.assert_allclose(out.fields[f][:, j], expected[f].to_numpy(), equal_nan=True, err_msg=f"{sym} {f}")
+    # labelled with each month's last trading day
+    assert list(out.dates) == list(pd.Series(daily.dates, index=daily.dates).resample("ME").last())
+
+
+@pytest.mark.parametrize("freq", ["W", "M"])
+def test_incremental_equals_full_rebuild(freq):
+    daily = _daily()
+    cache = BarCache(freq)
+    for n in range(100, len(daily.dates) + 1, 3):
+        cache.update(_head(daily, n), version=str(n))
+        full = resample(_head(daily, n), freq)
+        assert cache.panel.dates.equals(full.dates)
+        for f in full.fields:
+            np.testing.assert_array_equal(cache.panel.fields[f], full.fields[f])
+    assert cache.rebuilt == 1
+
+
+def test_appends_hash_only_new_rows(monkeypatch):
+    daily = _daily()
+    hashed: list[int] = []
+    real = bars._digest
+
+    def counting(panel, start, stop, h=None):
+        hashed.append(stop - start)
+        return real(panel, start, stop, h)
+
+    monkeypatch.setattr(bars, "_digest", counting)
+    cache = BarCache("W")
+    cache.update(_head(daily, 300))
+    hashed.clear()
+    for n in range(301, 311):
+        cache.update(_head(daily, n))
+    assert hashed == [1] * 10
+
+    # the rolling digest equals a one-shot digest over the same rows
+    assert cache.digest == real(_head(daily, 310), 0, 310).hexdigest()
+
+
+def test_changed_history_rebuilds():
+    daily = _daily()
+    cache = BarCache("M")
+    cache.update(_head(daily, 300))
+
+    adjusted = {f: (v / 2.0 if f != "volume" else v * 2.0) for f, v in daily.fields.items()}   # a split
+    cache.update(PricePanel(daily.dates, daily.symbols, adjusted))
+    assert cache.rebuilt == 2
+    np.testing.assert_array_equal(cache.panel.fields["close"], resample(daily, "M").fields["close"] / 2.0)
+
+    # a single corrected row between the sampled ones: only a full check sees it
+    cache = BarCache("M")
+    cache.update(_head(daily, 300))
+    rows = set(cache._probe[0].tolist())
+    row = next(i for i in range(1, 299) if i not in rows)
+    fixed = {f: v.copy() for f, v in daily.fields.items()}
+    fixed["close"][row, 0] *= 1.1
+    cache.update(PricePanel(daily.dates, daily.symbols, fixed), verify="full")
+    assert cache.rebuilt == 2
+
+
+def test_loaded_cache_verifies_in_full(tmp_path):
+    daily = _daily()
+    cache = BarCache("W")
+    cache.update(_head(daily, 300), version="a")
+    cache.save(tmp_path / "bars_W.npz")
+
+    loaded = BarCache.load(tmp_path / "bars_W.npz")
+    fixed = {f: v.copy() for f, v in daily.fields.items()}
+    fixed["close"][150, 3] *= 1.1
+    loaded.update(PricePanel(daily.dates, daily.symbols, fixed), version="b")
+    assert loaded.rebuilt == 1                   # the loaded state carried no probe: full re-hash caught it
+
+    loaded = BarCache.load(tmp_path / "bars_W.npz")
+    loaded.update(daily, version="c")
+    assert loaded.rebuilt == 0 and loaded.appended > 0
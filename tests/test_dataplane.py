@@ -0,0 +1,97 @@
+# tests/test_dataplane.py
+"""
+Shared-memory data plane: publish / attach, republish while readers hold the
+old version, release, and a quiet resource tracker with server + client in one process.
+"""
+from __future__ import annotations
+
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.dataplane import DataPlaneClient, DataPlaneServer, attach
+from core.store import load_store
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _write_symbol(store: Path, sym: str, n_days: int, start: float, sector: str = "Tech"):
+    dates = pd.bdate_range("2024-01-02", periods=n_days)
+    close = start + np.arange(n_days, dtype=float)
+    pd.DataFrame({
+        "Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Volume": 1000.0,
+        "symbol": sym, "company_name": f"{sym} Inc.", "sector": sector, "industry": "X",
+        "date": dates.strftime("%Y-%m-%d"),
+    }).to_csv(store / f"{sym}_data.csv", index=False)
+
+
+@pytest.fixture
+def plane(tmp_path):
+    store = tmp_path / "STOCKS"
+    store.mkdir()
+    _write_symbol(store, "AAA", 30, 10.0)
+    _write_symbol(store, "BBB", 25, 50.0, sector="Energy")
+    server = DataPlaneServer(store_dir=store, runtime_dir=tmp_path / "rt", grace_seconds=0.0)
+    yield store, server
+    server.close()
+
+
+def test_publish_and_attach(plane):
+    store, server = plane
+    version = server.publish()
+    handle = attach(server.runtime_dir)
+    expected, _ = load_store(store)
+
+    assert handle.version == version
+    assert handle.panel.symbols == expected.symbols
+    assert handle.panel.dates.equals(expected.dates)
+    np.testing.assert_array_equal(handle.panel.fields["close"], expected.fields["close"])
+    assert not handle.panel.fields["close"].flags.writeable
+    assert handle.sectors() == {"AAA": "Tech", "BBB": "Energy"}
+
+
+def test_republish_keeps_old_arrays_until_released(plane):
+    store, server = plane
+    server.publish()
+    client = DataPlaneClient(server.runtime_dir, check_every=0.0)
+    old_close = client.panel().fields["close"]
+    old_version, old_segment = client.version(), client.handle().segment
+    snapshot = old_close.copy()
+
+    _write_symbol(store, "AAA", 31, 10.0)
+    new_version = server.publish()
+    server._reap(float("inf"), force=True)          # old block unlinked by the server
+
+    assert new_version != old_version
+    assert client.version() == new_version
+    assert client.panel().fields["close"].shape[0] == 31
+    np.testing.assert_array_equal(old_close, snapshot)   # still mapped while held
+    assert client._retired == [old_segment]
+
+    del old_close
+    client.handle()
+    assert client._retired == []
+
+
+def test_same_process_server_and_client_leave_tracker_quiet(tmp_path):
+    store = tmp_path / "STOCKS"
+    store.mkdir()
+    _write_symbol(store, "AAA", 30, 10.0)
+    script = textwrap.dedent(f"""
+        from pathlib import Path
+        from core.dataplane import DataPlaneClient, DataPlaneServer
+        server = DataPlaneServer(store_dir=Path({str(store)!r}), runtime_dir=Path({str(tmp_path / "rt")!r}))
+        server.publish()
+        client = DataPlaneClient(server.runtime_dir, check_every=0.0)
+        assert client.panel().fields["close"].shape == (30, 1)
+        server.close()
+    """)
+    out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, cwd=ROOT, timeout=60)
+    assert out.returncode == 0, out.stderr
+    assert "KeyError" not in out.stderr
+    assert "leaked" not in out.stderr
@@ -0,0 +1,79 @@
+# tests/test_eventlog.py
+"""
+EventLog: lazy echo, per-run files, failing sinks, Parquet row groups.
+"""
+from __future__ import annotations
+
+import json
+
+import pandas as pd
+import pytest
+
+from core.eventlog import EventLog
+
+
+class _Fmt:
+    # counts renders so a test can tell whether a message was formatted
+    calls = 0
+
+    def __str__(self):
+        _Fmt.calls += 1
+        return "x"
+
+
+def test_echo_defaults_to_warning_and_formats_lazily():
+    echoed: list[str] = []
+    log = EventLog(echo=echoed.append)
+    _Fmt.calls = 0
+    log.info("rank", "n=%s", _Fmt())
+    assert echoed == [] and _Fmt.calls == 0
+    log.warning("DD", "dd=%.1f%%", 12.5)
+    assert echoed == ["[DD] dd=12.5%"]
+
+    off = EventLog(echo=echoed.append, echo_level="OFF")
+    off.error("x", "boom")
+    assert len(echoed) == 1 and len(off.records()) == 1
+
+
+@pytest.mark.parametrize("suffix", ["jsonl", "csv"])
+def test_file_replaced_per_run(tmp_path, suffix):
+    path = tmp_path / f"events.{suffix}"
+    for run in range(2):
+        log = EventLog(path=path, flush_interval=0.01)
+        log.info("select", "n=%d", 3, exposure=0.5, picked=["A", "B"])
+        log.debug("data", symbol="AAPL", price=1.5)
+        log.close()
+    df = EventLog.read(path)
+    assert len(df) == 2
+    assert df["event"].tolist() == ["select", "data"]
+    if suffix == "csv":
+        assert json.loads(df["fields"][0]) == {"picked": ["A", "B"]}
+
+
+def test_failing_sink_is_disabled_not_fatal(tmp_path, capsys):
+    log = EventLog(path=tmp_path / "events.jsonl", flush_interval=0.01)
+
+    def broken(batch):
+        raise OSError("disk full")
+
+    log._write = broken
+    for i in range(100):
+        log.info("e", "i=%d", i)
+    log.close()
+    assert isinstance(log.write_error, OSError)
+    assert "file sink disabled" in capsys.readouterr().err
+    assert len(log.records()) == 100
+    log.info("later")                      # no longer queued for the dead sink
+    assert log._pending.empty()
+
+
+def test_parquet_row_groups(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "events.parquet"
+    log = EventLog(path=path, flush_interval=0.01, row_group_size=10)
+    for i in range(25):
+        log.info("e", "i=%d", i, symbol="AAPL", price=float(i), extra=i)
+    log.close()
+    meta = pq.ParquetFile(path).metadata
+    assert meta.num_rows == 25 and meta.num_row_groups >= 3
+    assert pd.read_parquet(path)["price"].tolist() == [float(i) for i in range(25)]
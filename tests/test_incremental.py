@@ -0,0 +1,142 @@
+# tests/test_incremental.py
+"""
+IncrementalRanker: parity with rank_candidates, subset (contender) updates and
+selection invalidation; DailySignals.watch reading only the contenders.
+"""
+from __future__ import annotations
+
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+
+from core.defaults import TREND_SMA_DAYS, history_needed
+from core.factors import FactorEvaluator, PricePanel
+from core.incremental import IncrementalRanker
+from core.profiles import PROFILES
+from core.ranking import rank_candidates
+from core.signals import DailySignals
+
+NEEDED = history_needed()
+PROFILE = replace(PROFILES["balanced"], max_positions=5, max_sector_positions=5)
+
+
+def _panel(n_symbols: int = 60, n_days: int = 340, seed: int = 5) -> PricePanel:
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2023-01-02", periods=n_days)
+    drift = rng.normal(0.0008, 0.0006, n_symbols)
+    close = 30.0 * np.exp(np.cumsum(rng.normal(drift, 0.015, (n_days, n_symbols)), axis=0))
+    fields = {"open": close, "high": close * 1.01, "low": close * 0.99, "close": close}
+    return PricePanel(dates, tuple(f"S{j:02d}" for j in range(n_symbols)), fields)
+
+
+def _ev(panel: PricePanel, end: int, symbols: list[str] | None = None) -> FactorEvaluator:
+    cols = list(range(len(panel.symbols))) if symbols is None else [panel.symbols.index(s) for s in symbols]
+    fields = {f: v[end - NEEDED:end][:, cols] for f, v in panel.fields.items()}
+    return FactorEvaluator(PricePanel(panel.dates[end - NEEDED:end], tuple(panel.symbols[c] for c in cols), fields))
+
+
+def test_exact_parity_across_days():
+    panel = _panel()
+    ranker = IncrementalRanker(PROFILE, score_tol=0.0)
+    for end in range(NEEDED, len(panel.dates) + 1, 7):
+        ranker.update(_ev(panel, end))
+        ranked, passed = rank_candidates(_ev(panel, end), PROFILE, TREND_SMA_DAYS, NEEDED)
+        assert ranker.ranked() == ranked
+        assert ranker.passed_trend() == passed
+
+
+def test_tolerance_skips_small_moves():
+    panel = _panel()
+    ranker = IncrementalRanker(PROFILE, score_tol=0.01)
+    ranker.update(_ev(panel, NEEDED))
+    changed = ranker.update(_ev(panel, NEEDED + 1))
+    assert 0 < len(changed) < len(panel.symbols)
+    fresh = IncrementalRanker(PROFILE, score_tol=0.0)
+    fresh.update(_ev(panel, NEEDED + 1))
+    for s in panel.symbols:
+        if s not in changed and fresh.score(s) is not None:
+            assert abs(ranker.score(s) - fresh.score(s)) <= len(ranker.weights) * 0.01
+
+
+def test_subset_update_refreshes_only_the_subset():
+    panel = _panel()
+    ranker = IncrementalRanker(PROFILE, score_tol=0.0)
+    ranker.update(_ev(panel, NEEDED))
+    before = {s: ranker.score(s) for s in panel.symbols}
+
+    subset = ranker.contenders()
+    assert len(subset) < len(panel.symbols)
+    ranker.update(_ev(panel, NEEDED + 20, subset))
+
+    full = IncrementalRanker(PROFILE, score_tol=0.0)
+    full.update(_ev(panel, NEEDED + 20))
+    for s in panel.symbols:
+        expected = full.score(s) if s in subset else before[s]
+        assert ranker.score(s) == expected
+
+    # a full evaluator afterwards brings everything level again
+    ranker.update(_ev(panel, NEEDED + 20))
+    assert ranker.ranked() == full.ranked()
+
+
+def test_selection_invalidation():
+    panel = _panel()
+    ranker = IncrementalRanker(PROFILE, score_tol=0.0)
+    ranker.update(_ev(panel, NEEDED))
+    first = ranker.selected({})
+    assert ranker.selected({}) == first
+
+    # a change far below the selection keeps the cached selection
+    tail = ranker.ranked()[-1]
+    scale = np.ones(len(panel.symbols))
+    scale[panel.symbols.index(tail)] = 0.97
+    moved = PricePanel(panel.dates, panel.symbols, {f: v * np.where(np.arange(len(v))[:, None] == NEEDED - 1, scale, 1.0)
+                                                    for f, v in panel.fields.items()})
+    ranker.update(_ev(moved, NEEDED))
+    assert ranker._selection is not None and ranker.selected({}) == first
+
+    # the leader collapsing on the last bar drops it from the selection
+    leader = first[0]
+    scale = np.ones(len(panel.symbols))
+    scale[panel.symbols.index(leader)] = 0.5
+    crashed = PricePanel(panel.dates, panel.symbols, {f: v * np.where(np.arange(len(v))[:, None] == NEEDED - 1, scale, 1.0)
+                                                      for f, v in panel.fields.items()})
+    ranker.update(_ev(crashed, NEEDED))
+    assert leader not in ranker.selected({})
+    assert ranker.selected({}) == rank_candidates(_ev(crashed, NEEDED), PROFILE, TREND_SMA_DAYS, NEEDED)[0][:5]
+
+
+def test_watch_reads_only_contenders():
+    panel = _panel()
+    frames = {
+        s: pd.DataFrame({f: v[:, j] for f, v in panel.fields.items()}, index=panel.dates)
+        for j, s in enumerate(panel.symbols)
+    }
+    days = {d.date(): k for k, d in enumerate(panel.dates)}
+    calls: list[str] = []
+    sig: DailySignals
+
+    def fetch(symbol: str, length: int):
+        calls.append(symbol)
+        end = days[sig.day]
+        return frames[symbol].iloc[max(0, end - length):end]
+
+    sig = DailySignals(list(panel.symbols), PROFILE, fetch=fetch, ranker=IncrementalRanker(PROFILE, score_tol=0.0))
+    sig.start_day(panel.dates[NEEDED].date())
+    ranked, _ = sig.ranked()
+    last_selected = sig.selected(ranked, {})
+    assert len(calls) == len(panel.symbols)
+
+    calls.clear()
+    sig.start_day(panel.dates[NEEDED + 1].date())
+    contenders = sig.ranker.contenders()
+    rescored, entered = sig.watch(last_selected, {})
+    assert sorted(calls) == sorted(contenders) and len(calls) < len(panel.symbols) // 2
+    assert set(rescored) <= set(calls)
+    assert all(s not in last_selected for s in entered)
+
+    # the rebalance day after a watch still ranks the whole universe
+    ranked, _ = sig.ranked()
+    assert len(calls) == len(panel.symbols)
+    assert ranked == rank_candidates(_ev(panel, NEEDED + 1), PROFILE, TREND_SMA_DAYS, NEEDED)[0]
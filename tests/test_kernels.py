@@ -0,0 +1,68 @@
+# tests/test_kernels.py
+"""
+Kernel backends agree with the per-symbol pandas code and with each other.
+"""
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from benchmarks.kernels import ATR_MULT, pandas_reference, run_kernels, synthetic_panel
+from core import kernels
+
+NAMES = ("atr", "rolling_std", "trailing_exits")
+
+
+@pytest.fixture(scope="module")
+def panel():
+    return synthetic_panel(n_symbols=12, n_days=300, seed=3)
+
+
+@pytest.fixture(scope="module")
+def reference(panel):
+    return pandas_reference(*panel)
+
+
+def _check(got, want, rtol=1e-6):
+    for name, g, w in zip(NAMES, got, want):
+        if g.dtype == bool:
+            assert np.array_equal(g, w), name
+        else:
+            np.testing.assert_allclose(g, w, rtol=rtol, atol=1e-10, equal_nan=True, err_msg=name)
+
+
+@pytest.mark.parametrize("backend", ["numpy", "numba"])
+def test_backend_matches_pandas(panel, reference, backend):
+    if backend == "numba" and not kernels.HAVE_NUMBA:
+        pytest.skip("numba not installed")
+    _check(run_kernels(*panel, backend), reference)
+
+
+@pytest.mark.skipif(not kernels.HAVE_NUMBA, reason="numba not installed")
+def test_numba_matches_numpy(panel):
+    _check(run_kernels(*panel, "numba"), run_kernels(*panel, "numpy"), rtol=1e-7)
+
+
+def test_trail_update_matches_trailing_stop(panel):
+    _, _, close, _ = panel
+    c = close[:, 0]
+    a = kernels.atr(panel[0][:, 0], panel[1][:, 0], c, 14, backend="numpy")
+    entry = np.zeros(len(c), dtype=bool)
+    entry[20] = True
+    hwm, stop, exits = kernels.trailing_stop(c, a, ATR_MULT, entry, backend="numpy")
+
+    high = c[20]
+    for t in range(21, len(c)):
+        if np.isnan(c[t]):
+            continue
+        high, s, hit = kernels.trail_update([high], [c[t]], [a[t]], ATR_MULT)
+        high = float(high[0])
+        assert bool(hit[0]) == bool(exits[t])
+        if hit[0]:
+            break
+        np.testing.assert_allclose(s[0], stop[t], equal_nan=True)
+
+
+def test_unknown_backend_raises():
+    with pytest.raises(ValueError):
+        kernels.rolling_mean(np.arange(10.0), 3, backend="cuda")
@@ -0,0 +1,92 @@
+# tests/test_prefetch.py
+"""
+PrefetchScheduler: bounded in-flight queue, instant fetches, cancellation.
+"""
+from __future__ import annotations
+
+from datetime import date
+import threading
+import time
+
+import pytest
+
+from core.prefetch import PrefetchScheduler
+
+DAY = date(2024, 3, 1)
+
+
+def _run(fn, timeout=10.0):
+    # fail instead of hanging the suite if the scheduler deadlocks
+    out = {}
+    t = threading.Thread(target=lambda: out.setdefault("v", fn()), daemon=True)
+    t.start()
+    t.join(timeout)
+    assert not t.is_alive(), "scheduler deadlocked"
+    return out.get("v")
+
+
+def _drain(pf, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while pf.pending() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert pf.pending() == 0
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_instant_fetch_small_in_flight(workers):
+    pf = PrefetchScheduler(fetch=lambda k: k * 2, max_workers=workers, max_in_flight=2)
+    try:
+        assert _run(lambda: pf.schedule(DAY, range(2000))) == 2000
+        _drain(pf)
+        assert all(pf.get(DAY, k, timeout=1.0) == k * 2 for k in range(2000))
+        assert pf.errors == 0 and pf.misses == 0
+    finally:
+        pf.shutdown()
+
+
+def test_in_flight_bound_and_errors():
+    gate = threading.Event()
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def fetch(k):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        gate.wait(5)
+        with lock:
+            running[0] -= 1
+        if k % 5 == 0:
+            raise RuntimeError("boom")
+        return k
+
+    pf = PrefetchScheduler(fetch=fetch, max_workers=8, max_in_flight=3)
+    try:
+        pf.schedule(DAY, range(20))
+        assert pf.pending() == 20
+        assert pf.get(DAY, 7) is None            # not done yet: miss, no wait
+        gate.set()
+        _drain(pf)
+        assert peak[0] <= 3
+        assert pf.errors == 4
+        assert pf.get(DAY, 5, timeout=1.0) is None
+        assert pf.get(DAY, 6, timeout=1.0) == 6
+    finally:
+        pf.shutdown()
+
+
+def test_discard_before_cancels_queued():
+    gate = threading.Event()
+    pf = PrefetchScheduler(fetch=lambda k: gate.wait(5) and k, max_workers=1, max_in_flight=1)
+    try:
+        old, new = date(2024, 2, 29), DAY
+        pf.schedule(old, range(5))
+        pf.schedule(new, ["a", "b"])
+        _run(lambda: pf.discard_before(new))
+        gate.set()
+        _drain(pf)
+        assert pf.get(old, 3) is None
+        assert pf.get(new, "a", timeout=1.0) == "a"
+        assert pf.get(new, "b", timeout=1.0) == "b"
+    finally:
+        pf.shutdown()
@@ -0,0 +1,108 @@
+# tests/test_ranking.py
+"""
+Factor-graph ranking agrees with the per-symbol ranking the strategy used to run.
+"""
+from __future__ import annotations
+
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.defaults import MOM_3M, MOM_6M, MOM_12M, TREND_SMA_DAYS, VOL_LOOKBACK, history_needed
+from core.factors import FactorEvaluator, PricePanel
+from core.profiles import PROFILES
+from core.ranking import rank_candidates
+
+NEEDED = history_needed()
+
+
+def _frames(n_symbols: int = 40, n_days: int = 400, seed: int = 11) -> dict[str, pd.DataFrame]:
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2022-01-03", periods=n_days)
+    frames = {}
+    for j in range(n_symbols):
+        drift = rng.normal(0.0006, 0.0008)
+        close = 40.0 * np.exp(np.cumsum(rng.normal(drift, 0.018, n_days)))
+        spread = np.abs(rng.normal(0.0, 0.01, n_days)) * close
+        frames[f"S{j:02d}"] = pd.DataFrame(
+            {"open": close, "high": close + spread, "low": close - spread, "close": close,
+             "volume": rng.integers(1_000, 10_000, n_days).astype(float)},
+            index=dates,
+        )
+    # the cases where union-date alignment and per-symbol history differ
+    frames["S00"] = frames["S00"].iloc[:-1]                                   # missing final bar
+    frames["S01"] = frames["S01"].drop(frames["S01"].index[-3:-1])            # gap near the end
+    frames["S02"] = frames["S02"].drop(frames["S02"].index[-100:-90])         # gap inside the SMA window
+    frames["S03"] = frames["S03"].iloc[-(NEEDED - 8):]                        # too short a history
+    frames["S04"] = frames["S04"] * 0.05                                      # below min price
+    for s in ("S00", "S01", "S02"):
+        # make sure these three would rank (uptrend), so a mismatch can't hide below the filter
+        frames[s] = frames[s].mul(np.linspace(1.0, 2.0, len(frames[s])), axis=0)
+    return frames
+
+
+def _fetch(df: pd.DataFrame, length: int) -> pd.DataFrame:
+    # what get_historical_prices(length) + dropna() gave the strategy: the symbol's own last bars
+    return df.dropna().iloc[-length:]
+
+
+def _baseline(frames, profile) -> tuple[list[str], int]:
+    """
+    The strategy's per-symbol _rank_candidates before the factor graph.
+    """
+    scored, passed = [], 0
+    for sym, full in frames.items():
+        df = _fetch(full, NEEDED)
+        if len(df) < NEEDED - 5:
+            continue
+        close = df["close"].astype(float)
+        last_close = float(close.iloc[-1])
+        if last_close < profile.min_price:
+            continue
+        sma = close.rolling(TREND_SMA_DAYS).mean().iloc[-1]
+        if math.isnan(float(sma)) or last_close <= float(sma):
+            continue
+        passed += 1
+
+        def mom(lb):
+            if len(close) <= lb or float(close.iloc[-lb]) <= 0:
+                return None
+            return last_close / float(close.iloc[-lb]) - 1.0
+
+        m12, m6, m3 = mom(MOM_12M), mom(MOM_6M), mom(MOM_3M)
+        if m12 is None or m6 is None or m3 is None:
+            continue
+        rets = _fetch(full, max(VOL_LOOKBACK + 10, 120))["close"].pct_change().dropna()
+        vol = float(rets.tail(VOL_LOOKBACK).std() * math.sqrt(252))
+        if len(rets) < 25 or math.isnan(vol) or vol <= 0:
+            continue
+        scored.append((sym, 0.50 * m12 + 0.30 * m6 + 0.20 * m3 - profile.vol_penalty * vol))
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return [s for s, _ in scored], passed
+
+
+@pytest.mark.parametrize("profile", ["balanced", "max_return"])
+def test_graph_ranking_matches_per_symbol(profile):
+    prof = PROFILES.get(profile, PROFILES["balanced"])
+    frames = _frames()
+    ev = FactorEvaluator(PricePanel.from_frames({s: _fetch(df, NEEDED) for s, df in frames.items()}))
+
+    ranked, passed = rank_candidates(ev, prof, TREND_SMA_DAYS, NEEDED)
+    expected, expected_passed = _baseline(frames, prof)
+
+    assert ranked == expected
+    assert passed == expected_passed
+    assert {"S00", "S01", "S02"} <= set(ranked)
+    assert "S03" not in ranked and "S04" not in ranked
+
+
+def test_last_uses_each_symbols_last_bar():
+    frames = _frames(n_symbols=6)
+    ev = FactorEvaluator(PricePanel.from_frames(frames))
+    close = ev.factor("close")
+    col = {s: i for i, s in enumerate(ev.panel.symbols)}
+    assert close[col["S00"]] == pytest.approx(frames["S00"]["close"].iloc[-1])
+    assert close[col["S05"]] == pytest.approx(frames["S05"]["close"].iloc[-1])
+    assert ev.factor("bars")[col["S01"]] == len(frames["S01"])
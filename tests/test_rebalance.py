@@ -0,0 +1,89 @@
+# tests/test_rebalance.py
+"""
+plan_rebalance: no-trade bands against the real trailing stop, turnover budget
+truncation (exits exempt), and the plain trade-every-delta default.
+"""
+from __future__ import annotations
+
+from dataclasses import replace
+
+import pytest
+
+from core.book import plan_holdings, record_fills, trailing_exits
+from core.profiles import PROFILES
+from core.rebalance import plan_rebalance
+
+PV = 100_000.0
+PROFILE = replace(PROFILES["balanced"], atr_mult_trail=3.0, weight_band=0.10, risk_band=0.10, turnover_budget=None)
+
+
+def _plan(current, highest, price=107.0):
+    return plan_holdings(
+        current, ["A"], 1.0, PV, PROFILE,
+        price={"A": price}.get, vol={"A": 0.2}.get, atr={"A": 2.0}.get,
+        highest=highest, min_order_dollars=0.0,
+    )
+
+
+def test_default_trades_every_delta():
+    report = plan_rebalance({"A": 10, "B": 5}, {"A": 12, "C": 3}, {"A": 10.0, "B": 20.0, "C": 30.0},
+                            {"A": 1.0, "B": 1.0, "C": 1.0}, PV)
+    assert [(o.symbol, o.side, o.quantity, o.reason) for o in report.orders] == [
+        ("B", "sell", 5, "exit"), ("C", "buy", 3, "entry"), ("A", "buy", 2, "top_up"),
+    ]
+    assert report.turnover == pytest.approx(100.0 + 90.0 + 20.0)
+    assert not report.skipped_band and not report.skipped_budget
+
+
+def test_band_hysteresis_uses_the_trailing_stop():
+    target = _plan({}, {}).targets["A"]
+    held = {"A": int(target * 0.95)}            # weight drift 5% < weight_band
+
+    # freshly entered at today's price: stop one stop distance below -> inside both bands
+    fresh = {"A": 107.0}
+    report = _plan(held, fresh).report
+    assert report.skipped_band == ["A"] and not report.orders
+
+    # ran to 110 and came back to 107: the trailing stop (110 - 3 * 2 = 104) sits 3 below
+    # the price, half the fresh distance, so risk-at-stop drifted past risk_band
+    highest: dict[str, float] = {}
+    for px in (100.0, 110.0, 107.0):
+        assert trailing_exits(held, {"A": px}.get, {"A": 2.0}.get, highest, PROFILE.atr_mult_trail) == []
+    assert highest == {"A": 110.0}
+    plan = _plan(held, highest)
+    assert [(o.symbol, o.reason) for o in plan.report.orders] == [("A", "top_up")]
+
+    record_fills(plan, held, highest)
+    assert highest == {"A": 110.0}              # a top-up never lowers the anchor
+
+
+def test_exit_when_trailing_stop_hit():
+    highest: dict[str, float] = {}
+    exits = []
+    for px in (100.0, 110.0, 103.5):
+        exits = trailing_exits({"A": 50}, {"A": px}.get, {"A": 2.0}.get, highest, PROFILE.atr_mult_trail)
+    assert [(e.symbol, e.stop) for e in exits] == [("A", 104.0)]
+    assert highest == {}
+
+
+def test_budget_truncates_but_exits_are_exempt():
+    current = {"X": 100, "T": 20}
+    targets = {"T": 10, "E1": 30, "E2": 15, "E3": 10}
+    prices = {"X": 100.0, "T": 100.0, "E1": 100.0, "E2": 100.0, "E3": 100.0}
+    stop_dist = {"X": 5.0, "T": 5.0, "E1": 9.0, "E2": 8.0, "E3": 1.0}   # risk gaps E1 > E2 > E3
+
+    report = plan_rebalance(current, targets, prices, stop_dist, PV, turnover_budget=0.05)
+
+    # exit ($10k, over the $5k budget on its own) still trades and spends nothing;
+    # then trim $1k, E1 $3k, E2 $1.5k would exceed $5k -> skipped, E3 $1k fits
+    assert [(o.symbol, o.reason) for o in report.orders] == [
+        ("X", "exit"), ("T", "trim"), ("E1", "entry"), ("E3", "entry"),
+    ]
+    assert report.skipped_budget == ["E2"]
+    assert report.turnover == pytest.approx(10_000 + 1_000 + 3_000 + 1_000)
+    assert report.turnover_avoided == pytest.approx(1_500)
+
+
+def test_min_order_dollars_skips_small_deltas():
+    report = plan_rebalance({"A": 10}, {"A": 11}, {"A": 50.0}, {"A": 1.0}, PV, min_order_dollars=100.0)
+    assert report.skipped_min_order == ["A"] and not report.orders
@@ -0,0 +1,108 @@
+# tests/test_robustness.py
+"""
+Robustness engine: path generators, the vectorized breaker replay against a
+per-path loop, metrics on a hand-made path, run loading and seeded chunking.
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtests.robustness import (
+    RunData,
+    block_bootstrap,
+    breaker_replay,
+    load_run,
+    path_metrics,
+    reshuffled_trades,
+    simulate,
+)
+
+
+def _reference_breaker(path: np.ndarray, breaker_dd: float, cooldown: int) -> tuple[int, float]:
+    equity = peak = 1.0
+    cool = triggers = cash = 0
+    for r in path:
+        if cool > 0:
+            cash += 1
+            cool -= 1
+            if cool == 0:
+                peak = equity
+            continue
+        equity *= 1.0 + r
+        peak = max(peak, equity)
+        if 1.0 - equity / peak >= breaker_dd:
+            triggers += 1
+            cool = cooldown
+            if cooldown == 0:
+                peak = equity
+    return triggers, cash / len(path)
+
+
+@pytest.mark.parametrize("cooldown", [0, 5])
+def test_breaker_replay_matches_loop(cooldown):
+    rng = np.random.default_rng(4)
+    paths = rng.normal(0.0, 0.03, (50, 300))
+    triggers, cash = breaker_replay(paths, 0.15, cooldown)
+    for k, path in enumerate(paths):
+        t, c = _reference_breaker(path, 0.15, cooldown)
+        assert triggers[k] == t and cash[k] == pytest.approx(c)
+    assert triggers.sum() > 0
+
+
+def test_path_metrics_on_known_path():
+    path = np.array([[0.10, -0.20, 0.05, 0.25, 0.01]])
+    m = path_metrics(path, years=1.0, breaker_dd=0.5)
+    equity = np.cumprod(1 + path[0])
+    assert m["cagr"][0] == pytest.approx(equity[-1] - 1.0)
+    assert m["max_drawdown"][0] == pytest.approx(0.20)
+    assert m["recovery_steps"][0] == 2           # trough at step 1, back above 1.10 at step 3
+    assert m["breaker_triggers"][0] == 0
+
+
+def test_generators():
+    rng = np.random.default_rng(0)
+    returns = np.arange(10, dtype=float)
+    paths = block_bootstrap(returns, 20, 12, 4, rng)
+    assert paths.shape == (20, 12)
+    steps = np.diff(paths[:, :4], axis=1)
+    assert np.all((steps == 1) | (steps == -9))   # consecutive days, wrapping around
+
+    trades = np.array([0.05, -0.02, 0.10, -0.07])
+    shuffled = reshuffled_trades(trades, 30, rng)
+    assert np.allclose(np.prod(1 + shuffled, axis=1), np.prod(1 + trades))
+    assert np.all(np.sort(shuffled, axis=1) == np.sort(trades))
+
+
+def test_simulate_is_seeded_and_worker_independent():
+    run = RunData("x", np.random.default_rng(1).normal(0.0005, 0.01, 500), np.zeros(0), 2.0)
+    a = simulate(run, 0.2, method="block", n_paths=300, seed=7, workers=1, chunk=100)
+    b = simulate(run, 0.2, method="block", n_paths=300, seed=7, workers=2, chunk=100)
+    assert a.keys() == b.keys()
+    for k in a:
+        np.testing.assert_array_equal(a[k], b[k])
+    assert len(a["max_drawdown"]) == 300
+    assert simulate(run, 0.2, method="trades", n_paths=10) == {}     # no trades: nothing to reshuffle
+
+
+def test_load_run(tmp_path):
+    times = pd.to_datetime([
+        "2024-01-02 14:30", "2024-01-02 20:00", "2024-01-03 20:00", "2024-01-04 20:00",
+    ], utc=True)
+    pd.DataFrame({"datetime": times, "portfolio_value": [100.0, 100.0, 110.0, 99.0]}).to_csv(
+        tmp_path / "run_stats.csv", index=False)
+    pd.DataFrame({
+        "time": pd.to_datetime(["2024-01-02 15:00", "2024-01-02 16:00", "2024-01-03 15:00", "2024-01-04 15:00"], utc=True),
+        "status": ["fill", "fill", "fill", "canceled"],
+        "side": ["buy", "buy", "sell", "sell"],
+        "symbol": ["A", "A", "A", "A"],
+        "filled_quantity": [1, 1, 2, 1],
+        "price": [10.0, 20.0, 25.0, 30.0],
+    }).to_csv(tmp_path / "run_trades.csv", index=False)
+
+    run = load_run(tmp_path / "run_stats.csv")
+    assert run.name == "run"
+    np.testing.assert_allclose(run.daily_returns, [0.10, -0.10])
+    # sold 2 at 25 against an average cost of 15, at portfolio value 100 (last snapshot before the fill)
+    np.testing.assert_allclose(run.trade_returns, [20.0 / 100.0])
@@ -0,0 +1,50 @@
+# tests/test_sharded.py
+"""
+Shard planning lands every boundary on an NYSE session.
+"""
+from __future__ import annotations
+
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from backtests.sharded import plan_shards, rebalance_schedule, trading_days
+from core.sessions import next_session
+
+# NYSE full-day closures 2020-2024 (exchange holiday schedule)
+NYSE_HOLIDAYS = pd.to_datetime([
+    "2020-01-01", "2020-01-20", "2020-02-17", "2020-04-10", "2020-05-25", "2020-07-03",
+    "2020-09-07", "2020-11-26", "2020-12-25",
+    "2021-01-01", "2021-01-18", "2021-02-15", "2021-04-02", "2021-05-31", "2021-07-05",
+    "2021-09-06", "2021-11-25", "2021-12-24",
+    "2022-01-17", "2022-02-21", "2022-04-15", "2022-05-30", "2022-06-20", "2022-07-04",
+    "2022-09-05", "2022-11-24", "2022-12-26",
+    "2023-01-02", "2023-01-16", "2023-02-20", "2023-04-07", "2023-05-29", "2023-06-19",
+    "2023-07-04", "2023-09-04", "2023-11-23", "2023-12-25",
+    "2024-01-01", "2024-01-15", "2024-02-19", "2024-03-29", "2024-05-27", "2024-06-19",
+    "2024-07-04", "2024-09-02", "2024-11-28", "2024-12-25",
+])
+START, END = "2020-01-01", "2024-12-31"
+
+
+def test_trading_days_match_nyse():
+    expected = pd.bdate_range(START, END).difference(NYSE_HOLIDAYS)
+    assert trading_days(START, END).equals(expected)
+    # Columbus / Veterans Day are sessions; Good Friday is not
+    assert next_session(date(2023, 10, 6)) == date(2023, 10, 9)
+    assert next_session(date(2023, 4, 6)) == date(2023, 4, 10)
+
+
+@pytest.mark.parametrize("n", [4, 8, 39, 40, 41, 44, 45, 51, 64])
+def test_shard_boundaries_are_sessions(n):
+    days = list(pd.bdate_range(START, END).difference(NYSE_HOLIDAYS).date)
+    sessions = set(days)
+    shards = plan_shards("2020-02-02", "2024-12-31", n, rebalance_every_days=21)
+    schedule = set(rebalance_schedule(trading_days("2020-02-02", "2024-12-31"), 21))
+    for prev, s in zip(shards, shards[1:]):
+        assert days[days.index(prev.end) + 1] == s.start
+    for s in shards:
+        assert {s.start, s.end, s.run_start, s.run_end} <= sessions
+        if s.index:
+            assert s.run_start in schedule
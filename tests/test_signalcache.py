@@ -0,0 +1,106 @@
+# tests/test_signalcache.py
+"""
+SignalCache: a later run reads a day's factors, indicators and regime back
+instead of recomputing them; keys separate data versions, parameters and
+factor definitions.
+"""
+from __future__ import annotations
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.factors import CLOSE, FactorEvaluator, PricePanel, last, rolling_mean
+from core.profiles import PROFILES
+from core.signalcache import CachedEvaluator, SignalCache
+from core.signals import DailySignals
+
+DAY = date(2024, 6, 3)
+
+
+def _frames(n_symbols: int = 8, n_days: int = 320) -> dict[str, pd.DataFrame]:
+    rng = np.random.default_rng(9)
+    dates = pd.bdate_range("2023-04-03", periods=n_days)
+    frames = {}
+    for sym in ["SPY"] + [f"S{j}" for j in range(n_symbols)]:
+        close = 40.0 * np.exp(np.cumsum(rng.normal(0.001, 0.015, n_days)))
+        frames[sym] = pd.DataFrame({"open": close, "high": close * 1.01, "low": close * 0.99, "close": close}, index=dates)
+    return frames
+
+
+def _signals(frames, cache: SignalCache, fetch=None) -> DailySignals:
+    universe = [s for s in frames if s != "SPY"]
+    fetch = fetch or (lambda sym, length: frames[sym].iloc[-length:] if sym in frames else None)
+    sig = DailySignals(universe, PROFILES["balanced"], fetch=fetch, cache=cache, cache_version="v1")
+    sig.start_day(DAY)
+    return sig
+
+
+def test_second_run_reads_everything_back(tmp_path):
+    frames = _frames()
+    universe = [s for s in frames if s != "SPY"]
+
+    first = _signals(frames, SignalCache(universe, {"needed": 282}, directory=tmp_path))
+    ranked = first.ranked()
+    bull, atr, vol = first.spy_bull(), first.atr("S0"), first.realized_vol("S0")
+    first.cache.flush()
+    assert first.cache.written == 1
+
+    def unreachable(sym, length):
+        raise AssertionError(f"fetched {sym}")
+
+    second = _signals(frames, SignalCache(universe, {"needed": 282}, directory=tmp_path), fetch=unreachable)
+    assert second.ranked() == ranked
+    assert (second.spy_bull(), second.atr("S0"), second.realized_vol("S0")) == (bull, atr, vol)
+    assert second.cache.loaded == 1 and second.cache.created == 0
+    assert second.factors().misses == 0
+
+
+def test_keys_separate_version_params_and_universe(tmp_path):
+    cache = SignalCache(["A", "B"], {"needed": 282}, directory=tmp_path)
+    cache.day(DAY, "v1").put_scalar("spy_bull", 1.0)
+    cache.flush()
+
+    assert cache.day(DAY, "v1").scalar("spy_bull") == (True, 1.0)
+    assert cache.day(DAY, "v2").scalar("spy_bull") == (False, None)
+    other = SignalCache(["A", "B"], {"needed": 300}, directory=tmp_path)
+    assert other.day(DAY, "v1").scalar("spy_bull") == (False, None)
+    assert SignalCache(["A", "C"], {"needed": 282}, directory=tmp_path).key != cache.key
+
+
+def test_unavailable_values_are_remembered(tmp_path):
+    cache = SignalCache(["A", "B"], directory=tmp_path)
+    day = cache.day(DAY, "v1")
+    day.put_indicator("atr_14_80", "A", None)
+    day.put_scalar("spy_bull", None)
+    cache.flush()
+
+    day = SignalCache(["A", "B"], directory=tmp_path).day(DAY, "v1")
+    assert day.indicator("atr_14_80", "A") == (True, None)        # computed, no value
+    assert day.indicator("atr_14_80", "B") == (False, None)       # never computed
+    assert day.scalar("spy_bull") == (True, None)
+
+
+def test_nodes_keyed_by_structure(tmp_path):
+    frames = _frames(n_symbols=3)
+    panel = PricePanel.from_frames(frames)
+    cache = SignalCache(list(panel.symbols), directory=tmp_path)
+    builds = []
+
+    def build():
+        builds.append(1)
+        return FactorEvaluator(panel)
+
+    ev = CachedEvaluator(cache.day(DAY, "v1"), build)
+    sma50 = ev.eval(last(rolling_mean(CLOSE, 50)))
+    cache.flush()
+
+    ev = CachedEvaluator(SignalCache(list(panel.symbols), directory=tmp_path).day(DAY, "v1"), build)
+    np.testing.assert_array_equal(ev.eval(last(rolling_mean(CLOSE, 50))), sma50)
+    assert len(builds) == 1
+    sma60 = ev.eval(last(rolling_mean(CLOSE, 60)))                 # a different node: computed
+    assert len(builds) == 2
+    assert not np.array_equal(sma60, sma50)
+    assert ev.factor("close") == pytest.approx(FactorEvaluator(panel).factor("close"))
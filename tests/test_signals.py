@@ -0,0 +1,104 @@
+# tests/test_signals.py
+"""
+DailySignals (the strategy's signal glue) and core.book holdings decisions, without Lumibot.
+"""
+from __future__ import annotations
+
+import subprocess
+import sys
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.book import drawdown_breach, trailing_exits
+from core.defaults import TREND_SMA_DAYS, history_needed
+from core.factors import FactorEvaluator, PricePanel
+from core.profiles import PROFILES
+from core.ranking import rank_candidates
+from core.signals import DailySignals
+
+NEEDED = history_needed()
+
+
+def _frames(n_symbols: int = 12, n_days: int = 320, seed: int = 3) -> dict[str, pd.DataFrame]:
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2023-01-02", periods=n_days)
+    frames = {}
+    for j, sym in enumerate(["SPY"] + [f"S{j:02d}" for j in range(n_symbols)]):
+        close = 50.0 * np.exp(np.cumsum(rng.normal(0.0008, 0.015, n_days)))
+        frames[sym] = pd.DataFrame(
+            {"open": close, "high": close * 1.01, "low": close * 0.99, "close": close}, index=dates,
+        )
+    return frames
+
+
+class _Source:
+    def __init__(self, frames):
+        self.frames = frames
+        self.calls: list[tuple[str, int]] = []
+
+    def __call__(self, symbol: str, length: int):
+        self.calls.append((symbol, length))
+        df = self.frames.get(symbol)
+        return None if df is None else df.iloc[-length:]
+
+
+def test_ranking_and_history_cache():
+    frames = _frames()
+    profile = PROFILES["balanced"]
+    src = _Source(frames)
+    universe = [s for s in frames if s != "SPY"]
+    sig = DailySignals(universe, profile, fetch=src)
+    sig.start_day(date(2024, 3, 1))
+
+    ranked, passed = sig.ranked()
+    ev = FactorEvaluator(PricePanel.from_frames({s: frames[s].iloc[-NEEDED:] for s in universe}))
+    assert (ranked, passed) == rank_candidates(ev, profile, TREND_SMA_DAYS, NEEDED)
+
+    n = len(src.calls)
+    sig.ranked()
+    sig.breadth()
+    assert len(src.calls) == n                     # one evaluator per day
+    assert sig.atr("S00") == sig.atr("S00")
+    assert sig.spy_bull() is not None
+    assert 0.0 <= sig.exposure(with_breadth=True) <= 1.0
+    assert len(src.calls) == len(set(src.calls))    # each (symbol, length) fetched once a day
+
+    sig.start_day(date(2024, 3, 4))
+    sig.ranked()
+    assert len(src.calls) > len(set(src.calls))     # new day, fresh fetches
+
+
+def test_optional_modules_stay_unloaded():
+    # signals + book must not pull in the feature-gated modules (fresh interpreter)
+    code = (
+        "import sys, core.signals, core.book, core.indicators\n"
+        "gated = ['core.kernels', 'core.signalcache', 'core.incremental', 'core.dataplane',"
+        " 'core.prefetch', 'core.eventlog', 'core.bars', 'numba']\n"
+        "print(','.join(m for m in gated if m in sys.modules))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         cwd=Path(__file__).resolve().parents[1])
+    assert out.stdout.strip() == ""
+
+
+def test_trailing_exits_ratchet_and_drop_anchor():
+    highest = {"A": 100.0, "B": 50.0}
+    prices = {"A": 104.0, "B": 44.0, "C": 10.0}
+    atrs = {"A": 2.0, "B": 2.0, "C": None}
+    exits = trailing_exits({"A": 10, "B": 5, "C": 3, "D": -2}, prices.get, atrs.get, highest, 3.0)
+
+    assert [e.symbol for e in exits] == ["B"]
+    assert exits[0].stop == pytest.approx(44.0)
+    assert highest == {"A": 104.0, "C": 10.0}
+
+
+def test_drawdown_breach():
+    assert drawdown_breach(None, 100.0, 0.1) == (100.0, None)
+    assert drawdown_breach(100.0, 120.0, 0.1) == (120.0, None)
+    assert drawdown_breach(120.0, 110.0, 0.1) == (120.0, None)
+    peak, dd = drawdown_breach(120.0, 100.0, 0.1)
+    assert peak == 120.0 and dd == pytest.approx(1 / 6)
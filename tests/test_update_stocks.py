@@ -0,0 +1,153 @@
+# tests/test_update_stocks.py
+"""
+Backfill against a local stand-in for the aggregates / ticker-details API.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from zoneinfo import ZoneInfo
+import json
+import threading
+
+import pandas as pd
+import pytest
+
+import update_stocks
+
+NY = ZoneInfo("America/New_York")
+PAGE = 7
+DETAILS = {
+    "NEWCO": {"name": "NewCo Software Inc.", "sic_code": "7372", "sic_description": "SERVICES-PREPACKAGED SOFTWARE"},
+}
+
+
+def _bars(start: str, end: str) -> list[dict]:
+    out = []
+    for i, d in enumerate(pd.bdate_range(start, end)):
+        t = int(datetime(d.year, d.month, d.day, tzinfo=NY).timestamp() * 1000)
+        px = 100.0 + i
+        out.append({"t": t, "o": px, "h": px + 1, "l": px - 1, "c": px + 0.5, "v": 1000 + i})
+    return out
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _send(self, payload: dict, status: int = 200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        self.server.requests.append((url.path, query))
+        if "apiKey" not in query:
+            return self._send({"status": "ERROR"}, 401)
+
+        parts = url.path.strip("/").split("/")
+        if parts[:3] == ["v3", "reference", "tickers"]:
+            details = DETAILS.get(parts[3])
+            return self._send({"results": details} if details else {"status": "NOT_FOUND"}, 200 if details else 404)
+
+        # /v2/aggs/ticker/<T>/range/1/day/<start>/<end>
+        if parts[:3] == ["v2", "aggs", "ticker"]:
+            bars = _bars(parts[7], parts[8])
+            offset = int(query.get("cursor", 0))
+            payload = {"results": bars[offset:offset + PAGE]}
+            if offset + PAGE < len(bars):
+                host, port = self.server.server_address
+                payload["next_url"] = f"http://{host}:{port}{url.path}?cursor={offset + PAGE}"
+            return self._send(payload)
+        self._send({"status": "NOT_FOUND"}, 404)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.requests = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    host, port = httpd.server_address
+    monkeypatch.setattr(update_stocks, "API_BASE_URL", f"http://{host}:{port}")
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _write_store(path, dates, sectors, close=1.0):
+    rows = [{
+        "Open": close, "High": close, "Low": close, "Close": close, "Volume": 1,
+        "Dividends": 0.0, "Stock Splits": 0.0, "symbol": "AAPL", "company_name": "Apple Inc.",
+        "sector": sector, "industry": "Technology Hardware" if sector == "Information Technology" else "Consumer Electronics",
+        "date": d,
+    } for d, sector in zip(dates, sectors)]
+    pd.DataFrame(rows, columns=update_stocks.STORE_COLUMNS).to_csv(path, index=False)
+
+
+def test_fetch_follows_next_url(server):
+    aggs = update_stocks.fetch_aggs_columnar("AAPL", date(2024, 1, 1), date(2024, 1, 31))
+    n = len(pd.bdate_range("2024-01-01", "2024-01-31"))
+    assert len(aggs) == n
+    assert aggs["t"].is_monotonic_increasing
+    pages = [q for p, q in server.requests if p.startswith("/v2/aggs")]
+    assert len(pages) == -(-n // PAGE)
+    assert all("apiKey" in q for q in pages)
+
+
+def test_backfill_merge_keeps_existing_rows_and_first_row_taxonomy(server, tmp_path):
+    path = tmp_path / "AAPL_data.csv"
+    dates = ["2024-01-15", "2024-01-16", "2024-01-17"]
+    _write_store(path, dates, ["Information Technology", "Technology", "Technology"], close=1.0)
+
+    added = update_stocks.backfill_ticker("AAPL", date(2024, 1, 2), date(2024, 1, 31), tmp_path)
+    out = pd.read_csv(path)
+    assert added == len(out) - len(dates)
+    assert out["date"].is_monotonic_increasing and out["date"].is_unique
+
+    # existing rows win on overlapping dates
+    kept = out[out["date"].isin(dates)]
+    assert (kept["Close"] == 1.0).all()
+    assert kept["sector"].tolist() == ["Information Technology", "Technology", "Technology"]
+
+    # older rows take the first row's metadata (what load_sector_map reads), newer ones the last row's
+    assert out.iloc[0]["date"] == "2024-01-02"
+    assert out.iloc[0]["Close"] != 1.0
+    older = out[out["date"] < dates[0]]
+    newer = out[out["date"] > dates[-1]]
+    assert (older["sector"] == "Information Technology").all()
+    assert (older["industry"] == "Technology Hardware").all()
+    assert (newer["sector"] == "Technology").all()
+    assert not newer.empty
+
+
+def test_backfill_new_ticker_metadata(server, tmp_path):
+    update_stocks.backfill_ticker("NEWCO", date(2024, 1, 2), date(2024, 1, 12), tmp_path)
+    out = pd.read_csv(tmp_path / "NEWCO_data.csv")
+    assert len(out) == len(pd.bdate_range("2024-01-02", "2024-01-12"))
+    first = out.iloc[0]
+    assert first["company_name"] == "NewCo Software Inc."
+    assert first["industry"] == "SERVICES-PREPACKAGED SOFTWARE"
+    assert first["sector"] == "Information Technology"
+
+    update_stocks.backfill_ticker("OTHER", date(2024, 1, 2), date(2024, 1, 5), tmp_path,
+                                  overrides={"sector": "Energy"})
+    assert (pd.read_csv(tmp_path / "OTHER_data.csv")["sector"] == "Energy").all()
+
+
+def test_sectors_file_and_sic_map(tmp_path):
+    f = tmp_path / "sectors.csv"
+    f.write_text("symbol,sector,industry\nnewco,Utilities,Electric\nOTHER,Energy\n")
+    assert update_stocks.load_sectors_file(f) == {
+        "NEWCO": {"sector": "Utilities", "industry": "Electric"},
+        "OTHER": {"sector": "Energy"},
+    }
+    assert update_stocks.sector_from_sic("2834") == "Health Care"
+    assert update_stocks.sector_from_sic(6798) == "Real Estate"
+    assert update_stocks.sector_from_sic(None) == ""
@@ -2,6 +2,16 @@
 Script to update all stock data CSV files using the Polygon/Massive API.
 This script reads existing CSV files, finds the latest date, and fetches
 new data from that date to today using the REST API directly.
+
+Backfill mode adds new tickers or extends history over a date range:
+    python update_stocks.py --backfill AAPL MSFT NEW --start 2000-01-01 [--end 2020-10-23]
+    python update_stocks.py --backfill --tickers-file tickers.txt --start 1995-01-01
+    python update_stocks.py --backfill NEW --start 2015-01-01 --sectors-file sectors.csv
+Backfilled rows keep the file's sector taxonomy: rows older than the file's
+first row copy its metadata (that row is what the strategy's sector map reads),
+other new rows copy the last row's. New tickers get their sector from
+--sectors-file (symbol,sector[,industry]) or, failing that, from their SIC code.
+POLYGON_BASE_URL points both modes at another server (e.g. a local stand-in).
 """
 
 import os
@@ -21,10 +31,38 @@ if user_site and os.path.exists(user_site):
 import pandas as pd
 
 # API Configuration
-API_KEY = "ddC9N3ABVTcKX5pITlCGGMDBNi1Las8v"
-API_BASE_URL = "https://api.polygon.io"
+API_KEY = os.environ.get("POLYGON_API_KEY", "ddC9N3ABVTcKX5pITlCGGMDBNi1Las8v")
+API_BASE_URL = os.environ.get("POLYGON_BASE_URL", "https://api.polygon.io").rstrip("/")
 STOCKS_DIR = "data/STOCKS"
 
+# Store CSV layout (data/STOCKS/<SYMBOL>_data.csv)
+STORE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume', 'Dividends', 'Stock Splits',
+                 'symbol', 'company_name', 'sector', 'industry', 'date']
+AGG_COLUMNS = ['t', 'o', 'h', 'l', 'c', 'v']
+META_KEYS = ('symbol', 'company_name', 'sector', 'industry')
+
+# Coarse SIC code -> GICS sector (the store's taxonomy) for new tickers; the
+# details endpoint has no sector. First matching range wins.
+SIC_SECTORS = [
+    (2830, 2836, 'Health Care'), (3840, 3851, 'Health Care'), (8000, 8099, 'Health Care'),
+    (3570, 3579, 'Information Technology'), (3660, 3699, 'Information Technology'),
+    (3820, 3829, 'Information Technology'), (7370, 7379, 'Information Technology'),
+    (2710, 2741, 'Communication Services'), (4800, 4899, 'Communication Services'),
+    (7810, 7819, 'Communication Services'),
+    (4950, 4959, 'Industrials'), (4900, 4999, 'Utilities'),
+    (6500, 6599, 'Real Estate'), (6798, 6798, 'Real Estate'), (6000, 6799, 'Financials'),
+    (1300, 1399, 'Energy'), (2900, 2999, 'Energy'),
+    (100, 999, 'Consumer Staples'), (2000, 2199, 'Consumer Staples'), (2840, 2844, 'Consumer Staples'),
+    (5400, 5499, 'Consumer Staples'),
+    (1000, 1499, 'Materials'), (2400, 2499, 'Materials'), (2600, 2699, 'Materials'),
+    (2800, 2899, 'Materials'), (3300, 3399, 'Materials'),
+    (2300, 2399, 'Consumer Discretionary'), (2500, 2599, 'Consumer Discretionary'),
+    (3710, 3716, 'Consumer Discretionary'), (3940, 3949, 'Consumer Discretionary'),
+    (5200, 5999, 'Consumer Discretionary'), (7000, 7099, 'Consumer Discretionary'),
+    (1500, 1799, 'Industrials'), (3400, 3799, 'Industrials'), (4000, 4799, 'Industrials'),
+    (5000, 5199, 'Industrials'), (7300, 7399, 'Industrials'), (8700, 8799, 'Industrials'),
+]
+
 def get_latest_date_from_csv(file_path):
     """Read the CSV and return the latest date and metadata."""
     try:
@@ -130,6 +168,206 @@ def format_data_for_csv(aggs, metadata):
     
     return formatted_rows
 
+# -------------------------
+# Backfill (columnar)
+# -------------------------
+def api_ticker(symbol):
+    """Store symbols use Yahoo-style class shares (BRK-B); the API wants BRK.B."""
+    return symbol.replace('-', '.')
+
+def _get_json(session, url, params, retries=3, backoff=12):
+    """GET with a few retries on rate limiting (HTTP 429)."""
+    for attempt in range(retries + 1):
+        response = session.get(url, params=params, timeout=30)
+        if response.status_code == 429 and attempt < retries:
+            time.sleep(backoff)
+            continue
+        response.raise_for_status()
+        return response.json()
+
+def fetch_aggs_columnar(ticker, start_date, end_date, session=None, pause=0.0, limit=50000):
+    """
+    Daily aggregates for a date range as one columnar frame (t, o, h, l, c, v),
+    following the API's next_url cursor across pages.
+    """
+    session = session or requests.Session()
+    url = f"{API_BASE_URL}/v2/aggs/ticker/{ticker}/range/1/day/{start_date:%Y-%m-%d}/{end_date:%Y-%m-%d}"
+    params = {'apiKey': API_KEY, 'adjusted': 'true', 'sort': 'asc', 'limit': limit}
+
+    pages = []
+    while url:
+        data = _get_json(session, url, params)
+        results = data.get('results') or []
+        if results:
+            pages.append(pd.DataFrame.from_records(results, columns=AGG_COLUMNS))
+        url = data.get('next_url')
+        # the cursor URL already carries the query; only the key has to be re-sent
+        params = {'apiKey': API_KEY}
+        if url and pause:
+            time.sleep(pause)
+
+    if not pages:
+        return pd.DataFrame(columns=AGG_COLUMNS)
+    return pd.concat(pages, ignore_index=True)
+
+def frame_from_aggs(aggs, metadata):
+    """Columnar aggregates -> store rows (session dates in New York time)."""
+    dates = (pd.to_datetime(aggs['t'].astype('int64'), unit='ms', utc=True)
+             .dt.tz_convert('America/New_York').dt.strftime('%Y-%m-%d'))
+    df = pd.DataFrame({
+        'Open': aggs['o'].astype(float).to_numpy(),
+        'High': aggs['h'].astype(float).to_numpy(),
+        'Low': aggs['l'].astype(float).to_numpy(),
+        'Close': aggs['c'].astype(float).to_numpy(),
+        'Volume': aggs['v'].astype(float).fillna(0).astype('int64').to_numpy(),
+        'Dividends': 0.0,  # Polygon aggregates don't include dividends
+        'Stock Splits': 0.0,  # Polygon aggregates don't include splits
+        'symbol': metadata['symbol'],
+        'company_name': metadata.get('company_name', ''),
+        'sector': metadata.get('sector', ''),
+        'industry': metadata.get('industry', ''),
+        'date': dates.to_numpy(),
+    }, columns=STORE_COLUMNS)
+    return df.drop_duplicates(subset=['date'], keep='last')
+
+def sector_from_sic(sic_code):
+    """GICS sector name for a SIC code ('' if unknown)."""
+    try:
+        code = int(str(sic_code).strip())
+    except (TypeError, ValueError):
+        return ''
+    for lo, hi, sector in SIC_SECTORS:
+        if lo <= code <= hi:
+            return sector
+    return ''
+
+def load_sectors_file(path):
+    """symbol,sector[,industry] CSV (header optional) -> {SYMBOL: {'sector':..., 'industry':...}}."""
+    out = {}
+    with open(path, newline='') as fh:
+        for row in csv.reader(fh):
+            if len(row) < 2 or not row[0].strip() or row[0].strip().lower() == 'symbol':
+                continue
+            entry = {'sector': row[1].strip()}
+            if len(row) > 2 and row[2].strip():
+                entry['industry'] = row[2].strip()
+            out[row[0].strip().upper()] = entry
+    return out
+
+def fetch_ticker_metadata(symbol, session=None):
+    """Company name / industry from the ticker details endpoint; sector from its SIC code."""
+    session = session or requests.Session()
+    metadata = {'symbol': symbol, 'company_name': '', 'sector': '', 'industry': ''}
+    try:
+        data = _get_json(session, f"{API_BASE_URL}/v3/reference/tickers/{api_ticker(symbol)}", {'apiKey': API_KEY})
+        results = data.get('results') or {}
+        metadata['company_name'] = results.get('name', '') or ''
+        metadata['industry'] = results.get('sic_description', '') or ''
+        metadata['sector'] = sector_from_sic(results.get('sic_code'))
+    except requests.exceptions.RequestException as e:
+        print(f"  Could not fetch metadata for {symbol}: {e}")
+    return metadata
+
+def _row_metadata(row, symbol):
+    metadata = {k: ('' if pd.isna(row.get(k, '')) else row.get(k, '')) for k in META_KEYS}
+    metadata['symbol'] = symbol
+    return metadata
+
+def backfill_ticker(symbol, start_date, end_date, stocks_dir=STOCKS_DIR, session=None, pause=0.0, overrides=None):
+    """
+    Fetch [start_date, end_date] for one symbol and merge it into its store CSV
+    (created if missing). Existing rows win on overlapping dates. Returns rows added.
+    Rows older than the file's first row get that row's metadata, other new rows
+    the last row's. `overrides` ({'sector':..., 'industry':...}) applies to new tickers.
+    """
+    session = session or requests.Session()
+    path = Path(stocks_dir) / f"{symbol}_data.csv"
+
+    existing = pd.read_csv(path) if path.exists() else None
+    has_rows = existing is not None and not existing.empty
+    if has_rows:
+        metadata = _row_metadata(existing.iloc[-1], symbol)
+    else:
+        metadata = fetch_ticker_metadata(symbol, session)
+        metadata.update(overrides or {})
+        if not metadata['sector']:
+            print(f"  {symbol}: no sector (pass --sectors-file); it will count as UNKNOWN for sector caps")
+
+    aggs = fetch_aggs_columnar(api_ticker(symbol), start_date, end_date, session=session, pause=pause)
+    new = frame_from_aggs(aggs, metadata)
+    if new.empty:
+        return 0
+
+    if has_rows:
+        # keep the first row's taxonomy on rows that become the new head of the file
+        first_meta = _row_metadata(existing.iloc[0], symbol)
+        older = new['date'] < str(existing['date'].astype(str).min())
+        for k in ('company_name', 'sector', 'industry'):
+            new.loc[older, k] = first_meta[k]
+
+        known = set(existing['date'].astype(str))
+        new = new[~new['date'].isin(known)]
+        if new.empty:
+            return 0
+        combined = pd.concat([existing, new], ignore_index=True)
+    else:
+        combined = new
+    combined = combined.sort_values('date', kind='stable').reset_index(drop=True)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.csv.tmp')
+    combined.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+    return len(new)
+
+def backfill_main(argv):
+    """CLI for --backfill: ticker list + date range -> store CSVs."""
+    import argparse
+
+    ap = argparse.ArgumentParser(prog='update_stocks.py --backfill',
+                                 description='Backfill daily history for new or existing tickers.')
+    ap.add_argument('tickers', nargs='*', help='store symbols (BRK-B style)')
+    ap.add_argument('--tickers-file', help='file with one symbol per line (or comma separated)')
+    ap.add_argument('--start', required=True, help='YYYY-MM-DD')
+    ap.add_argument('--end', default=None, help='YYYY-MM-DD (default today)')
+    ap.add_argument('--sectors-file', help='symbol,sector[,industry] CSV for new tickers (default: from SIC code)')
+    ap.add_argument('--stocks-dir', default=STOCKS_DIR)
+    ap.add_argument('--pause', type=float, default=12.0,
+                    help='seconds between API requests (free tier: 5 per minute)')
+    args = ap.parse_args(argv)
+
+    tickers = [t for arg in args.tickers for t in arg.split(',')]
+    if args.tickers_file:
+        text = Path(args.tickers_file).read_text()
+        tickers += text.replace(',', '\n').split()
+    tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t.strip()))
+    if not tickers:
+        ap.error('no tickers given')
+    overrides = load_sectors_file(args.sectors_file) if args.sectors_file else {}
+
+    start_date = datetime.strptime(args.start, '%Y-%m-%d')
+    end_date = datetime.strptime(args.end, '%Y-%m-%d') if args.end else datetime.now()
+    print(f"Backfilling {len(tickers)} tickers {start_date.date()} -> {end_date.date()} into {args.stocks_dir}")
+
+    session = requests.Session()
+    added_total = 0
+    failed = []
+    for i, symbol in enumerate(tickers, 1):
+        if i > 1 and args.pause:
+            time.sleep(args.pause)
+        try:
+            added = backfill_ticker(symbol, start_date, end_date, args.stocks_dir, session, pause=args.pause,
+                                    overrides=overrides.get(symbol))
+            added_total += added
+            print(f"[{i}/{len(tickers)}] {symbol}: +{added} rows")
+        except Exception as e:
+            failed.append(symbol)
+            print(f"[{i}/{len(tickers)}] {symbol}: failed ({e})")
+        sys.stdout.flush()
+
+    print(f"Backfill done: {added_total} rows added, {len(failed)} failed {failed if failed else ''}")
+    return added_total
+
 def update_stock_file(file_path):
     """Update a single stock CSV file with new data."""
     print(f"\nProcessing: {file_path.name}")
@@ -204,6 +442,11 @@ def main():
     """Main function to update all stock files."""
     import sys
     
+    if len(sys.argv) > 1 and sys.argv[1] == '--backfill':
+        backfill_main(sys.argv[2:])
+        notify_data_plane()
+        return
+    
     # Check for test mode (process only first N files)
     test_limit = None
     if len(sys.argv) > 1 and sys.argv[1] == '--test':
@@ -265,5 +508,16 @@ def main():
     print(f"  Errors: {error_count}")
     print("="*50)
 
+    notify_data_plane()
+
+def notify_data_plane():
+    """Let a running shared-memory data plane pick up the new files now."""
+    try:
+        from core.dataplane import request_publish
+        if request_publish():
+            print("Data plane reload requested")
+    except Exception as e:
+        print(f"Could not notify data plane: {e}")
+
 if __name__ == "__main__":
     main()